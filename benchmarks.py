@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for Quantum-Redstone Generation and Export
+Times the lookup table, every circuit generator, mcfunction and JSON
+output and each CAD exporter, on the seven stock gates and on synthetic
+circuits of 10^4-10^6 blocks. Each benchmark records median wall time,
+peak traced memory and bytes produced.
+
+Results can be saved as a baseline and later runs compared against it:
+
+    python benchmarks.py --save-baseline bench_baseline.json
+    python benchmarks.py --compare bench_baseline.json
+"""
+
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Optional, Callable
+
+import numpy as np
+
+import quantum_circuit_generator as qcg
+from export_cad import EXPORTERS, circuit_data
+from quantum_circuit_generator import BlockStore, Circuit
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_REPEAT = 3
+
+# Relative slowdown (or memory growth) reported as a regression
+DEFAULT_TOLERANCE = 0.25
+
+# Timings shorter than this are too noisy to flag
+MIN_COMPARABLE_SECONDS = 0.005
+
+CAD_FORMATS = ('dxf', 'stl', 'obj', 'svg')
+
+
+@dataclass
+class Benchmark:
+    """
+    One measured operation: run(tmpdir) performs it and returns bytes
+    produced. setup(), if given, builds its inputs outside the timed runs,
+    and only for benchmarks that are selected.
+    """
+    name: str
+    blocks: int
+    run: Callable[[str], int]
+    setup: Optional[Callable[[], object]] = None
+
+
+@dataclass
+class BenchResult:
+    name: str
+    blocks: int
+    seconds: float        # median wall time
+    peak_bytes: int       # peak traced allocation during one run
+    output_bytes: int
+    repeat: int
+
+
+# ============================================================================
+# CIRCUITS
+# ============================================================================
+
+def stock_circuits() -> List[Circuit]:
+    """The seven circuits written by quantum_circuit_generator.main()"""
+    lookup = qcg.generate_lookup_table()
+    return [
+        qcg.generate_state_preparation(),
+        qcg.generate_pauli_x(),
+        qcg.generate_pauli_z(),
+        qcg.generate_hadamard(),
+        qcg.generate_cnot(),
+        qcg.generate_phase_engine(lookup),
+        qcg.generate_conservation_verifier(),
+    ]
+
+
+def synthetic_circuit(n_blocks: int) -> Circuit:
+    """
+    A circuit of exactly n_blocks blocks, tiled from the stock gates on an
+    x-z grid so the material mix and NBT density match real layouts.
+    """
+    tile = BlockStore()
+    z = 0
+    for circuit in stock_circuits():
+        tile.extend_store(circuit.blocks, (0, 0, z))
+        z += circuit.dimensions[2] + 1
+    tile_size = np.array([60, 8, z], dtype=np.int32)
+
+    count = max(1, math.ceil(n_blocks / len(tile)))
+    side = math.ceil(math.sqrt(count))
+    cells = np.arange(count)
+    offsets = np.stack([cells % side, np.zeros(count, dtype=np.int64), cells // side], axis=1)
+    offsets = (offsets * tile_size).astype(np.int32)
+
+    store = BlockStore()
+    for block_id, props in tile.palette:
+        store.intern(block_id, props)
+    positions = (tile.positions[None, :, :] + offsets[:, None, :]).reshape(-1, 3)[:n_blocks]
+    store.extend_arrays(positions, np.tile(tile.state_ids, count)[:n_blocks])
+    for cell in range(count):
+        for row, nbt in tile.nbt.items():
+            index = cell * len(tile) + row
+            if index < n_blocks:
+                store.nbt[index] = nbt
+
+    extent = positions.max(axis=0) + 1 if n_blocks else np.zeros(3, dtype=np.int32)
+    return Circuit(
+        name=f"synthetic_{n_blocks}",
+        description=f"{n_blocks} blocks tiled from the stock gates",
+        blocks=store,
+        dimensions=tuple(int(v) for v in extent),
+    )
+
+
+# ============================================================================
+# SUITE
+# ============================================================================
+
+def _built_once(build: Callable[[], object]) -> Callable[[], object]:
+    """build(), called on first use and shared by later calls"""
+    built = []
+
+    def get():
+        if not built:
+            built.append(build())
+        return built[0]
+    return get
+
+
+def _file_size(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def _cad_export(fmt: str, data: Dict, tmpdir: str) -> int:
+    path = os.path.join(tmpdir, f"{data['name']}.{fmt}")
+    EXPORTERS[fmt](data).export(path)
+    size = _file_size(path)
+    if fmt == 'obj':
+        size += _file_size(os.path.splitext(path)[0] + '.mtl')
+    return size
+
+
+def _output_benchmarks(inputs: Callable[[], tuple], label: str, blocks: int) -> List[Benchmark]:
+    """Output benchmarks over inputs() -> (circuits, CAD export data)"""
+    def mcfunction(merge: bool) -> Callable[[str], int]:
+        def run(tmpdir: str) -> int:
+            return sum(len(qcg.generate_mcfunction(c, merge=merge).encode()) for c in inputs()[0])
+        return run
+
+    def json_run(compact: bool) -> Callable[[str], int]:
+        def run(tmpdir: str) -> int:
+            path = os.path.join(tmpdir, 'circuits.json')
+            qcg.export_to_json(inputs()[0], path, compact=compact)
+            return _file_size(path)
+        return run
+
+    benches = [
+        Benchmark(f"mcfunction[{label}]", blocks, mcfunction(False), inputs),
+        Benchmark(f"mcfunction.merge[{label}]", blocks, mcfunction(True), inputs),
+        Benchmark(f"json[{label}]", blocks, json_run(False), inputs),
+        Benchmark(f"json.compact[{label}]", blocks, json_run(True), inputs),
+    ]
+    for fmt in CAD_FORMATS:
+        benches.append(Benchmark(
+            f"cad.{fmt}[{label}]", blocks,
+            lambda tmpdir, fmt=fmt: sum(_cad_export(fmt, data, tmpdir) for data in inputs()[1]),
+            inputs))
+    return benches
+
+
+def build_suite(sizes=DEFAULT_SIZES, stock: bool = True) -> List[Benchmark]:
+    """
+    Benchmarks for the stock gates (if stock) and a synthetic circuit per
+    size. Synthetic circuits are built by the setup of the first selected
+    benchmark that needs them.
+    """
+    benches: List[Benchmark] = []
+    if stock:
+        def lookup(tmpdir: str) -> int:
+            qcg.build_lookup_arrays.cache_clear()
+            return len(json.dumps(qcg.generate_lookup_table()).encode())
+        benches.append(Benchmark("lookup_table", 16, lookup))
+
+        chain = ['h', 'z', 'h', 'x'] * 4
+
+        def compose(tmpdir: str) -> int:
+            qcg.gate_transfer_table.cache_clear()
+            qcg._COMPOSERS.clear()
+            return qcg.compose_transfer(chain).values.nbytes
+        benches.append(Benchmark("compose_transfer", len(chain), compose))
+        chain_circuit = qcg.generate_chain_lookup(chain)
+        benches.append(Benchmark("generate.chain_lookup", len(chain_circuit.blocks),
+                                 lambda tmpdir: qcg.generate_chain_lookup(chain).blocks.nbytes))
+
+        circuits = stock_circuits()
+        generators = [
+            ('state_preparation', qcg.generate_state_preparation),
+            ('pauli_x', qcg.generate_pauli_x),
+            ('pauli_z', qcg.generate_pauli_z),
+            ('hadamard', qcg.generate_hadamard),
+            ('cnot', qcg.generate_cnot),
+            ('phase_engine', lambda: qcg.generate_phase_engine(qcg.generate_lookup_table())),
+            ('conservation_verifier', qcg.generate_conservation_verifier),
+        ]
+        for (name, generator), circuit in zip(generators, circuits):
+            benches.append(Benchmark(f"generate.{name}", len(circuit.blocks),
+                                     lambda tmpdir, g=generator: g().blocks.nbytes))
+        # Stock circuits export from their JSON form, as qr-export-cad reads them
+        stock_inputs = _built_once(lambda: (circuits, [c.to_dict() for c in circuits]))
+        benches.extend(_output_benchmarks(stock_inputs, 'stock', sum(len(c.blocks) for c in circuits)))
+
+    for size in sizes:
+        benches.append(Benchmark(f"synthesize[{size}]", size,
+                                 lambda tmpdir, size=size: synthetic_circuit(size).blocks.nbytes))
+
+        def synthetic_inputs(size=size):
+            circuit = synthetic_circuit(size)
+            return [circuit], [circuit_data(circuit)]
+        benches.extend(_output_benchmarks(_built_once(synthetic_inputs), str(size), size))
+    return benches
+
+
+def measure(bench: Benchmark, repeat: int = DEFAULT_REPEAT) -> BenchResult:
+    """
+    Run a benchmark repeat times for the median wall time, then once more
+    under tracemalloc for the peak allocation (tracing slows the code down,
+    so it is kept out of the timed runs).
+    """
+    if bench.setup is not None:
+        bench.setup()
+    times = []
+    output = 0
+    with tempfile.TemporaryDirectory() as tmpdir, contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = bench.run(tmpdir)
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            bench.run(tmpdir)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return BenchResult(bench.name, bench.blocks, statistics.median(times), peak, int(output), repeat)
+
+
+def run_suite(benches: List[Benchmark], repeat: int = DEFAULT_REPEAT,
+              pattern: Optional[str] = None, verbose: bool = True) -> List[BenchResult]:
+    """Measure every benchmark whose name contains pattern"""
+    results = []
+    for bench in benches:
+        if pattern and pattern not in bench.name:
+            continue
+        result = measure(bench, repeat)
+        results.append(result)
+        if verbose:
+            print(format_result(result), flush=True)
+    return results
+
+
+# ============================================================================
+# REPORTING AND BASELINES
+# ============================================================================
+
+def _human_bytes(count: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if count < 1024 or unit == 'GB':
+            return f"{count:.0f} {unit}" if unit == 'B' else f"{count:.1f} {unit}"
+        count /= 1024
+
+
+def format_result(result: BenchResult) -> str:
+    return (f"  {result.name:<34} {result.blocks:>9} {result.seconds * 1000:>10.2f} ms "
+            f"{_human_bytes(result.peak_bytes):>10} {_human_bytes(result.output_bytes):>10}")
+
+
+def format_header() -> str:
+    return f"  {'benchmark':<34} {'blocks':>9} {'time':>13} {'peak mem':>10} {'output':>10}"
+
+
+def save_baseline(results: List[BenchResult], path: str):
+    report = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': {r.name: asdict(r) for r in results},
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved baseline: {path}")
+
+
+def compare_to_baseline(results: List[BenchResult], baseline: Dict,
+                        tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Regressions against a saved baseline: time or peak memory more than
+    tolerance above it, or output size changed at all.
+    """
+    previous = baseline.get('results', {})
+    regressions = []
+    for result in results:
+        old = previous.get(result.name)
+        if old is None:
+            continue
+        if (result.seconds > old['seconds'] * (1 + tolerance)
+                and result.seconds >= MIN_COMPARABLE_SECONDS):
+            regressions.append(f"{result.name}: time {old['seconds'] * 1000:.2f} ms -> "
+                               f"{result.seconds * 1000:.2f} ms")
+        if result.peak_bytes > old['peak_bytes'] * (1 + tolerance) + 64 * 1024:
+            regressions.append(f"{result.name}: peak memory {_human_bytes(old['peak_bytes'])} -> "
+                               f"{_human_bytes(result.peak_bytes)}")
+        if result.output_bytes != old['output_bytes']:
+            regressions.append(f"{result.name}: output {old['output_bytes']} B -> "
+                               f"{result.output_bytes} B")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark Quantum-Redstone generation and export")
+    parser.add_argument('--sizes', type=int, nargs='*', default=list(DEFAULT_SIZES),
+                        help="synthetic circuit sizes in blocks (default: 1e4 1e5 1e6)")
+    parser.add_argument('--no-stock', action='store_true', help="skip the seven stock gates")
+    parser.add_argument('--repeat', '-r', type=int, default=DEFAULT_REPEAT,
+                        help="timed runs per benchmark (median is reported)")
+    parser.add_argument('--filter', '-k', help="only run benchmarks whose name contains this")
+    parser.add_argument('--save-baseline', metavar='PATH', help="write results as a baseline")
+    parser.add_argument('--compare', metavar='PATH', help="compare against a saved baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative slowdown before flagging (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print("Quantum-Redstone Benchmarks")
+    print("=" * 60)
+    print()
+    print(format_header())
+    benches = build_suite(args.sizes, stock=not args.no_stock)
+    results = run_suite(benches, args.repeat, args.filter)
+    print()
+
+    if args.save_baseline:
+        save_baseline(results, args.save_baseline)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.compare}:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
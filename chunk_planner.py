@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Chunk-Partitioned Placement for Quantum-Redstone Layouts
+Plans the placement of a circuit at an absolute world origin as a set of
+mcfunction files, so large builds place reliably on a running server
+without loading every chunk at once or stalling a tick:
+
+- blocks are bucketed by 16x16x16 chunk section and merged into /fill
+  boxes within each section, so no command reaches across a chunk border
+- each visit to a chunk becomes chunk functions of at most the
+  commands-per-tick budget; the last one ends with `forceload remove`
+- tick functions run as many chunk functions as fit in the budget,
+  `forceload add` the chunks the next tick starts on, and schedule it
+
+Components hanging on a block in another chunk (torches, wire, levers
+next to a chunk border) are held back and placed in a second pass, once
+the structure of every chunk exists.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import List, Dict, Tuple
+
+import numpy as np
+
+from circuit_lint import CHUNK_SIZE
+from quantum_circuit_generator import (Circuit, NEEDS_SUPPORT, plan_fill_commands, resolve_placement,
+                                       support_offset)
+
+# Placement and forceload commands run per server tick
+DEFAULT_COMMANDS_PER_TICK = 512
+
+
+@dataclass
+class ChunkBatch:
+    """Commands for one chunk that run together in one tick"""
+    chunk: Tuple[int, int]      # chunk column (cx, cz)
+    part: int                   # numbered per chunk across both passes
+    commands: List[str]
+    first: bool                 # first batch of a visit: force-loaded the tick before
+    last: bool                  # last batch of a visit: ends with forceload remove
+    deferred: bool = False      # second pass: components supported from another chunk
+
+    @property
+    def function_name(self) -> str:
+        return f"chunk_{self.chunk[0]}_{self.chunk[1]}_{self.part}"
+
+    @property
+    def cost(self) -> int:
+        return len(self.commands) + (1 if self.last else 0)
+
+    def forceload(self, action: str) -> str:
+        return f"forceload {action} {self.chunk[0] * CHUNK_SIZE} {self.chunk[1] * CHUNK_SIZE}"
+
+
+@dataclass
+class PlacementPlan:
+    """Chunk batches and their packing into ticks"""
+    name: str                   # function directory, e.g. place_cnot_gate
+    origin: Tuple[int, int, int]
+    budget: int
+    batches: List[ChunkBatch]
+    preload: List[int]          # batches force-loaded by the start function
+    ticks: List[List[int]]      # batch indices run in each tick
+
+    @property
+    def command_count(self) -> int:
+        return sum(len(batch.commands) for batch in self.batches)
+
+    def tick_costs(self) -> List[int]:
+        """Commands run in the start function and in each tick"""
+        costs = [len(self.preload)]
+        for t, tick in enumerate(self.ticks):
+            following = self.ticks[t + 1] if t + 1 < len(self.ticks) else []
+            costs.append(sum(self.batches[i].cost for i in tick)
+                         + sum(1 for i in following if self.batches[i].first))
+        return costs
+
+    def functions(self, namespace: str = "quantum") -> Dict[str, str]:
+        """Function file contents keyed by path below the functions directory"""
+        base = f"{namespace}:{self.name}"
+        chunks = len({batch.chunk for batch in self.batches})
+        files = {}
+        files[f"{self.name}/start"] = "\n".join([
+            f"# {self.name} at {' '.join(map(str, self.origin))}",
+            f"# {self.command_count} commands in {len(self.batches)} batches over "
+            f"{chunks} chunks, {len(self.ticks)} ticks at <= {self.budget} commands/tick",
+            "",
+            *(self.batches[i].forceload('add') for i in self.preload),
+            f"schedule function {base}/tick_0 1t" if self.ticks else "",
+        ]).rstrip("\n")
+
+        for t, tick in enumerate(self.ticks):
+            lines = [f"# {self.name} tick {t}", ""]
+            lines.extend(f"function {base}/{self.batches[i].function_name}" for i in tick)
+            if t + 1 < len(self.ticks):
+                lines.extend(self.batches[i].forceload('add')
+                             for i in self.ticks[t + 1] if self.batches[i].first)
+                lines.append(f"schedule function {base}/tick_{t + 1} 1t")
+            files[f"{self.name}/tick_{t}"] = "\n".join(lines)
+
+        for batch in self.batches:
+            lines = [f"# {self.name} chunk {batch.chunk[0]} {batch.chunk[1]} part {batch.part}", ""]
+            lines.extend(batch.commands)
+            if batch.last:
+                lines.append(batch.forceload('remove'))
+            files[f"{self.name}/{batch.function_name}"] = "\n".join(lines)
+        return files
+
+    def write(self, functions_dir: str, namespace: str = "quantum") -> List[str]:
+        """Write every function below functions_dir; returns the paths"""
+        written = []
+        for name, text in self.functions(namespace).items():
+            path = os.path.join(functions_dir, f"{name}.mcfunction")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            written.append(path)
+        print(f"Exported chunked placement: {os.path.join(functions_dir, self.name)} "
+              f"({len(self.batches)} batches, {len(self.ticks)} ticks)")
+        return written
+
+
+def _deferred_rows(circuit: Circuit, state_ids: np.ndarray, world: np.ndarray) -> np.ndarray:
+    """Mask of components whose supporting block lies in another chunk column"""
+    palette = circuit.blocks.palette
+    needs = np.array([block_id in NEEDS_SUPPORT for block_id, _ in palette], dtype=bool)
+    offsets = np.array([support_offset(block_id, props) for block_id, props in palette],
+                       dtype=np.int64).reshape(-1, 3)
+    own = np.floor_divide(world[:, [0, 2]], CHUNK_SIZE)
+    support = np.floor_divide(world[:, [0, 2]] + offsets[state_ids][:, [0, 2]], CHUNK_SIZE)
+    return needs[state_ids] & np.any(own != support, axis=1)
+
+
+def plan_chunk_batches(circuit: Circuit, origin: Tuple[int, int, int] = (0, 0, 0),
+                       budget: int = DEFAULT_COMMANDS_PER_TICK) -> List[ChunkBatch]:
+    """
+    Split a circuit placed at origin into per-chunk batches of absolute
+    /fill and /setblock commands. Chunks are visited in a serpentine over
+    x then z, sections bottom-up; each batch holds at most budget - 1
+    commands so it fits a tick with its forceload remove.
+    """
+    if budget < 2:
+        raise ValueError(f"budget must be at least 2 commands per tick, got {budget}")
+    store = circuit.blocks
+    positions, state_ids, rows = resolve_placement(store)
+    if not len(rows):
+        return []
+    world = positions.astype(np.int64) + np.asarray(origin, dtype=np.int64)
+    sections = np.floor_divide(world, CHUNK_SIZE)
+    held_back = _deferred_rows(circuit, state_ids, world)
+
+    batches: List[ChunkBatch] = []
+    parts: Dict[Tuple[int, int], int] = {}
+    for deferred, in_pass in ((False, ~held_back), (True, held_back)):
+        index = np.flatnonzero(in_pass)
+        if not len(index):
+            continue
+        cx, sy, cz = sections[index, 0], sections[index, 1], sections[index, 2]
+        serpentine = np.where(cx % 2 == 0, cz, -cz)
+        index = index[np.lexsort((sy, serpentine, cx))]
+        keys = sections[index]
+        breaks = np.flatnonzero(np.any(keys[1:] != keys[:-1], axis=1)) + 1
+        visit: List[str] = []
+        for start, end in zip(np.r_[0, breaks], np.r_[breaks, len(index)]):
+            section = index[start:end]
+            sub = Circuit(circuit.name, circuit.description,
+                          store.subset(rows[section], origin), circuit.dimensions)
+            visit.extend(plan_fill_commands(sub, relative=False)[0])
+            chunk = (int(keys[start, 0]), int(keys[start, 2]))
+            if end < len(index) and (keys[end, 0], keys[end, 2]) == chunk:
+                continue
+            # Visit complete: cut it into budget-sized batches
+            size = budget - 1
+            pieces = [visit[i:i + size] for i in range(0, len(visit), size)]
+            for k, piece in enumerate(pieces):
+                part = parts.get(chunk, 0)
+                parts[chunk] = part + 1
+                batches.append(ChunkBatch(chunk, part, piece, k == 0, k == len(pieces) - 1, deferred))
+            visit = []
+    return batches
+
+
+def schedule_batches(batches: List[ChunkBatch],
+                     budget: int = DEFAULT_COMMANDS_PER_TICK) -> Tuple[List[int], List[List[int]]]:
+    """
+    Pack batches, in order, into ticks of at most budget commands. A
+    batch that starts a chunk visit also costs its tick's predecessor
+    (or the start function) one forceload add. Returns (preload, ticks).
+    """
+    slots: List[List[int]] = [[]]       # slot 0 is the start function
+    costs = [0]
+    for i, batch in enumerate(batches):
+        t = len(slots) - 1
+        while (t == 0 or costs[t] + batch.cost > budget
+               or (batch.first and costs[t - 1] + 1 > budget)):
+            slots.append([])
+            costs.append(0)
+            t += 1
+        slots[t].append(i)
+        costs[t] += batch.cost
+        if batch.first:
+            costs[t - 1] += 1
+    preload = [i for i in slots[1] if batches[i].first] if len(slots) > 1 else []
+    return preload, slots[1:]
+
+
+def plan_chunked_placement(circuit: Circuit, origin: Tuple[int, int, int] = (0, 0, 0),
+                           budget: int = DEFAULT_COMMANDS_PER_TICK) -> PlacementPlan:
+    """Plan the chunked, tick-scheduled placement of a circuit at origin"""
+    batches = plan_chunk_batches(circuit, origin, budget)
+    preload, ticks = schedule_batches(batches, budget)
+    return PlacementPlan(f"place_{circuit.name}", tuple(origin), budget, batches, preload, ticks)
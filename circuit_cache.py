@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Cache for Quantum-Redstone Circuits and Artifacts
+Stores generated circuits (as compact JSON) and rendered artifacts
+(circuits JSON, lookup tables, mcfunction files) on disk under the SHA-256
+of what produced them: the kind of entry, the generator, its parameters
+and a hash of the source of every module that shapes cached output
+(CACHED_MODULES). Any change to them therefore misses the cache instead
+of serving stale output.
+
+The cache is bounded in size: once it grows past max_bytes the least
+recently used entries are deleted until it is back under LOW_WATER of the
+limit, so large parameter sweeps cannot fill the disk.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Bump when the layout or serialization of entries changes
+CACHE_FORMAT = 1
+
+# Modules whose source goes into every key: the generators and
+# mcfunction/JSON writers, the lint rules used for fill ordering and the
+# NBT tag types rendered into SNBT
+CACHED_MODULES = ('quantum_circuit_generator', 'circuit_lint', 'schematic')
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Eviction trims the cache to this fraction of max_bytes
+LOW_WATER = 0.8
+
+
+def default_cache_dir() -> Path:
+    """$QR_CACHE_DIR, else $XDG_CACHE_HOME/quantum-redstone (~/.cache/...)"""
+    if os.environ.get('QR_CACHE_DIR'):
+        return Path(os.environ['QR_CACHE_DIR'])
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(base) / 'quantum-redstone'
+
+
+@lru_cache(maxsize=8)
+def code_version(modules: Tuple[str, ...] = CACHED_MODULES) -> str:
+    """
+    Hash of the given modules' source and the cache format. Modules are
+    located without importing them, so the CLI's lazy imports stay lazy.
+    """
+    digest = hashlib.sha256(str(CACHE_FORMAT).encode('utf-8'))
+    for name in modules:
+        spec = importlib.util.find_spec(name)
+        if spec is None or not spec.origin:
+            raise ImportError(f"Cannot locate module '{name}' to version the cache")
+        digest.update(name.encode('utf-8') + b'\0')
+        digest.update(Path(spec.origin).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def write_if_changed(path: str, data: bytes) -> bool:
+    """Write data unless the file already holds exactly it; True if written"""
+    target = Path(path)
+    if target.exists() and target.stat().st_size == len(data) and target.read_bytes() == data:
+        return False
+    tmp_path = target.with_name(target.name + '.tmp')
+    tmp_path.write_bytes(data)
+    tmp_path.replace(target)
+    return True
+
+
+class ArtifactCache:
+    """
+    Entries live at <directory>/<key[:2]>/<key>. A hit refreshes the
+    entry's mtime, which is what eviction orders by. A disabled cache
+    misses every lookup and stores nothing. Keys include code_version() of
+    modules (default CACHED_MODULES).
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 enabled: bool = True, modules: Tuple[str, ...] = CACHED_MODULES):
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.modules = tuple(modules)
+        self.hits = 0
+        self.misses = 0
+        self._size: Optional[int] = None   # running total, scanned on first put
+
+    def key(self, kind: str, generator: str, **params) -> str:
+        """Key of the entry `generator(**params)` produces, for this code version"""
+        spec = {'kind': kind, 'generator': generator, 'params': params, 'version': code_version(self.modules)}
+        text = json.dumps(spec, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def get(self, key: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        if not self.enabled:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        previous = path.stat().st_size if path.exists() else 0
+        tmp_path = path.with_name(f"{key}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+        if self._size is None:
+            self._size = self.size()
+        else:
+            self._size += len(data) - previous
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def fetch(self, key: str, build: Callable[[], bytes]) -> bytes:
+        """Cached bytes for key, building and storing them on a miss"""
+        data = self.get(key)
+        if data is None:
+            data = build()
+            self.put(key, data)
+        return data
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        if not self.directory.is_dir():
+            return entries
+        for shard in self.directory.iterdir():
+            if not shard.is_dir():
+                continue
+            for path in shard.iterdir():
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self) -> int:
+        """Total bytes held by the cache"""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, target: Optional[int] = None) -> int:
+        """Delete least recently used entries until at most target bytes remain"""
+        target = int(self.max_bytes * LOW_WATER) if target is None else target
+        entries = sorted(self._entries(), key=lambda entry: entry[0])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._size = total
+        return removed
+
+    def clear(self) -> int:
+        """Delete every entry; returns the number removed"""
+        return self.evict(target=0)
+
+    def stats(self) -> Dict:
+        entries = self._entries()
+        return {'directory': str(self.directory), 'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries), 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses}
+
+    # ------------------------------------------------------------------
+    # Circuits and files
+    # ------------------------------------------------------------------
+
+    def circuit(self, key: str, build: Callable):
+        """Cached Circuit for key, calling build() and storing it on a miss"""
+        from quantum_circuit_generator import Circuit, compact_json
+
+        data = self.get(key)
+        if data is not None:
+            return Circuit.from_dict(json.loads(data))
+        circuit = build()
+        self.put(key, compact_json(circuit).encode('utf-8'))
+        return circuit
+
+    def file(self, key: str, path: str, render: Callable[[str], None]) -> bool:
+        """
+        Produce the file at path: copied from the cache on a hit (left
+        untouched if already identical), else render(path) writes it and
+        the result is stored. Returns True on a hit.
+        """
+        data = self.get(key)
+        if data is not None:
+            write_if_changed(path, data)
+            return True
+        render(path)
+        self.put(key, Path(path).read_bytes())
+        return False
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Incremental Placement Between Circuit Revisions
+Compares two revisions of a circuit (Circuit objects, two
+quantum_circuits.json / .npz snapshots, or schematics) voxel by voxel
+through packed position keys, and emits only the commands that turn an
+in-world build of the old revision into the new one: changed and added blocks are set to
+their new state and removed blocks become air. Updates therefore cost in
+proportion to the change, not to the size of the build.
+"""
+
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Optional
+
+import numpy as np
+
+from circuit_lint import pack_positions
+from quantum_circuit_generator import (
+    BlockStore, Circuit, format_block_state, load_from_json, load_from_npz, plan_fill_commands,
+    resolve_placement, to_snbt,
+)
+from schematic import SCHEMATIC_READERS, load_schematic
+
+AIR = "minecraft:air"
+
+
+@dataclass
+class CircuitDiff:
+    """Voxel-level difference between two revisions of a circuit"""
+    name: str
+    old: Optional[Circuit]
+    new: Optional[Circuit]
+    added: np.ndarray       # rows of new.blocks placed where old had nothing
+    changed: np.ndarray     # rows of new.blocks whose state differs from old
+    retagged: np.ndarray    # rows of new.blocks whose block state matches old but NBT differs
+    removed: np.ndarray     # rows of old.blocks with nothing at their position in new
+    unchanged: int
+
+    @property
+    def is_empty(self) -> bool:
+        return not (len(self.added) or len(self.changed) or len(self.retagged) or len(self.removed))
+
+    def summary(self) -> str:
+        return (f"{self.name}: +{len(self.added)} added, ~{len(self.changed) + len(self.retagged)} changed, "
+                f"-{len(self.removed)} removed, {self.unchanged} unchanged")
+
+    def patch(self) -> Circuit:
+        """
+        Circuit holding just the blocks to place: new states for added and
+        changed voxels, air for removed ones. Retagged voxels are not
+        included; commands() updates their NBT in place.
+        """
+        store = BlockStore()
+        dimensions = (0, 0, 0)
+        if self.new is not None:
+            store = self.new.blocks.subset(np.concatenate([self.added, self.changed]))
+            dimensions = self.new.dimensions
+        if len(self.removed):
+            air = store.intern(AIR)
+            store.extend_arrays(self.old.blocks.positions[self.removed],
+                                np.full(len(self.removed), air, dtype=np.int32))
+            if self.new is None:
+                dimensions = self.old.dimensions
+        return Circuit(f"{self.name}_patch", f"Update of {self.name}", store, dimensions)
+
+    def commands(self, origin: Optional[Tuple[int, int, int]] = None) -> List[str]:
+        """
+        /fill and /setblock commands applying the diff, merged into boxes
+        over changed voxels only. Coordinates are ~relative (as from the
+        place_<name> function) unless an absolute origin is given.
+        """
+        patch = self.patch()
+        if origin is not None:
+            patch = Circuit(patch.name, patch.description,
+                            patch.blocks.subset(np.arange(len(patch.blocks)), origin), patch.dimensions)
+        commands = plan_fill_commands(patch, relative=origin is None)[0]
+
+        # /setblock refuses an unchanged block state, so NBT is updated in place
+        t = '~' if origin is None else ''
+        shift = np.zeros(3, dtype=np.int64) if origin is None else np.asarray(origin, dtype=np.int64)
+        store = self.new.blocks if self.new is not None else None
+        for row in self.retagged.tolist():
+            x, y, z = (store.positions[row] + shift).tolist()
+            if row in store.nbt:
+                commands.append(f"data merge block {t}{x} {t}{y} {t}{z} {to_snbt(store.nbt[row])}")
+            else:
+                # NBT dropped entirely: replace the block to clear it
+                commands.append(f"setblock {t}{x} {t}{y} {t}{z} {AIR}")
+                commands.append(f"setblock {t}{x} {t}{y} {t}{z} {format_block_state(*store.state(row))}")
+        return commands
+
+
+def _state_tokens(store: BlockStore, state_ids: np.ndarray, tokens: Dict[Tuple, int]) -> np.ndarray:
+    """Comparable integer per voxel from block id and sorted properties"""
+    remap = np.array([tokens.setdefault((block_id, tuple(sorted((props or {}).items()))), len(tokens))
+                      for block_id, props in store.palette], dtype=np.int64)
+    return remap[state_ids] if len(state_ids) else np.empty(0, dtype=np.int64)
+
+
+def _has_nbt(store: BlockStore, rows: np.ndarray) -> np.ndarray:
+    if not store.nbt:
+        return np.zeros(len(rows), dtype=bool)
+    return np.isin(rows, np.fromiter(store.nbt, dtype=np.int64, count=len(store.nbt)))
+
+
+def diff_circuits(old: Optional[Circuit], new: Optional[Circuit]) -> CircuitDiff:
+    """
+    Compare two revisions of a circuit. Either may be None (circuit added
+    or deleted). Repeated positions resolve to the last block placed, as
+    in the world.
+    """
+    if old is None and new is None:
+        raise ValueError("diff_circuits needs at least one circuit")
+    name = (new or old).name
+    empty_circuit = Circuit(name, "", BlockStore(), (0, 0, 0))
+    old_circuit, new_circuit = old or empty_circuit, new or empty_circuit
+    old_pos, old_ids, old_rows = resolve_placement(old_circuit.blocks)
+    new_pos, new_ids, new_rows = resolve_placement(new_circuit.blocks)
+    old_keys, new_keys = pack_positions(old_pos), pack_positions(new_pos)
+
+    _, old_at, new_at = np.intersect1d(old_keys, new_keys, assume_unique=True, return_indices=True)
+    tokens: Dict[Tuple, int] = {}
+    same_state = (_state_tokens(old_circuit.blocks, old_ids, tokens)[old_at]
+                  == _state_tokens(new_circuit.blocks, new_ids, tokens)[new_at])
+
+    # NBT only matters where the block states agree and either side has some
+    retag = np.zeros(len(old_at), dtype=bool)
+    either = _has_nbt(old_circuit.blocks, old_rows[old_at]) | _has_nbt(new_circuit.blocks, new_rows[new_at])
+    for i in np.flatnonzero(same_state & either).tolist():
+        old_nbt = old_circuit.blocks.nbt.get(int(old_rows[old_at[i]]))
+        new_nbt = new_circuit.blocks.nbt.get(int(new_rows[new_at[i]]))
+        retag[i] = old_nbt != new_nbt
+
+    only_old = np.ones(len(old_keys), dtype=bool)
+    only_old[old_at] = False
+    only_new = np.ones(len(new_keys), dtype=bool)
+    only_new[new_at] = False
+    return CircuitDiff(
+        name=name,
+        old=old,
+        new=new,
+        added=np.sort(new_rows[only_new]),
+        changed=np.sort(new_rows[new_at[~same_state]]),
+        retagged=np.sort(new_rows[new_at[retag]]),
+        removed=np.sort(old_rows[only_old]),
+        unchanged=int(np.count_nonzero(same_state & ~retag)),
+    )
+
+
+def load_snapshot(path: str) -> Dict[str, Circuit]:
+    """
+    Circuits of a quantum_circuits.json (full or compact) or .npz snapshot,
+    or the one circuit in a .schem/.litematic/.nbt schematic, by name
+    """
+    if path.lower().endswith(tuple(SCHEMATIC_READERS)):
+        circuit = load_schematic(path)
+        return {circuit.name: circuit}
+    circuits = load_from_npz(path) if path.endswith('.npz') else load_from_json(path)
+    return {circuit.name: circuit for circuit in circuits}
+
+
+def diff_snapshots(old_path: str, new_path: str) -> List[CircuitDiff]:
+    """Diff every circuit present in either snapshot, matched by name"""
+    old, new = load_snapshot(old_path), load_snapshot(new_path)
+    names = list(new) + [name for name in old if name not in new]
+    return [diff_circuits(old.get(name), new.get(name)) for name in names]
+
+
+def generate_diff_mcfunction(diff: CircuitDiff, origin: Optional[Tuple[int, int, int]] = None) -> str:
+    """
+    Function updating a build of diff.old to diff.new. Run it from the
+    position place_<name> was run from (or pass the build's origin).
+    """
+    commands = diff.commands(origin)
+    lines = [
+        f"# update {diff.name}",
+        f"# {diff.summary()}",
+        f"# Commands: {len(commands)}",
+        "",
+    ]
+    lines.extend(commands)
+    return "\n".join(lines)
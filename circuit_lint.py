@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Structural Lint for Quantum-Redstone Circuits
+Builds a hashed voxel index over a Circuit and checks it for:
+- collisions (several blocks placed at one position)
+- unsupported components (wire, torches, levers, ... with nothing to sit on)
+- blocks outside the circuit's declared dimensions
+"""
+
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Optional, Iterator
+
+import numpy as np
+
+from quantum_circuit_generator import Circuit, NEEDS_SUPPORT, NEIGHBOUR_OFFSETS, support_offset
+
+# Chunk edge length used to bucket blocks for region queries
+CHUNK_SIZE = 16
+
+# Packed key layout: signed x in the top 26 bits, then y (12 bits) and z
+# (26 bits) offset to non-negative. Covers x/z within ±2^25 (past the
+# ±30M world border) and y within ±2^11 (past the -64..320 build limit).
+_XZ_BITS = 26
+_Y_BITS = 12
+_XZ_OFFSET = 1 << (_XZ_BITS - 1)
+_Y_OFFSET = 1 << (_Y_BITS - 1)
+_KEY_LOW = np.array([-_XZ_OFFSET, -_Y_OFFSET, -_XZ_OFFSET])
+_KEY_HIGH = np.array([_XZ_OFFSET, _Y_OFFSET, _XZ_OFFSET])
+
+# Blocks that cannot hold up a component placed on or against them
+NON_SOLID_BLOCKS = {
+    'minecraft:air',
+    'minecraft:redstone_wire',
+    'minecraft:redstone_torch',
+    'minecraft:redstone_wall_torch',
+    'minecraft:lever',
+    'minecraft:stone_button',
+    'minecraft:comparator',
+    'minecraft:repeater',
+}
+
+
+def pack_positions(positions: np.ndarray) -> np.ndarray:
+    """
+    Pack (n, 3) integer coordinates into int64 hash keys.
+
+    Keys sort like (x, y, z) tuples. Raises ValueError for coordinates
+    outside the packed range, which would otherwise collide.
+    """
+    p = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+    if len(p) and (np.any(p.min(axis=0) < _KEY_LOW) or np.any(p.max(axis=0) >= _KEY_HIGH)):
+        raise ValueError(f"positions outside the packable range: x/z in "
+                         f"[{-_XZ_OFFSET}, {_XZ_OFFSET}), y in [{-_Y_OFFSET}, {_Y_OFFSET})")
+    return ((p[:, 0] << (_XZ_BITS + _Y_BITS)) | ((p[:, 1] + _Y_OFFSET) << _XZ_BITS)
+            | (p[:, 2] + _XZ_OFFSET))
+
+
+def pack_position(x: int, y: int, z: int) -> int:
+    """Scalar pack_positions() for lookups; the range is not checked"""
+    return (x << (_XZ_BITS + _Y_BITS)) | ((y + _Y_OFFSET) << _XZ_BITS) | (z + _XZ_OFFSET)
+
+
+class VoxelIndex:
+    """
+    Hashed voxel index over a circuit's blocks.
+
+    Point and neighbour queries are dict lookups on packed coordinates;
+    region queries only scan the chunk buckets (CHUNK_SIZE³ sections) that
+    overlap the region. Where several blocks share a position, the last
+    one placed is the one reported by get().
+    """
+
+    def __init__(self, circuit: Circuit):
+        self.circuit = circuit
+        store = circuit.blocks
+        self.positions = store.positions
+        keys = pack_positions(self.positions)
+
+        # dict() keeps the last row for repeated keys, matching placement order
+        self._top: Dict[int, int] = dict(zip(keys.tolist(), range(len(keys))))
+
+        unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        order = np.argsort(inverse.reshape(-1), kind='stable')
+        starts = np.cumsum(counts) - counts
+        self._stacked: Dict[int, List[int]] = {}
+        for slot in np.flatnonzero(counts > 1).tolist():
+            rows = order[starts[slot]:starts[slot] + counts[slot]]
+            self._stacked[int(unique[slot])] = rows.tolist()
+
+        sections = np.floor_divide(self.positions, CHUNK_SIZE)
+        section_keys = pack_positions(sections)
+        order = np.argsort(section_keys, kind='stable')
+        unique_sections, starts = np.unique(section_keys[order], return_index=True)
+        bounds = np.append(starts, len(order))
+        self._chunks: Dict[Tuple[int, int, int], np.ndarray] = {}
+        for i, first in enumerate(starts.tolist()):
+            key = tuple(sections[order[first]].tolist())
+            self._chunks[key] = order[bounds[i]:bounds[i + 1]]
+
+    def __len__(self) -> int:
+        return len(self._top)
+
+    def get(self, x: int, y: int, z: int) -> Optional[int]:
+        """Row of the block at a position, or None"""
+        return self._top.get(pack_position(x, y, z))
+
+    def rows_at(self, x: int, y: int, z: int) -> List[int]:
+        """Every row placed at a position, in placement order"""
+        key = pack_position(x, y, z)
+        if key in self._stacked:
+            return list(self._stacked[key])
+        row = self._top.get(key)
+        return [] if row is None else [row]
+
+    def block_id(self, row: Optional[int]) -> Optional[str]:
+        return None if row is None else self.circuit.blocks.state(row)[0]
+
+    def neighbours(self, x: int, y: int, z: int) -> Dict[str, int]:
+        """Rows of the six face neighbours that are occupied, by direction"""
+        found = {}
+        for direction, (dx, dy, dz) in NEIGHBOUR_OFFSETS.items():
+            row = self.get(x + dx, y + dy, z + dz)
+            if row is not None:
+                found[direction] = row
+        return found
+
+    def region(self, lo: Tuple[int, int, int], hi: Tuple[int, int, int]) -> np.ndarray:
+        """Rows with lo <= position <= hi (inclusive), in placement order"""
+        lo_arr = np.asarray(lo, dtype=np.int64)
+        hi_arr = np.asarray(hi, dtype=np.int64)
+        c_lo = np.floor_divide(lo_arr, CHUNK_SIZE).tolist()
+        c_hi = np.floor_divide(hi_arr, CHUNK_SIZE).tolist()
+        span = [max(0, c_hi[i] - c_lo[i] + 1) for i in range(3)]
+        if span[0] * span[1] * span[2] <= len(self._chunks):
+            keys = ((cx, cy, cz)
+                    for cx in range(c_lo[0], c_hi[0] + 1)
+                    for cy in range(c_lo[1], c_hi[1] + 1)
+                    for cz in range(c_lo[2], c_hi[2] + 1))
+            buckets = [self._chunks[key] for key in keys if key in self._chunks]
+        else:
+            buckets = [rows for key, rows in self._chunks.items()
+                       if all(c_lo[i] <= key[i] <= c_hi[i] for i in range(3))]
+        if not buckets:
+            return np.empty(0, dtype=np.int64)
+        rows = np.sort(np.concatenate(buckets))
+        pos = self.positions[rows]
+        inside = np.all((pos >= lo_arr) & (pos <= hi_arr), axis=1)
+        return rows[inside]
+
+    def stacked(self) -> Iterator[Tuple[Tuple[int, int, int], List[int]]]:
+        """Yield (position, rows) for every position holding several blocks"""
+        for rows in self._stacked.values():
+            yield tuple(self.positions[rows[0]].tolist()), rows
+
+
+# ============================================================================
+# LINT PASS
+# ============================================================================
+
+@dataclass
+class LintIssue:
+    """A structural problem found in a circuit"""
+    kind: str                       # 'collision', 'unsupported', 'out_of_bounds'
+    position: Tuple[int, int, int]
+    rows: List[int]
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.kind} at {self.position}: {self.message}"
+
+
+def lint_circuit(circuit: Circuit, ground_y: int = 0,
+                 index: Optional[VoxelIndex] = None) -> List[LintIssue]:
+    """
+    Check a circuit for collisions, unsupported components and blocks
+    outside its declared dimensions.
+
+    Blocks at or below ground_y are treated as resting on the world's
+    ground, since circuits are placed relative to the player's position.
+    """
+    index = index or VoxelIndex(circuit)
+    store = circuit.blocks
+    issues: List[LintIssue] = []
+
+    for position, rows in index.stacked():
+        names = [store.state(row)[0] for row in rows]
+        issues.append(LintIssue('collision', position, rows,
+                                f"{len(rows)} blocks placed here ({', '.join(names)}); "
+                                f"{names[-1]} wins"))
+
+    positions = store.positions
+    if len(positions):
+        dims = np.asarray(circuit.dimensions, dtype=np.int64)
+        outside = np.flatnonzero(np.any((positions < 0) | (positions >= dims), axis=1))
+        for row in outside.tolist():
+            issues.append(LintIssue('out_of_bounds', tuple(positions[row].tolist()), [row],
+                                    f"{store.state(row)[0]} lies outside dimensions "
+                                    f"{tuple(circuit.dimensions)}"))
+
+    needs_support = np.array([block_id in NEEDS_SUPPORT for block_id, _ in store.palette], dtype=bool)
+    if len(positions) and needs_support.any():
+        for row in np.flatnonzero(needs_support[store.state_ids]).tolist():
+            # Only the block that ends up at a position matters
+            x, y, z = positions[row].tolist()
+            if index.get(x, y, z) != row:
+                continue
+            block_id, props = store.state(row)
+            dx, dy, dz = support_offset(block_id, props)
+            sx, sy, sz = x + dx, y + dy, z + dz
+            if sy < ground_y:
+                continue
+            support = index.block_id(index.get(sx, sy, sz))
+            if support is None or support in NON_SOLID_BLOCKS:
+                what = "nothing" if support is None else support
+                issues.append(LintIssue('unsupported', (x, y, z), [row],
+                                        f"{block_id} rests on {what} at {(sx, sy, sz)}"))
+
+    issues.sort(key=lambda issue: (issue.kind, issue.position))
+    return issues
+
+
+def format_lint_report(circuit: Circuit, issues: List[LintIssue]) -> str:
+    """Human-readable summary of lint_circuit() results"""
+    if not issues:
+        return f"{circuit.name}: OK"
+    lines = [f"{circuit.name}: {len(issues)} issue(s)"]
+    lines.extend(f"    {issue}" for issue in issues)
+    return "\n".join(lines)
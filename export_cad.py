@@ -9,11 +9,18 @@ Exports Minecraft circuits to CAD-compatible formats:
 - SVG (2D vector)
 """
 
+import hashlib
 import json
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Iterator
 import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from profiler import StageProfiler
 
 # Block dimensions in Minecraft (meters)
 BLOCK_SIZE = 1.0
@@ -36,137 +43,511 @@ BLOCK_COLORS = {
 }
 
 
+def block_columns(blocks: List[Dict]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Split block dicts into (positions, material_ids, materials): an (n, 3)
+    int64 array, per-block indices into materials, and the distinct block
+    ids in order of first appearance.
+    """
+    materials: List[str] = []
+    material_index: Dict[str, int] = {}
+    ids = []
+    for block in blocks:
+        name = block['block']
+        if name not in material_index:
+            material_index[name] = len(materials)
+            materials.append(name)
+        ids.append(material_index[name])
+    positions = np.array([b['pos'] for b in blocks], dtype=np.int64).reshape(-1, 3)
+    return positions, np.asarray(ids, dtype=np.int32), materials
+
+
+def palette_columns(circuit_data: Dict) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Same as block_columns() for compact/binary circuits, which carry a
+    palette, flat positions and per-block palette indices.
+    """
+    palette_names = [entry['block'] for entry in circuit_data['palette']]
+    materials = list(dict.fromkeys(palette_names))
+    remap = np.array([materials.index(name) for name in palette_names], dtype=np.int32)
+    states = np.asarray(circuit_data['states'], dtype=np.int64)
+    positions = np.asarray(circuit_data['positions'], dtype=np.int64).reshape(-1, 3)
+    return positions, remap[states] if len(states) else states.astype(np.int32), materials
+
+
 class CADExporter:
-    """Base class for CAD export"""
+    """
+    Base class for CAD export
+
+    Accepts a circuit as block dicts (quantum_circuits.json) or in the
+    columnar form of compact JSON / .npz (see load_circuits) and holds it as
+    positions, material_ids and materials columns.
+    """
 
     def __init__(self, circuit_data: Dict):
         self.circuit = circuit_data
         self.name = circuit_data['name']
-        self.blocks = circuit_data['blocks']
         self.dimensions = circuit_data['dimensions']
+        if 'blocks' in circuit_data:
+            columns = block_columns(circuit_data['blocks'])
+        else:
+            columns = palette_columns(circuit_data)
+        self.positions, self.material_ids, self.materials = columns
+        # Filled by export(): entity counts reported by --profile
+        self.counts: Dict[str, int] = {}
+
+    @property
+    def blocks(self) -> List[Dict]:
+        """Circuit blocks as {'pos', 'block'} dicts"""
+        if 'blocks' in self.circuit:
+            return self.circuit['blocks']
+        return [{'pos': pos, 'block': self.materials[m]}
+                for pos, m in zip(self.positions.tolist(), self.material_ids.tolist())]
 
     def export(self, output_path: str):
         raise NotImplementedError
 
 
+# Unit box faces as 3DFACE corner lists (x, y, z), one per cube side
+UNIT_BOX_FACES = [
+    [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)],  # Front
+    [(1, 0, 1), (0, 0, 1), (0, 1, 1), (1, 1, 1)],  # Back
+    [(0, 0, 1), (0, 0, 0), (0, 1, 0), (0, 1, 1)],  # Left
+    [(1, 0, 0), (1, 0, 1), (1, 1, 1), (1, 1, 0)],  # Right
+    [(0, 1, 0), (1, 1, 0), (1, 1, 1), (0, 1, 1)],  # Top
+    [(0, 0, 1), (1, 0, 1), (1, 0, 0), (0, 0, 0)],  # Bottom
+]
+
+# AutoCAD Color Index entries used to approximate BLOCK_COLORS
+_ACI_COLORS = {
+    1: (255, 0, 0), 2: (255, 255, 0), 3: (0, 255, 0), 4: (0, 255, 255),
+    5: (0, 0, 255), 6: (255, 0, 255), 7: (255, 255, 255),
+    8: (128, 128, 128), 9: (192, 192, 192), 30: (255, 127, 0), 34: (153, 76, 0),
+}
+
+
+def _nearest_aci(color: Tuple[int, int, int]) -> int:
+    return min(_ACI_COLORS, key=lambda aci: sum((a - b) ** 2 for a, b in zip(_ACI_COLORS[aci], color)))
+
+
+def material_name(block_id: str) -> str:
+    """CAD-safe material name for a block id (minecraft:stone -> stone)"""
+    return block_id.replace('minecraft:', '').replace(':', '_')
+
+
+def merge_runs(positions: np.ndarray, material_ids: np.ndarray,
+               materials: List[str]) -> List[Tuple[str, Tuple[int, int, int], int]]:
+    """
+    Merge blocks into x-aligned runs of the same block id.
+
+    Returns (block_id, start position, length) per run. Later blocks win at
+    repeated positions.
+    """
+    if not len(positions):
+        return []
+    columns = np.column_stack([positions, material_ids]).astype(np.int64)
+
+    # Keep the last block at each position
+    _, last = np.unique(columns[::-1, :3], axis=0, return_index=True)
+    columns = columns[len(columns) - 1 - last]
+
+    # Group runs by block id name, then y, z, x
+    name_rank = np.argsort(np.argsort(materials))
+    order = np.lexsort((columns[:, 0], columns[:, 2], columns[:, 1], name_rank[columns[:, 3]]))
+    columns = columns[order]
+    breaks = np.ones(len(columns), dtype=bool)
+    breaks[1:] = ((np.diff(columns[:, 0]) != 1)
+                  | np.any(np.diff(columns[:, 1:], axis=0) != 0, axis=1))
+    starts = np.flatnonzero(breaks)
+    lengths = np.diff(np.append(starts, len(columns)))
+    return [(materials[m], (x, y, z), length)
+            for (x, y, z, m), length in zip(columns[starts].tolist(), lengths.tolist())]
+
+
 class DXFExporter(CADExporter):
-    """Export to DXF format (AutoCAD, LibreCAD)"""
+    """
+    Export to DXF format (AutoCAD, LibreCAD)
+
+    Each material is defined once as a BLOCK holding a closed unit box of
+    six 3DFACEs, on its own layer in the TABLES section; every voxel (or
+    merged x-run, with merge_runs=True) is placed with a scaled INSERT.
+    """
+
+    def __init__(self, circuit_data: Dict, merge_runs: bool = True):
+        super().__init__(circuit_data)
+        self.merge_runs = merge_runs
 
     def export(self, output_path: str):
         """Generate DXF file"""
+        if self.merge_runs:
+            runs = merge_runs(self.positions, self.material_ids, self.materials)
+        else:
+            runs = [(self.materials[m], tuple(pos), 1)
+                    for pos, m in zip(self.positions.tolist(), self.material_ids.tolist())]
+        block_ids = sorted({block_id for block_id, _, _ in runs})
+
         output = []
 
         # DXF Header
-        output.append("0\nSECTION\n2\nHEADER\n0\nENDSEC")
+        output.append("0\nSECTION\n2\nHEADER")
+        output.append("9\n$ACADVER\n1\nAC1009")
+        output.append("9\n$INSBASE\n10\n0.0\n20\n0.0\n30\n0.0")
+        output.append("0\nENDSEC")
+
+        # Layer table, one layer per material
+        output.append("0\nSECTION\n2\nTABLES")
+        output.append(f"0\nTABLE\n2\nLAYER\n70\n{len(block_ids) + 1}")
+        output.append("0\nLAYER\n2\n0\n70\n0\n62\n7\n6\nCONTINUOUS")
+        for block_id in block_ids:
+            aci = _nearest_aci(BLOCK_COLORS.get(block_id, (128, 128, 128)))
+            output.append(f"0\nLAYER\n2\n{material_name(block_id)}\n70\n0\n62\n{aci}\n6\nCONTINUOUS")
+        output.append("0\nENDTAB\n0\nENDSEC")
+
+        # One unit box definition per material
+        output.append("0\nSECTION\n2\nBLOCKS")
+        for block_id in block_ids:
+            name = material_name(block_id)
+            output.append(f"0\nBLOCK\n8\n0\n2\n{name}\n70\n0\n10\n0.0\n20\n0.0\n30\n0.0\n3\n{name}")
+            for face in UNIT_BOX_FACES:
+                output.append("0\n3DFACE\n8\n0")
+                for i, (fx, fy, fz) in enumerate(face):
+                    output.append(f"1{i}\n{fx * BLOCK_SIZE}\n2{i}\n{fy * BLOCK_SIZE}\n3{i}\n{fz * BLOCK_SIZE}")
+            output.append("0\nENDBLK\n8\n0")
+        output.append("0\nENDSEC")
+
+        # Place every voxel or run
         output.append("0\nSECTION\n2\nENTITIES")
-
-        # Export each block as a 3D solid
-        for block in self.blocks:
-            x, y, z = block['pos']
-            material = block['block']
-
-            # Create a 3D box for each block
-            output.append(f"0\n3DFACE")
-            output.append(f"8\n{material}")  # Layer name
-
-            # Bottom face
-            output.append(f"10\n{x}\n20\n{y}\n30\n{z}")
-            output.append(f"11\n{x+BLOCK_SIZE}\n21\n{y}\n31\n{z}")
-            output.append(f"12\n{x+BLOCK_SIZE}\n22\n{y}\n32\n{z+BLOCK_SIZE}")
-            output.append(f"13\n{x}\n23\n{y}\n33\n{z+BLOCK_SIZE}")
-
+        for block_id, (x, y, z), length in runs:
+            name = material_name(block_id)
+            output.append(f"0\nINSERT\n8\n{name}\n2\n{name}\n"
+                          f"10\n{x * BLOCK_SIZE}\n20\n{y * BLOCK_SIZE}\n30\n{z * BLOCK_SIZE}")
+            if length != 1:
+                output.append(f"41\n{float(length)}\n42\n1.0\n43\n1.0")
         output.append("0\nENDSEC\n0\nEOF")
 
         Path(output_path).write_text("\n".join(output))
+        self.counts = {'blocks': len(self.positions), 'inserts': len(runs)}
         print(f"Exported DXF: {output_path}")
 
 
+# ============================================================================
+# MESHING
+# ============================================================================
+
+# Unit cube as 12 triangles: (normal, v1, v2, v3) per row, counter-clockwise
+UNIT_CUBE_TRIANGLES = np.array([
+    # Front
+    [(0, 0, -1), (0, 0, 0), (1, 1, 0), (1, 0, 0)],
+    [(0, 0, -1), (0, 0, 0), (0, 1, 0), (1, 1, 0)],
+    # Back
+    [(0, 0, 1), (1, 0, 1), (0, 1, 1), (0, 0, 1)],
+    [(0, 0, 1), (1, 0, 1), (1, 1, 1), (0, 1, 1)],
+    # Left
+    [(-1, 0, 0), (0, 0, 1), (0, 1, 0), (0, 0, 0)],
+    [(-1, 0, 0), (0, 0, 1), (0, 1, 1), (0, 1, 0)],
+    # Right
+    [(1, 0, 0), (1, 0, 0), (1, 1, 1), (1, 0, 1)],
+    [(1, 0, 0), (1, 0, 0), (1, 1, 0), (1, 1, 1)],
+    # Top
+    [(0, 1, 0), (0, 1, 0), (1, 1, 1), (1, 1, 0)],
+    [(0, 1, 0), (0, 1, 0), (0, 1, 1), (1, 1, 1)],
+    # Bottom
+    [(0, -1, 0), (0, 0, 1), (1, 0, 0), (1, 0, 1)],
+    [(0, -1, 0), (0, 0, 1), (0, 0, 0), (1, 0, 0)],
+], dtype=np.float32)
+
+# Binary STL facet record: normal, three vertices, attribute byte count
+STL_FACET_DTYPE = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('attr', '<u2'),
+])
+
+
+def cube_facets(positions: np.ndarray) -> np.ndarray:
+    """
+    Build binary STL facet records for one cube per position.
+
+    The unit-cube template is broadcast against all block positions at once,
+    giving 12 facets per block.
+    """
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 1, 1, 3)
+    facets = np.zeros(len(positions) * 12, dtype=STL_FACET_DTYPE)
+    facets['normal'] = np.broadcast_to(UNIT_CUBE_TRIANGLES[:, 0],
+                                       (len(positions), 12, 3)).reshape(-1, 3)
+    vertices = positions + UNIT_CUBE_TRIANGLES[None, :, 1:] * BLOCK_SIZE
+    facets['vertices'] = vertices.reshape(-1, 3, 3)
+    return facets
+
+# (u, v) in-plane axes for faces along x, y, z; u x v points along +axis
+_FACE_AXES = {0: (1, 2), 1: (2, 0), 2: (0, 1)}
+
+
+def is_opaque(block_id: str) -> bool:
+    """
+    Whether a block hides the faces of its neighbours.
+
+    Every block is exported as a full cube, so only see-through blocks
+    (glass) keep the faces behind them.
+    """
+    return 'glass' not in block_id
+
+
+@dataclass
+class Mesh:
+    """Quads produced by mesh_blocks(), one material index per quad"""
+    quads: np.ndarray       # (m, 4, 3) float32 corners, counter-clockwise from outside
+    normals: np.ndarray     # (m, 3) float32
+    materials: np.ndarray   # (m,) int32 index into material_names
+    material_names: List[str]
+
+    def __len__(self) -> int:
+        return len(self.quads)
+
+    def facets(self) -> np.ndarray:
+        """Split every quad into two triangles as binary STL facet records"""
+        facets = np.zeros(len(self.quads) * 2, dtype=STL_FACET_DTYPE)
+        facets['normal'] = np.repeat(self.normals, 2, axis=0)
+        triangles = np.stack([self.quads[:, [0, 1, 2]], self.quads[:, [0, 2, 3]]], axis=1)
+        facets['vertices'] = triangles.reshape(-1, 3, 3)
+        return facets
+
+
+def _greedy_rectangles(cells: Dict[Tuple[int, int], int]) -> List[Tuple[int, int, int, int, int]]:
+    """
+    Cover cells {(u, v): value}, inserted in (u, v) order, with same-valued
+    rectangles; each grows along v, then u. Consumes the dict.
+    """
+    rects = []
+    for u0, v0 in list(cells):
+        value = cells.get((u0, v0))
+        if value is None:
+            continue
+        v1 = v0 + 1
+        while cells.get((u0, v1)) == value:
+            v1 += 1
+        u1 = u0 + 1
+        while all(cells.get((u1, v)) == value for v in range(v0, v1)):
+            u1 += 1
+        for u in range(u0, u1):
+            for v in range(v0, v1):
+                del cells[u, v]
+        rects.append((u0, v0, u1, v1, value))
+    return rects
+
+
+def _face_rects(layer_u: np.ndarray, layer_v: np.ndarray, values: np.ndarray,
+                merge: bool) -> List[Tuple[int, int, int, int, int]]:
+    """
+    Rectangles covering one face plane, given its faces as (u, v, value)
+    columns sorted by (u, v). Only occupied cells are held, never the plane.
+    """
+    faces = zip(layer_u.tolist(), layer_v.tolist(), values.tolist())
+    if not merge:
+        return [(u, v, u + 1, v + 1, value) for u, v, value in faces]
+    return _greedy_rectangles({(u, v): value for u, v, value in faces})
+
+
+# Quads per piece yielded by mesh_slabs() to streaming writers
+MESH_SLAB_FACES = 16384
+
+
+def _empty_mesh(material_names: List[str]) -> Mesh:
+    return Mesh(np.zeros((0, 4, 3), dtype=np.float32), np.zeros((0, 3), dtype=np.float32),
+                np.zeros(0, dtype=np.int32), material_names)
+
+
+def _rect_quads(rects: List[Tuple[int, ...]], axis: int, sign: int,
+                origin: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Corners, normals and material indices for (layer, u0, v0, u1, v1, value) rows"""
+    u_axis, v_axis = _FACE_AXES[axis]
+    rects = np.array(rects, dtype=np.int64).reshape(-1, 6)
+
+    # Corners counter-clockwise seen from outside
+    u0, v0, u1, v1 = rects[:, 1:5].T
+    corners_u = np.column_stack([u0, u1, u1, u0])
+    corners_v = np.column_stack([v0, v0, v1, v1])
+    if sign < 0:
+        corners_u, corners_v = corners_u[:, ::-1], corners_v[:, ::-1]
+    quads = np.empty((len(rects), 4, 3), dtype=np.int64)
+    quads[:, :, axis] = rects[:, :1] + (1 if sign > 0 else 0)
+    quads[:, :, u_axis] = corners_u
+    quads[:, :, v_axis] = corners_v
+
+    normals = np.zeros((len(rects), 3), dtype=np.float32)
+    normals[:, axis] = sign
+    corners = ((quads + origin) * BLOCK_SIZE).astype(np.float32)
+    return corners, normals, (rects[:, 5] - 1).astype(np.int32)
+
+
+def _join_quads(pieces: List[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+                material_names: List[str]) -> Mesh:
+    corners, normals, materials = zip(*pieces)
+    return Mesh(np.concatenate(corners), np.concatenate(normals),
+                np.concatenate(materials), material_names)
+
+
+def mesh_slabs(positions: np.ndarray, material_ids: np.ndarray, materials: List[str],
+               by_material: bool = True, cull: bool = True, merge: bool = True,
+               per_material: bool = False, see_through: bool = True,
+               slab_faces: Optional[int] = MESH_SLAB_FACES) -> Iterator[Mesh]:
+    """
+    Mesh blocks as mesh_blocks() does, yielding the quads in pieces of whole
+    face planes holding about slab_faces quads each (None: a single piece),
+    so a writer only holds one piece at a time. With per_material, every
+    piece holds one material and pieces come in material order.
+    """
+    material_names = list(materials)
+    if not len(positions):
+        return
+
+    positions = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+    origin = positions.min(axis=0)
+    local = positions - origin
+
+    # Keys of the voxels padded by one on every side, so neighbours of
+    # occupied voxels never wrap into another row
+    padded = local.max(axis=0) + 3
+    strides = np.array([padded[1] * padded[2], padded[2], 1], dtype=np.int64)
+    keys = (local + 1) @ strides
+    keys, last = np.unique(keys[::-1], return_index=True)
+    last = len(positions) - 1 - last
+    local = local[last]
+    voxel_materials = np.asarray(material_ids, dtype=np.int64)[last]
+
+    opaque = np.array([is_opaque(name) for name in material_names] + [False])
+
+    # Visible faces per direction, as masks over the voxels
+    directions = []
+    for axis in range(3):
+        for sign in (-1, 1):
+            visible = np.ones(len(keys), dtype=bool)
+            if cull:
+                neighbour_keys = keys + sign * strides[axis]
+                index = np.minimum(np.searchsorted(keys, neighbour_keys), len(keys) - 1)
+                found = keys[index] == neighbour_keys
+                if see_through:
+                    # -1 marks an empty neighbour (opaque[-1] is False)
+                    neighbour = np.where(found, voxel_materials[index], -1)
+                    visible = ~(opaque[neighbour] | (neighbour == voxel_materials))
+                else:
+                    visible = ~found
+            directions.append((axis, sign, visible))
+
+    groups = range(len(material_names)) if per_material and by_material else [None]
+    for group in groups:
+        pending, count = [], 0
+        for axis, sign, visible in directions:
+            if group is not None:
+                visible = visible & (voxel_materials == group)
+            if not visible.any():
+                continue
+            u_axis, v_axis = _FACE_AXES[axis]
+            faces = local[visible]
+            # Without by_material, merged faces may span materials; all
+            # values are 1 and the first material is reported
+            values = voxel_materials[visible] + 1 if by_material else np.ones(len(faces), np.int64)
+
+            # One group of faces per plane, in (layer, u, v) order
+            order = np.lexsort((faces[:, v_axis], faces[:, u_axis], faces[:, axis]))
+            faces, values = faces[order], values[order]
+            layers = faces[:, axis]
+            bounds = np.flatnonzero(np.diff(layers)) + 1
+
+            # Rectangles of the planes as (layer, u0, v0, u1, v1, value) rows
+            rects = []
+            for start, end in zip([0, *bounds.tolist()], [*bounds.tolist(), len(faces)]):
+                layer = int(layers[start])
+                rects.extend((layer, *rect) for rect in
+                             _face_rects(faces[start:end, u_axis], faces[start:end, v_axis],
+                                         values[start:end], merge))
+                if slab_faces and count + len(rects) >= slab_faces:
+                    pending.append(_rect_quads(rects, axis, sign, origin))
+                    yield _join_quads(pending, material_names)
+                    pending, count, rects = [], 0, []
+            if rects:
+                pending.append(_rect_quads(rects, axis, sign, origin))
+                count += len(rects)
+        if pending:
+            yield _join_quads(pending, material_names)
+
+
+def mesh_blocks(positions: np.ndarray, material_ids: np.ndarray, materials: List[str],
+                by_material: bool = True, cull: bool = True, merge: bool = True,
+                see_through: bool = True) -> Mesh:
+    """
+    Build a surface mesh for blocks given as columns (see block_columns).
+
+    Occupancy is kept as sorted packed voxel keys (later blocks win at
+    repeated positions), so memory follows the block count rather than the
+    bounding box. With cull, a face is dropped when the neighbouring voxel
+    is opaque or holds the same block; without see_through, when it holds
+    any block, which leaves only the closed outer surface. With merge, the
+    remaining coplanar faces are greedily merged into rectangles, per
+    material when by_material is set.
+    """
+    for mesh in mesh_slabs(positions, material_ids, materials, by_material, cull, merge,
+                           see_through=see_through, slab_faces=None):
+        return mesh
+    return _empty_mesh(list(materials))
+
+
 class STLExporter(CADExporter):
-    """Export to STL format (3D printing, FreeCAD)"""
+    """
+    Export to STL format (3D printing, FreeCAD)
+
+    With optimize (the default) the surface comes from mesh_blocks() with
+    culling and merging. STL has no transparency, so faces against glass
+    are culled too and the result is a closed surface. Without optimize
+    every block is written as a full cube straight from the
+    UNIT_CUBE_TRIANGLES template.
+    """
+
+    def __init__(self, circuit_data: Dict, binary: bool = True, optimize: bool = True):
+        super().__init__(circuit_data)
+        self.binary = binary
+        self.optimize = optimize
 
     def export(self, output_path: str):
-        """Generate ASCII STL file"""
-        output = []
+        """Generate STL file (binary by default, ASCII with binary=False)"""
+        if self.optimize:
+            mesh = mesh_blocks(self.positions, self.material_ids, self.materials,
+                               by_material=False, see_through=False)
+            facets = mesh.facets()
+        else:
+            facets = cube_facets(self.positions)
+        if self.binary:
+            self._export_binary(output_path, facets)
+        else:
+            self._export_ascii(output_path, facets)
+        self.counts = {'blocks': len(self.positions), 'triangles': len(facets)}
+        print(f"Exported STL: {output_path}")
 
-        output.append(f"solid {self.name}")
-
-        for block in self.blocks:
-            x, y, z = block['pos']
-
-            # Generate 12 triangles for a cube (2 per face)
-            # Front face
-            output.extend(self._create_triangle(
-                (x, y, z), (x+BLOCK_SIZE, y, z), (x+BLOCK_SIZE, y+BLOCK_SIZE, z),
-                (0, 0, -1)
-            ))
-            output.extend(self._create_triangle(
-                (x, y, z), (x+BLOCK_SIZE, y+BLOCK_SIZE, z), (x, y+BLOCK_SIZE, z),
-                (0, 0, -1)
-            ))
-
-            # Back face
-            output.extend(self._create_triangle(
-                (x+BLOCK_SIZE, y, z+BLOCK_SIZE), (x, y, z+BLOCK_SIZE), (x, y+BLOCK_SIZE, z+BLOCK_SIZE),
-                (0, 0, 1)
-            ))
-            output.extend(self._create_triangle(
-                (x+BLOCK_SIZE, y, z+BLOCK_SIZE), (x, y+BLOCK_SIZE, z+BLOCK_SIZE), (x+BLOCK_SIZE, y+BLOCK_SIZE, z+BLOCK_SIZE),
-                (0, 0, 1)
-            ))
-
-            # Left face
-            output.extend(self._create_triangle(
-                (x, y, z+BLOCK_SIZE), (x, y, z), (x, y+BLOCK_SIZE, z),
-                (-1, 0, 0)
-            ))
-            output.extend(self._create_triangle(
-                (x, y, z+BLOCK_SIZE), (x, y+BLOCK_SIZE, z), (x, y+BLOCK_SIZE, z+BLOCK_SIZE),
-                (-1, 0, 0)
-            ))
-
-            # Right face
-            output.extend(self._create_triangle(
-                (x+BLOCK_SIZE, y, z), (x+BLOCK_SIZE, y, z+BLOCK_SIZE), (x+BLOCK_SIZE, y+BLOCK_SIZE, z+BLOCK_SIZE),
-                (1, 0, 0)
-            ))
-            output.extend(self._create_triangle(
-                (x+BLOCK_SIZE, y, z), (x+BLOCK_SIZE, y+BLOCK_SIZE, z+BLOCK_SIZE), (x+BLOCK_SIZE, y+BLOCK_SIZE, z),
-                (1, 0, 0)
-            ))
-
-            # Top face
-            output.extend(self._create_triangle(
-                (x, y+BLOCK_SIZE, z), (x+BLOCK_SIZE, y+BLOCK_SIZE, z), (x+BLOCK_SIZE, y+BLOCK_SIZE, z+BLOCK_SIZE),
-                (0, 1, 0)
-            ))
-            output.extend(self._create_triangle(
-                (x, y+BLOCK_SIZE, z), (x+BLOCK_SIZE, y+BLOCK_SIZE, z+BLOCK_SIZE), (x, y+BLOCK_SIZE, z+BLOCK_SIZE),
-                (0, 1, 0)
-            ))
-
-            # Bottom face
-            output.extend(self._create_triangle(
-                (x, y, z+BLOCK_SIZE), (x+BLOCK_SIZE, y, z+BLOCK_SIZE), (x+BLOCK_SIZE, y, z),
-                (0, -1, 0)
-            ))
-            output.extend(self._create_triangle(
-                (x, y, z+BLOCK_SIZE), (x+BLOCK_SIZE, y, z), (x, y, z),
-                (0, -1, 0)
-            ))
+    def _export_binary(self, output_path: str, facets: np.ndarray):
+        """Write all facets with a single buffer write"""
+        header = f"{self.name} - Quantum Redstone Circuit".encode('ascii', 'replace')[:80]
+        with open(output_path, 'wb') as f:
+            f.write(header.ljust(80, b' '))
+            f.write(np.uint32(len(facets)).tobytes())
+            f.write(facets.tobytes())
 
+    def _export_ascii(self, output_path: str, facets: np.ndarray):
+        """Generate ASCII STL file"""
+        output = [f"solid {self.name}"]
+        for normal, (v1, v2, v3) in zip(facets['normal'].tolist(), facets['vertices'].tolist()):
+            output.extend(self._create_triangle(v1, v2, v3, normal))
         output.append(f"endsolid {self.name}")
 
         Path(output_path).write_text("\n".join(output))
-        print(f"Exported STL: {output_path}")
 
     def _create_triangle(self, v1: Tuple, v2: Tuple, v3: Tuple, normal: Tuple) -> List[str]:
         """Create STL triangle"""
         return [
-            f"facet normal {normal[0]} {normal[1]} {normal[2]}",
+            f"facet normal {normal[0]:g} {normal[1]:g} {normal[2]:g}",
             "  outer loop",
-            f"    vertex {v1[0]} {v1[1]} {v1[2]}",
-            f"    vertex {v2[0]} {v2[1]} {v2[2]}",
-            f"    vertex {v3[0]} {v3[1]} {v3[2]}",
+            f"    vertex {v1[0]:g} {v1[1]:g} {v1[2]:g}",
+            f"    vertex {v2[0]:g} {v2[1]:g} {v2[2]:g}",
+            f"    vertex {v3[0]:g} {v3[1]:g} {v3[2]:g}",
             "  endloop",
             "endfacet"
         ]
@@ -175,65 +556,48 @@ class STLExporter(CADExporter):
 class OBJExporter(CADExporter):
     """Export to OBJ format (Blender, Maya)"""
 
+    def __init__(self, circuit_data: Dict, optimize: bool = True):
+        super().__init__(circuit_data)
+        self.optimize = optimize
+
     def export(self, output_path: str):
-        """Generate OBJ file with MTL material"""
-        vertices = []
-        faces = []
+        """
+        Generate OBJ file with MTL material
+
+        The mesh is streamed from mesh_slabs() one material at a time, in
+        pieces of about MESH_SLAB_FACES quads; corners are deduplicated
+        within each piece, so neighbouring faces share vertices while peak
+        memory stays bounded by the piece size. Each usemtl appears once.
+        """
+        names = [material_name(block_id) for block_id in self.materials]
         materials = {}
-        vertex_index = 1
-
-        for block in self.blocks:
-            x, y, z = block['pos']
-            material = block['block'].replace('minecraft:', '').replace(':', '_')
-
+        for block_id, material in zip(self.materials, names):
             if material not in materials:
-                materials[material] = BLOCK_COLORS.get(block['block'], (128, 128, 128))
-
-            # 8 vertices for a cube
-            cube_verts = [
-                (x, y, z),
-                (x+BLOCK_SIZE, y, z),
-                (x+BLOCK_SIZE, y+BLOCK_SIZE, z),
-                (x, y+BLOCK_SIZE, z),
-                (x, y, z+BLOCK_SIZE),
-                (x+BLOCK_SIZE, y, z+BLOCK_SIZE),
-                (x+BLOCK_SIZE, y+BLOCK_SIZE, z+BLOCK_SIZE),
-                (x, y+BLOCK_SIZE, z+BLOCK_SIZE),
-            ]
-
-            vertices.extend(cube_verts)
-
-            # 6 faces (quads) for a cube
-            base = vertex_index
-            cube_faces = [
-                (base, base+1, base+2, base+3),  # Front
-                (base+5, base+4, base+7, base+6),  # Back
-                (base+4, base, base+3, base+7),  # Left
-                (base+1, base+5, base+6, base+2),  # Right
-                (base+3, base+2, base+6, base+7),  # Top
-                (base+4, base+5, base+1, base),  # Bottom
-            ]
-
-            for face in cube_faces:
-                faces.append((material, face))
-
-            vertex_index += 8
-
-        # Write OBJ file
-        output = [f"# {self.name} - Quantum Redstone Circuit"]
-        output.append(f"mtllib {Path(output_path).stem}.mtl")
-
-        for v in vertices:
-            output.append(f"v {v[0]} {v[1]} {v[2]}")
-
-        current_material = None
-        for material, face in faces:
-            if material != current_material:
-                output.append(f"usemtl {material}")
-                current_material = material
-            output.append(f"f {face[0]} {face[1]} {face[2]} {face[3]}")
-
-        Path(output_path).write_text("\n".join(output))
+                materials[material] = BLOCK_COLORS.get(block_id, (128, 128, 128))
+
+        vertex_count = 0
+        face_count = 0
+        current = None
+        with open(output_path, 'w') as f:
+            f.write(f"# {self.name} - Quantum Redstone Circuit\n")
+            f.write(f"mtllib {Path(output_path).stem}.mtl\n")
+
+            for mesh in mesh_slabs(self.positions, self.material_ids, self.materials,
+                                   cull=self.optimize, merge=self.optimize, per_material=True):
+                vertices, corner_index = np.unique(mesh.quads.reshape(-1, 3), axis=0,
+                                                   return_inverse=True)
+                # OBJ indices are 1-based and count every vertex written so far
+                faces = corner_index.reshape(-1, 4) + 1 + vertex_count
+                f.write("".join(f"v {x:g} {y:g} {z:g}\n" for x, y, z in vertices.tolist()))
+                if mesh.materials[0] != current:
+                    current = mesh.materials[0]
+                    f.write(f"usemtl {names[current]}\n")
+                f.write("".join(f"f {a} {b} {c} {d}\n" for a, b, c, d in faces.tolist()))
+                vertex_count += len(vertices)
+                face_count += len(faces)
+
+        self.counts = {'blocks': len(self.positions), 'vertices': vertex_count,
+                       'faces': face_count, 'triangles': 2 * face_count}
         print(f"Exported OBJ: {output_path}")
 
         # Write MTL file
@@ -270,78 +634,249 @@ class SVGExporter(CADExporter):
             f'  <rect width="{width}" height="{height}" fill="#f0f0f0"/>',
         ]
 
-        # Group blocks by Y level
-        y_levels = {}
-        for block in self.blocks:
-            x, y, z = block['pos']
-            if y not in y_levels:
-                y_levels[y] = []
-            y_levels[y].append(block)
+        # Draw blocks level by level, highest Y first, keeping block order within a level
+        order = np.argsort(-self.positions[:, 1], kind='stable')
+        for (x, y, z), material_id in zip(self.positions[order].tolist(),
+                                          self.material_ids[order].tolist()):
+            material = self.materials[material_id]
+            color = BLOCK_COLORS.get(material, (128, 128, 128))
 
-        # Draw blocks (using highest Y level for each XZ position)
-        for y_level in sorted(y_levels.keys(), reverse=True):
-            for block in y_levels[y_level]:
-                x, y, z = block['pos']
-                material = block['block']
-                color = BLOCK_COLORS.get(material, (128, 128, 128))
+            svg_x = 50 + x * 50
+            svg_y = 50 + z * 50
 
-                svg_x = 50 + x * 50
-                svg_y = 50 + z * 50
+            fill = f"rgb({color[0]},{color[1]},{color[2]})"
 
-                fill = f"rgb({color[0]},{color[1]},{color[2]})"
+            output.append(
+                f'  <rect x="{svg_x}" y="{svg_y}" width="50" height="50" '
+                f'fill="{fill}" stroke="black" stroke-width="1"/>'
+            )
 
+            # Add label for special blocks
+            if 'torch' in material or 'lever' in material or 'comparator' in material:
+                label = material.split(':')[1][:4]
                 output.append(
-                    f'  <rect x="{svg_x}" y="{svg_y}" width="50" height="50" '
-                    f'fill="{fill}" stroke="black" stroke-width="1"/>'
+                    f'  <text x="{svg_x+25}" y="{svg_y+30}" '
+                    f'text-anchor="middle" font-size="10">{label}</text>'
                 )
 
-                # Add label for special blocks
-                if 'torch' in material or 'lever' in material or 'comparator' in material:
-                    label = material.split(':')[1][:4]
-                    output.append(
-                        f'  <text x="{svg_x+25}" y="{svg_y+30}" '
-                        f'text-anchor="middle" font-size="10">{label}</text>'
-                    )
-
         output.append('</svg>')
 
         Path(output_path).write_text("\n".join(output))
+        self.counts = {'blocks': len(self.positions)}
         print(f"Exported SVG: {output_path}")
 
 
-def export_all_circuits(circuits_file: str, output_dir: str):
-    """Export all circuits to all formats"""
+# Exporters run by export_all_circuits(), keyed by file extension
+EXPORTERS = {
+    'dxf': DXFExporter,
+    'stl': STLExporter,
+    'obj': OBJExporter,
+    'svg': SVGExporter,
+}
 
-    with open(circuits_file, 'r') as f:
-        data = json.load(f)
+MANIFEST_NAME = "manifest.json"
 
-    circuits = data['circuits']
-    output_path = Path(output_dir)
-    output_path.mkdir(exist_ok=True)
+# Extra files written next to an output, by format
+SIDECAR_SUFFIXES = {
+    'obj': ['.mtl'],
+}
 
-    for circuit in circuits:
-        name = circuit['name']
-        print(f"\nExporting {name}...")
 
-        # DXF
-        dxf_path = output_path / f"{name}.dxf"
-        DXFExporter(circuit).export(str(dxf_path))
+def output_files(filename: str, fmt: str) -> List[str]:
+    """Every file an export writes: the output itself, then its sidecars"""
+    return [filename] + [str(Path(filename).with_suffix(suffix))
+                         for suffix in SIDECAR_SUFFIXES.get(fmt, [])]
+
 
-        # STL
-        stl_path = output_path / f"{name}.stl"
-        STLExporter(circuit).export(str(stl_path))
+def exporter_version() -> str:
+    """Hash of this module's source; any exporter change invalidates outputs"""
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
 
-        # OBJ
-        obj_path = output_path / f"{name}.obj"
-        OBJExporter(circuit).export(str(obj_path))
 
-        # SVG
-        svg_path = output_path / f"{name}.svg"
-        SVGExporter(circuit).export(str(svg_path))
+def circuit_hash(circuit: Dict) -> str:
+    """Content hash of a circuit definition"""
+    digest = hashlib.sha256()
+    arrays = {key: value for key, value in circuit.items() if isinstance(value, np.ndarray)}
+    fields = {key: value for key, value in circuit.items() if key not in arrays}
+    digest.update(json.dumps(fields, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    for key in sorted(arrays):
+        digest.update(key.encode('utf-8'))
+        digest.update(np.ascontiguousarray(arrays[key], dtype=np.int64).tobytes())
+    return digest.hexdigest()[:16]
 
 
-def main():
-    import os
+def load_circuits(circuits_file: str) -> List[Dict]:
+    """
+    Load circuit definitions for export.
+
+    Reads quantum_circuits.json in full or compact form, or an .npz archive
+    from export_to_npz, whose columns are used directly without parsing
+    any block JSON.
+    """
+    if Path(circuits_file).suffix == '.npz':
+        with np.load(circuits_file) as archive:
+            metadata = json.loads(str(archive['metadata']))
+            return [dict(meta, positions=archive[f'c{i}_positions'], states=archive[f'c{i}_states'])
+                    for i, meta in enumerate(metadata['circuits'])]
+
+    with open(circuits_file, 'r') as f:
+        return json.load(f)['circuits']
+
+
+def load_manifest(output_dir: Path) -> Dict:
+    manifest_path = output_dir / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {}
+    try:
+        return json.loads(manifest_path.read_text()).get('outputs', {})
+    except (json.JSONDecodeError, AttributeError):
+        return {}
+
+
+def save_manifest(output_dir: Path, outputs: Dict):
+    manifest_path = output_dir / MANIFEST_NAME
+    tmp_path = manifest_path.with_suffix('.tmp')
+    tmp_path.write_text(json.dumps({'version': '0.1.0', 'outputs': outputs},
+                                   indent=2, sort_keys=True))
+    tmp_path.replace(manifest_path)
+
+
+def _export_job(circuit: Dict, fmt: str, path: str, profile: bool = False) -> Tuple[str, Optional[Dict]]:
+    """
+    Run one (circuit, format) export; top-level so it can be pickled.
+    Returns the path and, when profiling, the job's stage record.
+    """
+    profiler = StageProfiler(enabled=profile)
+    try:
+        with profiler.stage(f"{circuit['name']}.{fmt}") as record:
+            exporter = EXPORTERS[fmt](circuit)
+            exporter.export(path)
+            record.count(**exporter.counts)
+            for name in output_files(path, fmt):
+                record.wrote(name)
+    finally:
+        profiler.close()
+    return path, (profiler.records[0].to_dict() if profile else None)
+
+
+def circuit_data(circuit) -> Dict:
+    """
+    Columnar export form of an in-memory Circuit (as load_circuits returns
+    for .npz), so generated circuits can be exported without a JSON round trip
+    """
+    store = circuit.blocks
+    return {
+        'name': circuit.name,
+        'description': circuit.description,
+        'dimensions': dict(zip('xyz', circuit.dimensions)),
+        'palette': [{'block': block_id, 'properties': props} if props else {'block': block_id}
+                    for block_id, props in store.palette],
+        'positions': store.positions.reshape(-1),
+        'states': store.state_ids,
+    }
+
+
+def export_all_circuits(circuits_file: str, output_dir: str,
+                        formats: Optional[List[str]] = None,
+                        jobs: Optional[int] = None, force: bool = False,
+                        profiler: Optional[StageProfiler] = None) -> List[str]:
+    """Export all circuits in a circuits file to all formats (see export_circuits)"""
+    profiler = profiler or StageProfiler(enabled=False)
+    with profiler.stage("load_circuits") as record:
+        circuits = load_circuits(circuits_file)
+        record.count(circuits=len(circuits))
+    return export_circuits(circuits, output_dir, formats, jobs, force, profiler)
+
+
+def export_circuits(circuits: List[Dict], output_dir: str,
+                    formats: Optional[List[str]] = None,
+                    jobs: Optional[int] = None, force: bool = False,
+                    profiler: Optional[StageProfiler] = None) -> List[str]:
+    """
+    Export circuit definitions to the given formats (default: all)
+
+    (circuit, format) jobs are fanned out over a process pool of `jobs`
+    workers (default: every core; 1 runs serially in-process). A manifest in
+    output_dir records the circuit hash, exporter version and files (with
+    sidecars such as .mtl) behind each output, and outputs that are still
+    current are skipped unless force is set. Entries for outputs not
+    exported in this run are kept. With an enabled profiler, each job is
+    measured where it runs and its record added to the profiler. Returns
+    the paths that were written.
+    """
+    profiler = profiler or StageProfiler(enabled=False)
+    profile = profiler.enabled
+
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    formats = formats or list(EXPORTERS)
+    unknown = [fmt for fmt in formats if fmt not in EXPORTERS]
+    if unknown:
+        raise ValueError(f"Unknown export format(s): {', '.join(unknown)}")
+
+    version = exporter_version()
+    manifest = load_manifest(output_path)
+
+    pending = []
+    skipped = 0
+    for circuit in circuits:
+        digest = circuit_hash(circuit)
+        for fmt in formats:
+            filename = f"{circuit['name']}.{fmt}"
+            files = output_files(filename, fmt)
+            entry = {'circuit': digest, 'exporter': version, 'files': files}
+            if (not force and manifest.get(filename) == entry
+                    and all((output_path / name).exists() for name in files)):
+                skipped += 1
+                continue
+            pending.append((circuit, fmt, filename, entry))
+
+    if skipped:
+        print(f"Skipping {skipped} up-to-date output(s)")
+
+    written = []
+    try:
+        if jobs == 1 or len(pending) <= 1:
+            for circuit, fmt, filename, entry in pending:
+                path, record = _export_job(circuit, fmt, str(output_path / filename), profile)
+                manifest[filename] = entry
+                written.append(path)
+                if record:
+                    profiler.add(record)
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                futures = {
+                    pool.submit(_export_job, circuit, fmt, str(output_path / filename), profile):
+                        (filename, entry)
+                    for circuit, fmt, filename, entry in pending
+                }
+                for future in as_completed(futures):
+                    filename, entry = futures[future]
+                    path, record = future.result()
+                    written.append(path)
+                    manifest[filename] = entry
+                    if record:
+                        profiler.add(record)
+    finally:
+        save_manifest(output_path, manifest)
+
+    return written
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export Quantum-Redstone circuits to CAD formats")
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help="worker processes (default: all cores, 1 = serial)")
+    parser.add_argument('--force', action='store_true',
+                        help="re-export outputs the manifest marks as up to date")
+    parser.add_argument('--profile', action='store_true',
+                        help="measure each (circuit, format) export and print a summary")
+    parser.add_argument('--profile-json', metavar='PATH',
+                        help="also write the profile as a JSON report (implies --profile)")
+    args = parser.parse_args(argv)
+    profiler = StageProfiler(enabled=args.profile or bool(args.profile_json))
 
     script_dir = Path(__file__).parent
     circuits_file = script_dir / "quantum_circuits.json"
@@ -357,7 +892,8 @@ def main():
     print("=" * 60)
     print()
 
-    export_all_circuits(str(circuits_file), str(output_dir))
+    export_all_circuits(str(circuits_file), str(output_dir), jobs=args.jobs, force=args.force,
+                        profiler=profiler)
 
     print()
     print("=" * 60)
@@ -374,6 +910,13 @@ def main():
     print()
     print("Import these into your favorite CAD software!")
 
+    if profiler.enabled:
+        print()
+        print(profiler.summary())
+        if args.profile_json:
+            profiler.write_json(args.profile_json, command="export_cad", jobs=args.jobs)
+        profiler.close()
+
     return 0
 
 
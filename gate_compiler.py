@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Gate-Sequence Compiler for Quantum-Redstone Programs
+Lays out a multi-qubit program ("H on q0, CNOT q0->q1, Z on q1") as one
+Circuit built from the gate generators in quantum_circuit_generator.
+
+Input is a gate list, either as tuples/text lines ("h 0", "cnot 0 1") or a
+small OpenQASM 2.0 subset (qreg, x, z, h, cx, barrier). Each qubit gets a
+lane along z and gates are scheduled into columns along x as soon as their
+lanes are free. Gate templates are generated once and copied into place by
+translation only.
+
+The result is a layout, not a wired machine: templates are stamped as the
+generators build them, with no support blocks added and no rails routed
+from one column's outputs to the next column's inputs. lint_circuit()
+therefore reports each template's own findings once per instance (e.g.
+the Hadamard's three collisions and the CNOT's unsupported components);
+the layout itself adds none.
+"""
+
+import copy
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Dict, Tuple, Optional, Iterable, Union
+
+import numpy as np
+
+from quantum_circuit_generator import (
+    Block, BlockStore, Circuit, export_to_json, generate_cnot, generate_hadamard,
+    generate_mcfunction, generate_pauli_x, generate_pauli_z, generate_state_preparation,
+)
+
+# Generator behind each placeable gate
+TEMPLATE_GENERATORS = {
+    'prep': generate_state_preparation,
+    'x': generate_pauli_x,
+    'z': generate_pauli_z,
+    'h': generate_hadamard,
+    'cnot': generate_cnot,
+}
+
+GATE_ALIASES = {'cx': 'cnot', 'not': 'x'}
+TWO_QUBIT_GATES = {'cnot'}
+
+# Empty blocks left between neighbouring columns and lanes
+COLUMN_GAP = 1
+LANE_GAP = 1
+
+# First z row of the cnot template's control section (threshold stone,
+# comparator and control rails at rows 11-14); rows below it are the
+# enable line and the target rails
+CNOT_CONTROL_ROW = 11
+
+_MIRROR_Z = {'north': 'south', 'south': 'north'}
+
+
+@lru_cache(maxsize=None)
+def gate_template(name: str, mirrored: bool = False) -> Circuit:
+    """
+    Generated circuit for a gate, built once and shared (do not mutate).
+    mirrored reflects it along z, swapping north and south.
+    """
+    if not mirrored:
+        return TEMPLATE_GENERATORS[name]()
+    template = gate_template(name)
+    depth = template.dimensions[2]
+    blocks = []
+    for block in template.blocks:
+        properties = None
+        if block.properties:
+            properties = {_MIRROR_Z.get(key, key):
+                          _MIRROR_Z.get(value, value) if key == 'facing' else value
+                          for key, value in block.properties.items()}
+        blocks.append(Block(block.x, block.y, depth - 1 - block.z, block.block_id,
+                            properties=properties, nbt=block.nbt))
+    return Circuit(template.name, template.description, blocks, template.dimensions)
+
+
+@dataclass
+class Program:
+    """A parsed gate sequence on n_qubits qubits"""
+    n_qubits: int
+    gates: List[Tuple[str, Tuple[int, ...]]] = field(default_factory=list)
+
+    def add(self, name: str, *qubits: int):
+        name = GATE_ALIASES.get(name.lower(), name.lower())
+        if name != 'barrier' and name not in TEMPLATE_GENERATORS:
+            raise ValueError(f"Unsupported gate '{name}'")
+        if name == 'barrier' and not qubits:
+            qubits = tuple(range(self.n_qubits))
+        arity = 2 if name in TWO_QUBIT_GATES else (len(qubits) if name == 'barrier' else 1)
+        if len(qubits) != arity:
+            raise ValueError(f"{name} takes {arity} qubit(s), got {len(qubits)}")
+        if len(set(qubits)) != len(qubits):
+            raise ValueError(f"{name} repeats a qubit: {qubits}")
+        for qubit in qubits:
+            if not 0 <= qubit < self.n_qubits:
+                raise ValueError(f"qubit {qubit} out of range for {self.n_qubits} qubits")
+        self.gates.append((name, tuple(qubits)))
+
+
+_QASM_ARG = re.compile(r'^([A-Za-z_]\w*)(?:\[(\d+)\])?$')
+
+
+def _broadcast(operands: List[List[int]]) -> List[Tuple[int, ...]]:
+    """
+    OpenQASM register broadcasting: whole-register operands are zipped
+    (they must have equal sizes) and single qubits repeated alongside.
+    """
+    sizes = {len(operand) for operand in operands if len(operand) != 1}
+    if len(sizes) > 1:
+        raise ValueError(f"register operands differ in size: {sorted(sizes)}")
+    count = sizes.pop() if sizes else 1
+    return [tuple(operand[i] if len(operand) > 1 else operand[0] for operand in operands)
+            for i in range(count)]
+
+
+def parse_qasm(text: str) -> Program:
+    """
+    Parse the OpenQASM 2.0 subset the templates can realize: qreg
+    declarations and x, z, h, cx and barrier statements. creg and measure
+    statements are accepted and ignored. A whole register as an operand
+    applies the gate once per qubit (h q; cx a, b; zips a and b).
+    """
+    registers: Dict[str, Tuple[int, int]] = {}
+    statements = []
+    body = re.sub(r'//[^\n]*', '', text)
+    for number, statement in enumerate(s.strip() for s in body.split(';')):
+        if not statement or statement.startswith(('OPENQASM', 'include', 'creg', 'measure')):
+            continue
+        name, _, args = statement.partition(' ')
+        if name == 'qreg':
+            match = _QASM_ARG.match(args.strip())
+            if not match or match.group(2) is None:
+                raise ValueError(f"Malformed qreg: '{statement}'")
+            registers[match.group(1)] = (sum(size for _, size in registers.values()), int(match.group(2)))
+            continue
+        statements.append((number, name, [a.strip() for a in args.split(',') if a.strip()]))
+
+    program = Program(sum(size for _, size in registers.values()))
+    for number, name, args in statements:
+        operands: List[List[int]] = []
+        for arg in args:
+            match = _QASM_ARG.match(arg)
+            if not match or match.group(1) not in registers:
+                raise ValueError(f"Statement {number + 1}: unknown register in '{arg}'")
+            start, size = registers[match.group(1)]
+            if match.group(2) is None:
+                operands.append(list(range(start, start + size)))   # whole register
+            else:
+                index = int(match.group(2))
+                if index >= size:
+                    raise ValueError(f"Statement {number + 1}: {arg} out of range")
+                operands.append([start + index])
+        try:
+            if name == 'barrier':
+                program.add(name, *(qubit for operand in operands for qubit in operand))
+            else:
+                for qubits in _broadcast(operands):
+                    program.add(name, *qubits)
+        except ValueError as error:
+            raise ValueError(f"Statement {number + 1}: {error}") from None
+    return program
+
+
+def parse_gate_list(gates: Union[str, Iterable[Tuple]], n_qubits: Optional[int] = None) -> Program:
+    """
+    Build a Program from tuples like ('h', 0), ('cnot', 0, 1) or from text
+    with one gate per line ("h 0", "cnot 0 1", '#' comments). n_qubits
+    defaults to one more than the highest qubit used.
+    """
+    if isinstance(gates, str):
+        entries = []
+        for line in gates.splitlines():
+            line = line.split('#', 1)[0].strip()
+            if line:
+                name, *qubits = line.replace(',', ' ').split()
+                entries.append((name, *map(int, qubits)))
+    else:
+        entries = [tuple(entry) for entry in gates]
+    highest = max((q for entry in entries for q in entry[1:]), default=-1)
+    program = Program(n_qubits if n_qubits is not None else highest + 1)
+    for entry in entries:
+        program.add(entry[0], *entry[1:])
+    return program
+
+
+def parse_program(text: str) -> Program:
+    """Parse OpenQASM if the text looks like it, else the line-based gate list"""
+    if 'OPENQASM' in text or 'qreg' in text:
+        return parse_qasm(text)
+    return parse_gate_list(text)
+
+
+# ============================================================================
+# LAYOUT
+# ============================================================================
+
+@dataclass
+class Placement:
+    """One template instance in the compiled layout"""
+    gate: str
+    qubits: Tuple[int, ...]
+    column: int
+    offset: Tuple[int, int, int]
+    mirrored: bool = False    # template reflected along z (see gate_template)
+
+
+def schedule(program: Program, prepare: bool = True) -> List[Placement]:
+    """
+    Assign every gate a column (as early as its lanes allow) and a
+    translation. Each qubit's lane is LANE_GAP wider than the deepest
+    template. A CNOT needs its control in a lane next to the target's: it
+    straddles the two lanes with its control section (rails and threshold
+    comparator) in the control lane and the target rails in the target
+    lane, mirrored when the control lane is the lower one. With prepare,
+    column 0 holds a state preparation per qubit.
+    """
+    used = {'prep'} if prepare else set()
+    used.update(name for name, _ in program.gates if name != 'barrier')
+    lane_pitch = max([gate_template(name).dimensions[2] for name in used] + [1]) + LANE_GAP
+
+    free = [1 if prepare else 0] * program.n_qubits
+    slots: List[Tuple[str, Tuple[int, ...], int]] = []
+    if prepare:
+        slots.extend(('prep', (q,), 0) for q in range(program.n_qubits))
+    for name, qubits in program.gates:
+        if name in TWO_QUBIT_GATES and abs(qubits[0] - qubits[1]) != 1:
+            raise ValueError(f"{name} {qubits[0]} {qubits[1]}: the control must be on "
+                             f"a qubit adjacent to the target")
+        span = range(min(qubits), max(qubits) + 1) if name != 'barrier' else qubits
+        column = max(free[q] for q in span)
+        for q in span:
+            free[q] = column + (0 if name == 'barrier' else 1)
+        if name != 'barrier':
+            slots.append((name, qubits, column))
+
+    n_columns = max([column + 1 for _, _, column in slots] + [0])
+    widths = np.zeros(n_columns, dtype=np.int64)
+    for name, _, column in slots:
+        widths[column] = max(widths[column], gate_template(name).dimensions[0])
+    starts = np.concatenate([[0], np.cumsum(widths + COLUMN_GAP)[:-1]])
+
+    placements = []
+    for name, qubits, column in slots:
+        z = qubits[0] * lane_pitch
+        mirrored = False
+        if name == 'cnot':
+            control, target = qubits
+            mirrored = control < target
+            if mirrored:
+                # Control rows end just below the target lane
+                z = target * lane_pitch - (gate_template(name).dimensions[2] - CNOT_CONTROL_ROW)
+            else:
+                # Control rows start at the control lane
+                z = control * lane_pitch - CNOT_CONTROL_ROW
+        placements.append(Placement(name, qubits, column, (int(starts[column]), 0, z), mirrored))
+    return placements
+
+
+def compile_program(program: Union[Program, str], name: str = "program",
+                    prepare: bool = True) -> Circuit:
+    """
+    Compile a program into one Circuit. Instances of a template are added
+    in one bulk append of its translated coordinate array, so compile time
+    grows with the number of distinct gates rather than blocks placed.
+    Each instance gets its own copy of the template's block NBT.
+    """
+    if isinstance(program, str):
+        program = parse_program(program)
+    placements = schedule(program, prepare)
+
+    offsets: Dict[Tuple[str, bool], List[Tuple[int, int, int]]] = {}
+    for placement in placements:
+        offsets.setdefault((placement.gate, placement.mirrored), []).append(placement.offset)
+
+    store = BlockStore()
+    for (gate, mirrored), gate_offsets in offsets.items():
+        template = gate_template(gate, mirrored).blocks
+        remap = np.array([store.intern(block_id, props) for block_id, props in template.palette],
+                         dtype=np.int32)
+        shifts = np.asarray(gate_offsets, dtype=np.int32)
+        start = len(store)
+        store.extend_arrays((template.positions[None, :, :] + shifts[:, None, :]).reshape(-1, 3),
+                            np.tile(remap[template.state_ids], len(shifts)))
+        for instance in range(len(shifts)):
+            base = start + instance * len(template)
+            for row, nbt in template.nbt.items():
+                store.nbt[base + row] = copy.deepcopy(nbt)
+
+    extent = np.zeros(3, dtype=np.int64)
+    for placement in placements:
+        extent = np.maximum(extent, np.add(placement.offset, gate_template(placement.gate).dimensions))
+    dimensions = tuple(int(v) for v in extent)
+    gate_count = sum(1 for gate, _ in program.gates if gate != 'barrier')
+    return Circuit(
+        name=name,
+        description=f"{gate_count}-gate program on {program.n_qubits} qubit(s)",
+        blocks=store,
+        dimensions=dimensions,
+    )
+
+
+def emit_circuit(circuit: Circuit, output_dir: str, formats: Optional[List[str]] = None,
+                 namespace: str = "quantum") -> List[str]:
+    """
+    Write a compiled circuit to every output path: JSON, a merged
+    mcfunction, .litematic/.schem/.nbt schematics and the CAD formats.
+    """
+    from export_cad import circuit_data, export_circuits
+    from schematic import SCHEMATIC_EXPORTERS, export_schematic
+
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+
+    json_path = os.path.join(output_dir, f"{circuit.name}.json")
+    export_to_json([circuit], json_path)
+    written.append(json_path)
+
+    mcfunc_dir = os.path.join(output_dir, 'mcfunctions')
+    os.makedirs(mcfunc_dir, exist_ok=True)
+    mcfunc_path = os.path.join(mcfunc_dir, f'place_{circuit.name}.mcfunction')
+    with open(mcfunc_path, 'w', encoding='utf-8') as f:
+        f.write(generate_mcfunction(circuit, namespace, merge=True))
+    print(f"Exported mcfunction: {mcfunc_path}")
+    written.append(mcfunc_path)
+
+    for suffix in SCHEMATIC_EXPORTERS:
+        path = os.path.join(output_dir, f"{circuit.name}{suffix}")
+        export_schematic(circuit, path)
+        written.append(path)
+
+    written.extend(export_circuits([circuit_data(circuit)], os.path.join(output_dir, 'cad_exports'), formats))
+    return written
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile a gate program into a Quantum-Redstone circuit")
+    parser.add_argument('program', help="gate list or OpenQASM 2.0 file")
+    parser.add_argument('--output', '-o', default='compiled', help="output directory")
+    parser.add_argument('--name', help="circuit name (default: program file name)")
+    parser.add_argument('--no-prepare', action='store_true',
+                        help="omit the state preparation column")
+    args = parser.parse_args(argv)
+
+    with open(args.program, 'r', encoding='utf-8') as f:
+        program = parse_program(f.read())
+    name = args.name or os.path.splitext(os.path.basename(args.program))[0]
+    circuit = compile_program(program, name, prepare=not args.no_prepare)
+    print(f"Compiled {circuit.description}: {len(circuit.blocks)} blocks, {circuit.dimensions}")
+    emit_circuit(circuit, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,15 +5,22 @@ Version: 0.1.0
 Author: Hope&&Sauced Collaborative
 
 Generates NBT-compatible structure data for Minecraft quantum gate circuits.
-Output can be converted to Litematica .litematic or WorldEdit .schem format.
+Output can be written as Litematica .litematic, WorldEdit .schem or vanilla
+structure .nbt files with schematic.py.
 """
 
+import copy
 import json
 import math
+import textwrap
+from functools import lru_cache
+from types import MappingProxyType
 from dataclasses import dataclass
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator
 from enum import Enum
 
+import numpy as np
+
 # ============================================================================
 # MATHEMATICAL FOUNDATIONS
 # ============================================================================
@@ -41,7 +48,94 @@ def phase_to_signals(phi: float, max_signal: int = 15) -> Tuple[int, int]:
     omega = max_signal - alpha  # Guarantee conservation
     return alpha, omega
 
-def generate_lookup_table(steps: int = 16) -> List[Dict]:
+# Number of (steps, max_signal) tables kept by build_lookup_arrays()
+LOOKUP_CACHE_SIZE = 32
+
+
+@dataclass(frozen=True, eq=False)
+class LookupArrays:
+    """
+    Column-wise phase lookup table.
+
+    Every field is a read-only NumPy array of length `steps`; instances are
+    shared through the build_lookup_arrays() cache, so they must not be
+    mutated.
+    """
+    steps: int
+    max_signal: int
+    phi: np.ndarray
+    cos_sq: np.ndarray
+    sin_sq: np.ndarray
+    alpha: np.ndarray
+    omega: np.ndarray
+    chest_items: np.ndarray
+    is_viviani: np.ndarray
+
+    def to_entries(self) -> List[Dict]:
+        """Expand into the list-of-dicts form returned by generate_lookup_table()"""
+        half = self.steps // 2
+        max_signal = self.max_signal
+        columns = zip(
+            self.phi.tolist(), self.cos_sq.tolist(), self.sin_sq.tolist(),
+            self.alpha.tolist(), self.omega.tolist(), self.chest_items.tolist(),
+            self.is_viviani.tolist()
+        )
+        return [
+            {
+                'step': k,
+                'phi': phi,
+                'phi_fraction': f"{k}pi/{half}" if k > 0 else "0",
+                'phi_fraction_unicode': f"{k}π/{half}" if k > 0 else "0",
+                'cos_sq': cos_sq,
+                'sin_sq': sin_sq,
+                'alpha': alpha,
+                'omega': omega,
+                'chest_items': chest_items,
+                'is_viviani': is_viviani,
+                'conservation_check': alpha + omega == max_signal
+            }
+            for k, (phi, cos_sq, sin_sq, alpha, omega, chest_items, is_viviani)
+            in enumerate(columns)
+        ]
+
+
+@lru_cache(maxsize=LOOKUP_CACHE_SIZE)
+def build_lookup_arrays(steps: int = 16, max_signal: int = 15) -> LookupArrays:
+    """
+    Build the phase lookup table as arrays.
+
+    cos²/sin² are deliberately computed per step with the scalar
+    cos_squared/sin_squared, so the table matches them bit for bit;
+    quantization, conservation and Viviani flags are whole-array
+    operations. Results are cached by (steps, max_signal) in a bounded LRU.
+    """
+    if steps < 2:
+        raise ValueError(f"steps must be at least 2, got {steps}")
+
+    phi = np.arange(steps) * math.pi / (steps // 2)  # Full 2π rotation
+    # cos²/sin² through the scalar helpers: np.sin/np.cos may differ from
+    # math in the last ulp, which would show in phase_lookup_table.json
+    cos_sq = np.fromiter(map(cos_squared, phi.tolist()), dtype=np.float64, count=steps)
+    sin_sq = np.fromiter(map(sin_squared, phi.tolist()), dtype=np.float64, count=steps)
+
+    # np.rint rounds half to even, matching round() in phase_to_signals
+    alpha = np.rint(max_signal * cos_sq).astype(np.int64)
+    omega = max_signal - alpha  # Guarantee conservation
+
+    # ~4 items per signal level in a single-stack chest
+    chest_items = alpha * 4
+
+    # Viviani crossings occur when cos²(φ) ≈ sin²(φ) ≈ 0.5
+    is_viviani = np.abs(cos_sq - 0.5) < 0.1
+
+    for array in (phi, cos_sq, sin_sq, alpha, omega, chest_items, is_viviani):
+        array.setflags(write=False)
+
+    return LookupArrays(steps, max_signal, phi, cos_sq, sin_sq,
+                        alpha, omega, chest_items, is_viviani)
+
+
+def generate_lookup_table(steps: int = 16, max_signal: int = 15) -> List[Dict]:
     """
     Generate the full phase lookup table.
     
@@ -50,41 +144,159 @@ def generate_lookup_table(steps: int = 16) -> List[Dict]:
         - phi: phase angle in radians
         - cos_sq: cos²(φ) exact value
         - sin_sq: sin²(φ) exact value  
-        - alpha: discrete ALPHA signal (0-15)
-        - omega: discrete OMEGA signal (0-15)
+        - alpha: discrete ALPHA signal (0-max_signal)
+        - omega: discrete OMEGA signal (0-max_signal)
         - chest_items: number of items for chest (for signal level)
         - is_viviani: True if this is a Viviani crossing point
     """
-    table = []
-    for k in range(steps):
-        phi = k * math.pi / (steps // 2)  # Full 2π rotation
-        cos_sq = cos_squared(phi)
-        sin_sq = sin_squared(phi)
-        alpha, omega = phase_to_signals(phi)
-        
-        # Items needed in chest for given signal level
-        # Signal = floor(1 + 14 * fill_fraction) for fill > 0
-        # For single stack: ~4 items per signal level
-        chest_items = alpha * 4
-        
-        # Viviani crossings occur when cos²(φ) ≈ sin²(φ) ≈ 0.5
-        is_viviani = abs(cos_sq - 0.5) < 0.1
-        
-        table.append({
-            'step': k,
-            'phi': phi,
-            'phi_fraction': f"{k}pi/{steps//2}" if k > 0 else "0",
-            'phi_fraction_unicode': f"{k}π/{steps//2}" if k > 0 else "0",
-            'cos_sq': cos_sq,
-            'sin_sq': sin_sq,
-            'alpha': alpha,
-            'omega': omega,
-            'chest_items': chest_items,
-            'is_viviani': is_viviani,
-            'conservation_check': verify_conservation(alpha, omega)
-        })
-    
-    return table
+    return build_lookup_arrays(steps, max_signal).to_entries()
+
+
+# ============================================================================
+# TRANSFER TABLES
+# ============================================================================
+
+# Composed gate prefixes kept by each TransferComposer
+TRANSFER_PREFIX_CACHE = 1024
+
+# Rail prefix of each qubit, as in redstone_sim.GATE_PORTS
+QUBIT_PREFIXES = {1: [''], 2: ['control_', '']}
+
+
+def _gate_matrix(gate: str) -> np.ndarray:
+    from quantum_state import SINGLE_QUBIT_GATES, TWO_QUBIT_GATES
+
+    matrix = SINGLE_QUBIT_GATES.get(gate, TWO_QUBIT_GATES.get(gate))
+    if matrix is None:
+        raise ValueError(f"No transfer table for gate '{gate}'")
+    return matrix
+
+
+@lru_cache(maxsize=LOOKUP_CACHE_SIZE)
+def gate_transfer_table(gate: str, max_signal: int = 15):
+    """
+    Ideal redstone_sim.TransferTable of a gate ('x', 'z', 'h' or 'cnot').
+
+    Each qubit has ALPHA, OMEGA and PHASE rails (PHASE 0 or max_signal),
+    named like the gate's GATE_PORTS, so the table lines up with
+    truth_table() of the generated circuit and chains with
+    compose_tables(). Levels are read as amplitudes sqrt(ALPHA/max),
+    ±sqrt(OMEGA/max), the gate is applied to the product state and each
+    qubit is re-quantized from its reduced state; every qubit keeps its
+    ALPHA + OMEGA, and PHASE is 0 whenever a rail is empty. Tables are
+    cached; treat them as read-only.
+    """
+    from redstone_sim import TransferTable
+
+    gate = gate.lower()
+    matrix = _gate_matrix(gate)
+    n_qubits = matrix.shape[0].bit_length() - 1
+
+    levels = np.arange(max_signal + 1)
+    alpha, omega, phase = (m.reshape(-1) for m in np.meshgrid(levels, levels, [0, 1], indexing='ij'))
+    total = alpha + omega
+    amplitudes = np.stack([np.sqrt(alpha / max_signal),
+                           np.where(phase == 1, -1.0, 1.0) * np.sqrt(omega / max_signal)], axis=1)
+    # An empty qubit still needs a unit state to carry the others
+    amplitudes[total == 0] = (1.0, 0.0)
+    weight = np.where(total == 0, 1.0, total / max_signal)
+
+    states = len(alpha)
+    psi, norm = amplitudes, weight
+    for _ in range(1, n_qubits):
+        psi = (psi[:, None, :, None] * amplitudes[None, :, None, :]).reshape(len(psi) * states, -1)
+        norm = (norm[:, None] * weight[None, :]).reshape(-1)
+    result = psi @ matrix.T
+
+    grid = (max_signal + 1, max_signal + 1, 2) * n_qubits
+    qubit_state = np.indices((states,) * n_qubits).reshape(n_qubits, -1)
+    columns = []
+    for q in range(n_qubits):
+        q_total = total[qubit_state[q]]
+        others = norm / weight[qubit_state[q]]
+
+        qubit = np.moveaxis(result.reshape((-1,) + (2,) * n_qubits), 1 + q, 1).reshape(len(result), 2, -1)
+        p0 = (np.abs(qubit[:, 0]) ** 2).sum(axis=1)
+        coherence = np.real(qubit[:, 1] * np.conj(qubit[:, 0])).sum(axis=1)
+
+        new_alpha = np.clip(np.rint(max_signal * p0 / others).astype(np.int64),
+                            np.maximum(q_total - max_signal, 0), np.minimum(q_total, max_signal))
+        new_omega = q_total - new_alpha
+        # PHASE is the sign between the rails; with one rail empty it is 0
+        new_phase = (coherence < -1e-12) & (new_alpha > 0) & (new_omega > 0)
+        columns += [new_alpha, new_omega, np.where(new_phase, max_signal, 0)]
+
+    names = [prefix + rail for prefix in QUBIT_PREFIXES[n_qubits] for rail in ('alpha', 'omega', 'phase')]
+    rail_levels = [levels, levels, np.array([0, max_signal])] * n_qubits
+    values = np.stack(columns, axis=-1).astype(np.int16).reshape(grid + (len(names),))
+    settled = np.ones(grid, dtype=bool)
+    for array in (values, settled):
+        array.setflags(write=False)
+    return TransferTable(gate, names, [l.astype(np.int16) for l in rail_levels], list(names),
+                         values, settled)
+
+
+def identity_transfer_table(n_qubits: int = 1, max_signal: int = 15):
+    """TransferTable that passes every rail through unchanged"""
+    from redstone_sim import TransferTable
+
+    names = [prefix + rail for prefix in QUBIT_PREFIXES[n_qubits] for rail in ('alpha', 'omega', 'phase')]
+    levels = [np.arange(max_signal + 1, dtype=np.int16)] * 2 + [np.array([0, max_signal], dtype=np.int16)]
+    levels = levels * n_qubits
+    values = np.stack(np.meshgrid(*levels, indexing='ij'), axis=-1)
+    return TransferTable('identity', names, levels, list(names), values,
+                         np.ones(values.shape[:-1], dtype=bool))
+
+
+class TransferComposer:
+    """
+    Composes gate sequences into one TransferTable with
+    redstone_sim.compose_tables().
+
+    Every prefix of a composed sequence is cached (up to cache_size, oldest
+    first out), so sequences sharing a prefix only pay for their new gates.
+    All gates of a sequence must act on the same number of qubits.
+    """
+
+    def __init__(self, max_signal: int = 15, cache_size: int = TRANSFER_PREFIX_CACHE):
+        self.max_signal = max_signal
+        self.cache_size = cache_size
+        self._prefixes: Dict[Tuple[str, ...], object] = {}
+
+    def table(self, gates: Iterable[str]):
+        """TransferTable of applying gates in order"""
+        from redstone_sim import compose_tables
+
+        key = tuple(gate.lower() for gate in gates)
+        if not key:
+            return identity_transfer_table(1, self.max_signal)
+        cached = len(key)
+        while cached and key[:cached] not in self._prefixes:
+            cached -= 1
+        if cached:
+            table = self._prefixes[key[:cached]]
+        else:
+            table = gate_transfer_table(key[0], self.max_signal)
+            cached = 1
+        for i in range(cached, len(key)):
+            table = compose_tables([table, gate_transfer_table(key[i], self.max_signal)])
+            table.values.setflags(write=False)
+            table.settled.setflags(write=False)
+            self._prefixes[key[:i + 1]] = table
+            if len(self._prefixes) > self.cache_size:
+                del self._prefixes[next(iter(self._prefixes))]
+        return table
+
+
+_COMPOSERS: Dict[int, TransferComposer] = {}
+
+
+def compose_transfer(gates: Iterable[str], max_signal: int = 15):
+    """TransferTable of a gate sequence, using a shared prefix cache"""
+    composer = _COMPOSERS.get(max_signal)
+    if composer is None:
+        composer = _COMPOSERS[max_signal] = TransferComposer(max_signal)
+    return composer.table(gates)
 
 
 # ============================================================================
@@ -99,6 +311,45 @@ class BlockFacing(Enum):
     UP = "up"
     DOWN = "down"
 
+# Block offset of each facing
+NEIGHBOUR_OFFSETS = {
+    'east': (1, 0, 0),
+    'west': (-1, 0, 0),
+    'up': (0, 1, 0),
+    'down': (0, -1, 0),
+    'south': (0, 0, 1),
+    'north': (0, 0, -1),
+}
+
+# Components that pop off without a supporting block
+NEEDS_SUPPORT = {
+    'minecraft:redstone_wire',
+    'minecraft:redstone_torch',
+    'minecraft:redstone_wall_torch',
+    'minecraft:lever',
+    'minecraft:stone_button',
+    'minecraft:comparator',
+    'minecraft:repeater',
+}
+
+
+def support_offset(block_id: str, properties: Optional[Dict]) -> Tuple[int, int, int]:
+    """Offset to the block a component hangs on (below it, unless wall-mounted)"""
+    props = properties or {}
+    facing = props.get('facing')
+    wall_mounted = (
+        props.get('face') == 'wall'
+        or block_id == 'minecraft:redstone_wall_torch'
+        or (block_id == 'minecraft:redstone_torch' and facing in ('north', 'south', 'east', 'west'))
+    )
+    if props.get('face') == 'ceiling':
+        return (0, 1, 0)
+    if wall_mounted and facing in NEIGHBOUR_OFFSETS:
+        dx, dy, dz = NEIGHBOUR_OFFSETS[facing]
+        return (-dx, -dy, -dz)  # attached to the block behind it
+    return (0, -1, 0)
+
+
 @dataclass
 class Block:
     """Minecraft block with position and properties"""
@@ -120,13 +371,277 @@ class Block:
             result['nbt'] = self.nbt
         return result
 
+
+class BlockView(Block):
+    """
+    Read-only Block returned by BlockStore indexing and iteration.
+
+    Assigning an attribute raises AttributeError and properties/nbt are
+    read-only mappings (nbt over a copy), so edits cannot be silently
+    lost. view.mutable() (or copy.copy(view)) gives an editable Block;
+    write it back with `circuit.blocks[i] = block`.
+    """
+
+    def __init__(self, x: int, y: int, z: int, block_id: str,
+                 properties: Optional[Dict] = None, nbt: Optional[Dict] = None):
+        for name, value in (('x', x), ('y', y), ('z', z), ('block_id', block_id),
+                            ('properties', MappingProxyType(properties) if properties else None),
+                            ('nbt', MappingProxyType(nbt) if nbt else None)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Block views are read-only; assign circuit.blocks[i] = Block(...) "
+                             f"to change '{name}'")
+
+    def __delattr__(self, name):
+        raise AttributeError("Block views are read-only")
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Block):
+            return ((self.x, self.y, self.z, self.block_id, self.properties, self.nbt)
+                    == (other.x, other.y, other.z, other.block_id, other.properties, other.nbt))
+        return NotImplemented
+
+    __hash__ = None
+
+    def mutable(self) -> Block:
+        """Independent, editable Block with this view's values"""
+        return Block(self.x, self.y, self.z, self.block_id,
+                     dict(self.properties) if self.properties else None,
+                     copy.deepcopy(dict(self.nbt)) if self.nbt else None)
+
+    def __reduce__(self):
+        # copy, deepcopy and pickle produce plain Blocks
+        block = self.mutable()
+        return (Block, (block.x, block.y, block.z, block.block_id, block.properties, block.nbt))
+
+    def to_dict(self) -> Dict:
+        return self.mutable().to_dict()
+
+
+class BlockStore:
+    """
+    Columnar block storage backing a Circuit.
+
+    Coordinates live in an (n, 3) int32 array and block states in an int32
+    array of indices into a shared palette of interned (block_id, properties)
+    entries. NBT is kept in a sparse side table keyed by row, since only
+    containers carry any.
+
+    The store behaves like a list of Block objects: indexing and iteration
+    materialize read-only BlockViews on demand, append() accepts a Block
+    and `store[i] = block` replaces one. Editing a view raises instead of
+    being silently dropped.
+    """
+
+    _INITIAL_CAPACITY = 64
+
+    def __init__(self, blocks: Optional[Iterable[Block]] = None):
+        self._xyz = np.empty((self._INITIAL_CAPACITY, 3), dtype=np.int32)
+        self._state = np.empty(self._INITIAL_CAPACITY, dtype=np.int32)
+        self._size = 0
+        self.palette: List[Tuple[str, Optional[Dict]]] = []
+        self._palette_index: Dict[Tuple, int] = {}
+        self.nbt: Dict[int, Dict] = {}
+        if blocks is not None:
+            self.extend(blocks)
+
+    # ----- palette -----
+
+    def intern(self, block_id: str, properties: Optional[Dict] = None) -> int:
+        """
+        Return the palette index for a block state, adding it if new.
+        Property order does not matter; the first order seen is kept.
+        """
+        key = (block_id, tuple(sorted(properties.items())) if properties else ())
+        index = self._palette_index.get(key)
+        if index is None:
+            index = len(self.palette)
+            self.palette.append((block_id, dict(properties) if properties else None))
+            self._palette_index[key] = index
+        return index
+
+    # ----- growth -----
+
+    def _reserve(self, extra: int):
+        needed = self._size + extra
+        capacity = len(self._state)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        xyz = np.empty((capacity, 3), dtype=np.int32)
+        state = np.empty(capacity, dtype=np.int32)
+        xyz[:self._size] = self._xyz[:self._size]
+        state[:self._size] = self._state[:self._size]
+        self._xyz, self._state = xyz, state
+
+    def add(self, x: int, y: int, z: int, block_id: str,
+            properties: Optional[Dict] = None, nbt: Optional[Dict] = None) -> int:
+        """Append one block and return its row index"""
+        self._reserve(1)
+        row = self._size
+        self._xyz[row] = (x, y, z)
+        self._state[row] = self.intern(block_id, properties)
+        if nbt:
+            self.nbt[row] = nbt if isinstance(nbt, dict) else dict(nbt)
+        self._size += 1
+        return row
+
+    def append(self, block: Block):
+        self.add(block.x, block.y, block.z, block.block_id, block.properties, block.nbt)
+
+    def extend(self, blocks: Iterable[Block]):
+        if isinstance(blocks, BlockStore):
+            self.extend_store(blocks)
+            return
+        for block in blocks:
+            self.append(block)
+
+    def extend_arrays(self, positions, state_ids):
+        """
+        Bulk-append blocks from an (n, 3) coordinate array and an array of
+        palette indices already interned in this store.
+        """
+        positions = np.asarray(positions, dtype=np.int32).reshape(-1, 3)
+        state_ids = np.asarray(state_ids, dtype=np.int32).reshape(-1)
+        if len(positions) != len(state_ids):
+            raise ValueError("positions and state_ids must have the same length")
+        if len(state_ids) and (state_ids.min() < 0 or state_ids.max() >= len(self.palette)):
+            raise ValueError("state_ids reference entries outside the palette")
+        self._reserve(len(state_ids))
+        start, end = self._size, self._size + len(state_ids)
+        self._xyz[start:end] = positions
+        self._state[start:end] = state_ids
+        self._size = end
+
+    def subset(self, rows, offset: Tuple[int, int, int] = (0, 0, 0)) -> 'BlockStore':
+        """New store of the given rows (in that order), translated by offset; the palette is shared"""
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1)
+        store = BlockStore()
+        store.palette = list(self.palette)
+        store._palette_index = dict(self._palette_index)
+        store.extend_arrays(self.positions[rows] + np.asarray(offset, dtype=np.int32),
+                            self.state_ids[rows])
+        if self.nbt:
+            for new_row, row in enumerate(rows.tolist()):
+                if row in self.nbt:
+                    store.nbt[new_row] = self.nbt[row]
+        return store
+
+    def extend_store(self, other: 'BlockStore', offset: Tuple[int, int, int] = (0, 0, 0)):
+        """Append every block of another store, translated by offset"""
+        remap = np.array([self.intern(block_id, props) for block_id, props in other.palette],
+                         dtype=np.int32)
+        start = self._size
+        if len(other):
+            self.extend_arrays(other.positions + np.asarray(offset, dtype=np.int32),
+                               remap[other.state_ids])
+        for row, nbt in other.nbt.items():
+            self.nbt[start + row] = nbt
+
+    # ----- columnar access -----
+
+    @property
+    def positions(self) -> np.ndarray:
+        """(n, 3) int32 view of block coordinates"""
+        return self._xyz[:self._size]
+
+    @property
+    def state_ids(self) -> np.ndarray:
+        """int32 view of palette indices, one per block"""
+        return self._state[:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the coordinate and state columns"""
+        return self.positions.nbytes + self.state_ids.nbytes
+
+    def state(self, row: int) -> Tuple[str, Optional[Dict]]:
+        return self.palette[self._state[row]]
+
+    # ----- list-of-Block view -----
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _block_at(self, row: int) -> BlockView:
+        x, y, z = self._xyz[row].tolist()
+        block_id, props = self.palette[self._state[row]]
+        nbt = self.nbt.get(row)
+        # The palette entry is shared, but the view only exposes it read-only
+        return BlockView(x, y, z, block_id, props, copy.deepcopy(nbt) if nbt else None)
+
+    def _row(self, index: int) -> int:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("block index out of range")
+        return index
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._block_at(i) for i in range(*index.indices(self._size))]
+        return self._block_at(self._row(index))
+
+    def __setitem__(self, index: int, block: Block):
+        """Replace the block at index with a Block (or view)"""
+        if isinstance(index, slice):
+            raise TypeError("BlockStore does not support slice assignment")
+        row = self._row(index)
+        self._xyz[row] = (block.x, block.y, block.z)
+        self._state[row] = self.intern(block.block_id, block.properties)
+        if block.nbt:
+            self.nbt[row] = copy.deepcopy(dict(block.nbt))
+        else:
+            self.nbt.pop(row, None)
+
+    def __iter__(self) -> Iterator[BlockView]:
+        for row in range(self._size):
+            yield self._block_at(row)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (BlockStore, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"BlockStore({self._size} blocks, {len(self.palette)} states)"
+
+    def iter_dicts(self) -> Iterator[Dict]:
+        """
+        Yield Block.to_dict()-shaped dicts without building Block objects.
+        Like Block views, the dicts hold copies of the properties and NBT.
+        """
+        positions = self.positions.tolist()
+        states = self.state_ids.tolist()
+        for row, (pos, state) in enumerate(zip(positions, states)):
+            block_id, props = self.palette[state]
+            result = {'pos': pos, 'block': block_id}
+            if props:
+                result['properties'] = dict(props)
+            nbt = self.nbt.get(row)
+            if nbt:
+                result['nbt'] = copy.deepcopy(nbt)
+            yield result
+
+
 @dataclass  
 class Circuit:
-    """A Redstone circuit with blocks and metadata"""
+    """
+    A Redstone circuit with blocks and metadata
+
+    blocks may be given as any iterable of Block; it is stored as a
+    BlockStore, which still indexes and iterates like a list of Block.
+    """
     name: str
     description: str
-    blocks: List[Block]
+    blocks: BlockStore
     dimensions: Tuple[int, int, int]  # x, y, z
+
+    def __post_init__(self):
+        if not isinstance(self.blocks, BlockStore):
+            self.blocks = BlockStore(self.blocks)
     
     def to_dict(self) -> Dict:
         return {
@@ -138,9 +653,32 @@ class Circuit:
                 'z': self.dimensions[2]
             },
             'block_count': len(self.blocks),
-            'blocks': [b.to_dict() for b in self.blocks]
+            'blocks': list(self.blocks.iter_dicts())
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Circuit':
+        """
+        Build a circuit from to_dict() output or the compact columnar form
+        (palette, flat positions, states, nbt) written by export_to_json.
+        """
+        dims = data['dimensions']
+        if isinstance(dims, dict):
+            dims = (dims['x'], dims['y'], dims['z'])
+        store = BlockStore()
+        if 'blocks' in data:
+            for b in data['blocks']:
+                x, y, z = b['pos']
+                store.add(x, y, z, b['block'], b.get('properties'), b.get('nbt'))
+        else:
+            remap = np.array([store.intern(entry['block'], entry.get('properties'))
+                              for entry in data['palette']], dtype=np.int32)
+            states = np.asarray(data['states'], dtype=np.int64)
+            store.extend_arrays(data['positions'], remap[states] if len(states) else states)
+            for row, nbt in data.get('nbt', {}).items():
+                store.nbt[int(row)] = nbt
+        return cls(data['name'], data['description'], store, tuple(dims))
+
 
 # ============================================================================
 # CIRCUIT GENERATORS
@@ -456,6 +994,143 @@ def generate_phase_engine(lookup_table: List[Dict]) -> Circuit:
     )
 
 
+def container_items(level: int, slots: int = 27, max_stack: int = 64) -> List[Dict]:
+    """Item stacks that make a comparator read `level` from a container"""
+    if level <= 0:
+        return []
+    count = 1 if level == 1 else -(-(level - 1) * slots * max_stack // 14)
+    stacks = []
+    for slot in range(slots):
+        if count <= 0:
+            break
+        stacks.append({"Slot": slot, "id": "minecraft:cobblestone", "Count": min(count, max_stack)})
+        count -= max_stack
+    return stacks
+
+
+def _lookup_cell_side(x: int, z0: int, side: int, a: int, level: int, flow: str) -> List[Block]:
+    """
+    One side of a chain lookup cell (side=1 south of the ALPHA bus at z0,
+    -1 north): a decoder that inhibits unless ALPHA == a, the entry chest
+    holding `level` and the cell's stretch of the output bus, whose
+    comparators face `flow`. Every component rests on stone at y=0.
+    """
+    out = "south" if side > 0 else "north"
+    components = [
+        # Decoder: ALPHA - a and a - ALPHA, either one non-zero inhibits
+        (x, 1, "minecraft:comparator", {"facing": out, "mode": "subtract"}),           # ALPHA - a
+        (x + 1, 1, "minecraft:comparator", {"facing": "west", "mode": "compare"}),     # a from the chest
+        (x + 4, 1, "minecraft:comparator", {"facing": out, "mode": "compare"}),        # ALPHA
+        (x + 1, 2, "minecraft:repeater", {"facing": "east", "delay": 1}),
+        (x + 2, 2, "minecraft:repeater", {"facing": "east", "delay": 1}),
+        (x + 4, 2, "minecraft:comparator", {"facing": "west", "mode": "subtract"}),    # a - ALPHA
+        (x + 3, 3, "minecraft:repeater", {"facing": out, "delay": 1}),                 # inhibit at full strength
+        # Entry: the chest level, unless inhibited
+        (x + 2, 4, "minecraft:repeater", {"facing": "west", "delay": 1}),
+        (x + 1, 4, "minecraft:comparator", {"facing": out, "mode": "subtract"}),
+    ]
+    # Output bus: stone at odd offsets, comparators between
+    components += [(x + dx, 5, "minecraft:comparator", {"facing": flow, "mode": "compare"}) for dx in (0, 2, 4)]
+
+    blocks = []
+    for bx, row, block_id, properties in components:
+        blocks.append(Block(bx, 0, z0 + row * side, "minecraft:stone"))
+        blocks.append(Block(bx, 1, z0 + row * side, block_id, properties=properties))
+    for dx, row in ((0, 2), (3, 2), (3, 4), (1, 5), (3, 5), (5, 5)):
+        blocks.append(Block(x + dx, 1, z0 + row * side, "minecraft:stone"))
+    for dx, row, chest_level in ((2, 1, a), (5, 2, a), (1, 3, level)):
+        blocks.append(Block(x + dx, 1, z0 + row * side, "minecraft:chest",
+                            nbt={"Items": container_items(chest_level)}))
+    return blocks
+
+
+def generate_chain_lookup(gates: List[str], max_signal: int = 15) -> Circuit:
+    """
+    Chain Lookup: a whole single-qubit gate sequence in one stage.
+
+    The composed transfer table is stored as one cell per valid input
+    state (ALPHA + OMEGA = max_signal, both PHASE values), so only ALPHA
+    and PHASE are read:
+    - ALPHA BUS: ALPHA (driven at x=0, z=5) runs east along a chain of
+      stone and compare comparators, which repeats its level losslessly
+      through the PHASE-0 bank (cells a = 0..max_signal, 6 blocks apart
+      from x=0) and the PHASE-1 bank after it.
+    - DECODERS: on each side of the bus, cell a subtracts a chest holding
+      level a from ALPHA and ALPHA from a second one; either difference
+      drives the cell's inhibit repeater, which is off only when ALPHA == a.
+    - ENTRIES: a subtract comparator reads the chest holding the output
+      ALPHA (south) or PHASE (north) level into the output bus beside it,
+      unless the inhibit repeater beside it is on.
+    - MERGE: the PHASE-0 output buses flow east and the PHASE-1 buses
+      west into the strip between the banks, where subtract comparators
+      gated by PHASE and by a torch's !PHASE pass one bank into the output
+      blocks: ALPHA at z=10, PHASE at z=0. OMEGA is max_signal - ALPHA,
+      a redstone block less the ALPHA output, at z=12. PHASE is driven at
+      z=8 and crosses the ALPHA bus on a wire bridge.
+    """
+    table = compose_transfer(gates, max_signal)
+    if table.inputs != ['alpha', 'omega', 'phase']:
+        raise ValueError("generate_chain_lookup() takes single-qubit gates only")
+    blocks = []
+    z0 = 5
+    bank = 6 * (max_signal + 1)
+    merge = bank                 # 4-block strip between the banks
+    banks = ((0, 0, "east"), (1, bank + 4, "west"))
+
+    # ===== ALPHA BUS =====
+    for x in range(2 * bank + 4):
+        if x % 2:
+            blocks.append(Block(x, 0, z0, "minecraft:stone"))
+            blocks.append(Block(x, 1, z0, "minecraft:comparator", properties={"facing": "east", "mode": "compare"}))
+        else:
+            blocks.append(Block(x, 1, z0, "minecraft:stone"))
+
+    # ===== CELLS =====
+    for phase, start, flow in banks:
+        for a in range(max_signal + 1):
+            out_alpha, _, out_phase = (int(v) for v in table.values[a, max_signal - a, phase])
+            blocks += _lookup_cell_side(start + 6 * a, z0, 1, a, out_alpha, flow)
+            blocks += _lookup_cell_side(start + 6 * a, z0, -1, a, out_phase, flow)
+
+    # ===== PHASE INPUT =====
+    # Wire from the input (merge, 1, z0 + 3) over the ALPHA bus to the
+    # north side, each side's end weakly powering a stone with a !PHASE torch
+    for y, z in ((1, z0 + 3), (1, z0 + 2), (2, z0 + 1), (3, z0), (2, z0 - 1), (1, z0 - 2), (1, z0 - 3)):
+        blocks.append(Block(merge, y - 1, z, "minecraft:stone"))
+        blocks.append(Block(merge, y, z, "minecraft:redstone_wire"))
+    for side in (1, -1):
+        blocks.append(Block(merge + 1, 1, z0 + 3 * side, "minecraft:stone"))
+        blocks.append(Block(merge + 2, 1, z0 + 3 * side, "minecraft:redstone_wall_torch",
+                            properties={"facing": "east"}))  # !PHASE
+
+    # ===== MERGE =====
+    # Each bank's bus ends in a subtract comparator facing the output
+    # block, its side held by a repeater off PHASE (bank 0) or !PHASE (bank 1)
+    for side in (1, -1):
+        out = "south" if side > 0 else "north"
+        for dx, facing in ((0, "east"), (2, "west")):
+            for row, block_id, properties in ((4, "minecraft:repeater", {"facing": out, "delay": 1}),
+                                              (5, "minecraft:comparator", {"facing": facing, "mode": "subtract"})):
+                blocks.append(Block(merge + dx, 0, z0 + row * side, "minecraft:stone"))
+                blocks.append(Block(merge + dx, 1, z0 + row * side, block_id, properties=properties))
+        blocks.append(Block(merge + 1, 1, z0 + 5 * side, "minecraft:stone"))  # ALPHA or PHASE out
+        blocks.append(Block(merge + 3, 1, z0 + 5 * side, "minecraft:stone"))  # end of the PHASE-1 bus
+
+    # ===== OMEGA =====
+    for z, block_id, properties in ((z0 + 6, "minecraft:comparator", {"facing": "south", "mode": "compare"}),
+                                    (z0 + 7, "minecraft:comparator", {"facing": "east", "mode": "subtract"})):
+        blocks.append(Block(merge + 1, 0, z, "minecraft:stone"))
+        blocks.append(Block(merge + 1, 1, z, block_id, properties=properties))
+    blocks.append(Block(merge, 1, z0 + 7, "minecraft:redstone_block"))
+
+    return Circuit(
+        name="chain_lookup",
+        description=f"Single-stage lookup for {' '.join(gates) or 'identity'}",
+        blocks=blocks,
+        dimensions=(2 * bank + 4, 4, 2 * z0 + 3)
+    )
+
+
 def generate_conservation_verifier() -> Circuit:
     """
     Circuit 9: Conservation Verifier
@@ -511,28 +1186,150 @@ def generate_conservation_verifier() -> Circuit:
 # EXPORT FUNCTIONS
 # ============================================================================
 
-def export_to_json(circuits: List[Circuit], filepath: str):
-    """Export circuits to JSON format for further processing"""
-    data = {
-        'version': '0.1.0',
-        'author': 'Hope&&Sauced Collaborative',
-        'description': 'Quantum Redstone Circuit Definitions',
-        'circuits': [c.to_dict() for c in circuits]
+# Blocks per chunk when streaming compact position/state arrays
+JSON_CHUNK_BLOCKS = 65536
+
+_FILE_HEADER = {
+    'version': '0.1.0',
+    'author': 'Hope&&Sauced Collaborative',
+    'description': 'Quantum Redstone Circuit Definitions',
+}
+
+
+def _circuit_meta(circuit: Circuit) -> Dict:
+    return {
+        'name': circuit.name,
+        'description': circuit.description,
+        'dimensions': {
+            'x': circuit.dimensions[0],
+            'y': circuit.dimensions[1],
+            'z': circuit.dimensions[2]
+        },
+        'block_count': len(circuit.blocks),
     }
-    
+
+
+def _iter_json_circuit(circuit: Circuit, pad: str) -> Iterator[str]:
+    """Yield a circuit as indent=2 JSON text, one block at a time"""
+    meta = json.dumps(_circuit_meta(circuit), indent=2)[:-2]  # drop closing "\n}"
+    yield textwrap.indent(meta, pad) + ',\n' + pad + '  "blocks": ['
+    block_pad = pad + '    '
+    for i, block in enumerate(circuit.blocks.iter_dicts()):
+        yield ('\n' if i == 0 else ',\n') + textwrap.indent(json.dumps(block, indent=2), block_pad)
+    yield ('\n' + pad + '  ]' if len(circuit.blocks) else ']') + '\n' + pad + '}'
+
+
+def _iter_int_array(values: np.ndarray) -> Iterator[str]:
+    """Yield a flat integer array as compact JSON, in chunks"""
+    yield '['
+    for start in range(0, len(values), JSON_CHUNK_BLOCKS * 3):
+        chunk = values[start:start + JSON_CHUNK_BLOCKS * 3].tolist()
+        yield (',' if start else '') + ','.join(map(str, chunk))
+    yield ']'
+
+
+def _iter_compact_circuit(circuit: Circuit) -> Iterator[str]:
+    """Yield a circuit as compact JSON with flat, palette-indexed columns"""
+    store = circuit.blocks
+    meta = json.dumps(_circuit_meta(circuit), separators=(',', ':'))[:-1]
+    palette = [{'block': block_id, 'properties': props} if props else {'block': block_id}
+               for block_id, props in store.palette]
+    yield meta + ',"palette":' + json.dumps(palette, separators=(',', ':'))
+    yield ',"positions":'
+    yield from _iter_int_array(store.positions.reshape(-1))
+    yield ',"states":'
+    yield from _iter_int_array(store.state_ids)
+    nbt = {str(row): value for row, value in sorted(store.nbt.items())}
+    yield ',"nbt":' + json.dumps(nbt, separators=(',', ':')) + '}'
+
+
+def compact_json(circuit: Circuit) -> str:
+    """One circuit as compact JSON text (read back with Circuit.from_dict)"""
+    return ''.join(_iter_compact_circuit(circuit))
+
+
+def export_to_json(circuits: List[Circuit], filepath: str, compact: bool = False):
+    """
+    Export circuits to JSON format for further processing
+
+    Circuits are streamed block by block rather than built into one nested
+    dict; the default output matches json.dump(indent=2) of the full
+    structure. With compact=True each circuit is written on one line with a
+    palette, flat [x, y, z, ...] positions and per-block palette indices.
+    """
+    header = dict(_FILE_HEADER, format='compact') if compact else _FILE_HEADER
+
     with open(filepath, 'w') as f:
-        json.dump(data, f, indent=2)
+        if compact:
+            f.write(json.dumps(header, separators=(',', ':'))[:-1] + ',"circuits":[')
+            for i, circuit in enumerate(circuits):
+                f.write('\n' if i == 0 else ',\n')
+                for text in _iter_compact_circuit(circuit):
+                    f.write(text)
+            f.write('\n]}' if circuits else ']}')
+        else:
+            f.write(json.dumps(header, indent=2)[:-2] + ',\n  "circuits": [')
+            for i, circuit in enumerate(circuits):
+                f.write('\n' if i == 0 else ',\n')
+                for text in _iter_json_circuit(circuit, '    '):
+                    f.write(text)
+            f.write('\n  ]\n}' if circuits else ']\n}')
     
     print(f"Exported {len(circuits)} circuits to {filepath}")
 
 
-def export_lookup_table(table: List[Dict], filepath: str):
+def export_to_npz(circuits: List[Circuit], filepath: str):
+    """
+    Export circuits to a compressed NumPy archive.
+
+    Each circuit i stores c{i}_positions (int32, n x 3) and c{i}_states
+    (int32 palette indices); names, dimensions, palettes and sparse NBT go
+    in a small JSON 'metadata' string, so loading needs no pickle.
+    """
+    arrays = {}
+    metadata = dict(_FILE_HEADER, circuits=[])
+    for i, circuit in enumerate(circuits):
+        store = circuit.blocks
+        arrays[f'c{i}_positions'] = store.positions
+        arrays[f'c{i}_states'] = store.state_ids
+        meta = _circuit_meta(circuit)
+        meta['palette'] = [{'block': block_id, 'properties': props} if props else {'block': block_id}
+                           for block_id, props in store.palette]
+        meta['nbt'] = {str(row): value for row, value in sorted(store.nbt.items())}
+        metadata['circuits'].append(meta)
+    arrays['metadata'] = np.array(json.dumps(metadata))
+
+    with open(filepath, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+
+    print(f"Exported {len(circuits)} circuits to {filepath}")
+
+
+def load_from_json(filepath: str) -> List[Circuit]:
+    """Load circuits written by export_to_json (full or compact)"""
+    with open(filepath, 'r') as f:
+        data = json.load(f)
+    return [Circuit.from_dict(c) for c in data['circuits']]
+
+
+def load_from_npz(filepath: str) -> List[Circuit]:
+    """Load circuits written by export_to_npz"""
+    with np.load(filepath) as archive:
+        metadata = json.loads(str(archive['metadata']))
+        circuits = []
+        for i, meta in enumerate(metadata['circuits']):
+            meta = dict(meta, positions=archive[f'c{i}_positions'], states=archive[f'c{i}_states'])
+            circuits.append(Circuit.from_dict(meta))
+    return circuits
+
+
+def export_lookup_table(table: List[Dict], filepath: str, max_signal: int = 15):
     """Export phase lookup table to JSON"""
     with open(filepath, 'w') as f:
         json.dump({
             'version': '0.1.0',
             'description': 'Phase Evolution Lookup Table',
-            'max_signal': 15,
+            'max_signal': max_signal,
             'steps': len(table),
             'entries': table
         }, f, indent=2)
@@ -540,10 +1337,51 @@ def export_lookup_table(table: List[Dict], filepath: str):
     print(f"Exported lookup table ({len(table)} entries) to {filepath}")
 
 
-def generate_mcfunction(circuit: Circuit, namespace: str = "quantum") -> str:
+def format_block_state(block_id: str, properties: Optional[Dict] = None) -> str:
+    """Render a block state as used in setblock/fill: id[key=value,...]"""
+    if not properties:
+        return block_id
+    return block_id + "[" + ",".join(f"{k}={v}" for k, v in properties.items()) + "]"
+
+
+# Integer keys that are TAG_Byte in block entity NBT (item Slot and Count)
+NBT_BYTE_KEYS = {'Slot', 'Count'}
+
+
+def to_snbt(value, key: Optional[str] = None) -> str:
+    """
+    Render a JSON-style value (dict/list/str/int/float/bool) as SNBT.
+
+    Integers under NBT_BYTE_KEYS get the b suffix (Count:1b). Values typed
+    with an snbt_suffix attribute (schematic.TagByte/TagShort/TagLong/TagFloat)
+    get b, s, L or f; other ints are TAG_Int and floats TAG_Double.
+    """
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{k}:{to_snbt(v, k)}" for k, v in value.items()) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(to_snbt(v, key) for v in value) + "]"
+    if isinstance(value, bool):
+        return "1b" if value else "0b"
+    if isinstance(value, str):
+        return json.dumps(value)
+    suffix = getattr(type(value), 'snbt_suffix', '')
+    if not suffix and key in NBT_BYTE_KEYS and isinstance(value, int):
+        suffix = 'b'
+    if isinstance(value, float):
+        return f"{value!r}{suffix}"
+    if isinstance(value, int):
+        return f"{int(value)}{suffix}"
+    return str(value)
+
+
+def generate_mcfunction(circuit: Circuit, namespace: str = "quantum",
+                        merge: bool = False) -> str:
     """
     Generate Minecraft function file for placing circuit blocks.
     
+    With merge=True, identical block states are merged into /fill boxes
+    (see plan_fill_commands) and container NBT is included.
+
     Usage in-game: /function quantum:place_<circuit_name>
     """
     lines = [
@@ -551,26 +1389,171 @@ def generate_mcfunction(circuit: Circuit, namespace: str = "quantum") -> str:
         f"# {circuit.description}",
         f"# Dimensions: {circuit.dimensions}",
         f"# Block count: {len(circuit.blocks)}",
-        ""
     ]
+
+    if merge:
+        commands, stats = plan_fill_commands(circuit)
+        lines.append(f"# Commands: {stats.total_commands} "
+                     f"(from {stats.setblock_commands} setblocks, {stats.ratio:.1f}x)")
+        lines.append("")
+        lines.extend(commands)
+        return "\n".join(lines)
+
+    lines.append("")
     
     for block in circuit.blocks:
-        props = ""
-        if block.properties:
-            props = "[" + ",".join(f"{k}={v}" for k, v in block.properties.items()) + "]"
-        
         # Use ~ for relative positioning
-        cmd = f"setblock ~{block.x} ~{block.y} ~{block.z} {block.block_id}{props}"
+        cmd = f"setblock ~{block.x} ~{block.y} ~{block.z} {format_block_state(block.block_id, block.properties)}"
         lines.append(cmd)
     
     return "\n".join(lines)
 
 
+# Largest region a single /fill may touch
+FILL_VOLUME_LIMIT = 32768
+
+
+@dataclass
+class MergeStats:
+    """Command counts before and after /fill merging"""
+    setblock_commands: int  # one per block, as generate_mcfunction() emits
+    fill_commands: int
+    single_commands: int    # setblocks kept for NBT blocks and singletons
+
+    @property
+    def total_commands(self) -> int:
+        return self.fill_commands + self.single_commands
+
+    @property
+    def ratio(self) -> float:
+        """Reduction factor: setblock commands per emitted command"""
+        return self.setblock_commands / self.total_commands if self.total_commands else 1.0
+
+
+def resolve_placement(store: BlockStore) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Collapse repeated positions to the block that is placed last.
+
+    Returns (positions, state_ids, rows) with one entry per occupied voxel.
+    """
+    positions = store.positions.astype(np.int64)
+    if not len(positions):
+        return positions, store.state_ids, np.empty(0, dtype=np.int64)
+    shifted = positions - positions.min(axis=0)
+    extent = shifted.max(axis=0) + 1
+    keys = (shifted[:, 1] * extent[2] + shifted[:, 2]) * extent[0] + shifted[:, 0]
+    # First occurrence in reversed order is the last write in placement order
+    _, reversed_index = np.unique(keys[::-1], return_index=True)
+    rows = len(keys) - 1 - reversed_index
+    return store.positions[rows], store.state_ids[rows], rows
+
+
+def plan_fill_commands(circuit: Circuit, relative: bool = True) -> Tuple[List[str], MergeStats]:
+    """
+    Decompose a circuit into /fill boxes with a 3D greedy merge.
+
+    Voxels are visited in (y, z, x) order; each unvisited voxel grows a box
+    along x, then z, then y while every covered voxel has the same block
+    state and the volume stays within FILL_VOLUME_LIMIT. Boxes of one voxel
+    and blocks carrying NBT are emitted as setblock. Later blocks at a
+    repeated position win, as they would when placed in order. Coordinates
+    are ~relative, or absolute with relative=False.
+
+    Commands run in (y, z, x) order in two passes: structure first, then
+    components that need a supporting block (wire, torches, repeaters...),
+    so nothing is placed before the block it hangs on.
+    """
+
+    t = '~' if relative else ''
+    store = circuit.blocks
+    positions, state_ids, rows = resolve_placement(store)
+    commands: List[Tuple[Tuple[bool, int, int, int], str]] = []
+    fill_count = 0
+    single_count = 0
+
+    if len(positions):
+        origin = positions.min(axis=0)
+        local = positions - origin
+        size_x, size_y, size_z = (local.max(axis=0) + 1).tolist()
+
+        # grid holds palette index + 1; 0 means empty or already covered
+        grid = np.zeros((size_x, size_y, size_z), dtype=np.int32)
+        has_nbt = np.array([int(row) in store.nbt for row in rows], dtype=bool)
+        mergeable = ~has_nbt
+        grid[local[mergeable, 0], local[mergeable, 1], local[mergeable, 2]] = state_ids[mergeable] + 1
+
+        for row, (x, y, z) in zip(rows[has_nbt].tolist(), positions[has_nbt].tolist()):
+            block_id, props = store.palette[store.state_ids[row]]
+            state = format_block_state(block_id, props) + to_snbt(store.nbt[row])
+            commands.append(((block_id in NEEDS_SUPPORT, y, z, x), f"setblock {t}{x} {t}{y} {t}{z} {state}"))
+            single_count += 1
+
+        order = np.lexsort((local[:, 0], local[:, 2], local[:, 1]))
+        for x0, y0, z0 in local[order][mergeable[order]].tolist():
+            value = grid[x0, y0, z0]
+            if value == 0:
+                continue
+
+            x1 = x0 + 1
+            while x1 < size_x and grid[x1, y0, z0] == value and x1 - x0 < FILL_VOLUME_LIMIT:
+                x1 += 1
+            width = x1 - x0
+
+            z1 = z0 + 1
+            while (z1 < size_z and width * (z1 - z0 + 1) <= FILL_VOLUME_LIMIT
+                   and np.all(grid[x0:x1, y0, z1] == value)):
+                z1 += 1
+            area = width * (z1 - z0)
+
+            y1 = y0 + 1
+            while (y1 < size_y and area * (y1 - y0 + 1) <= FILL_VOLUME_LIMIT
+                   and np.all(grid[x0:x1, y1, z0:z1] == value)):
+                y1 += 1
+
+            grid[x0:x1, y0:y1, z0:z1] = 0
+
+            block_id, props = store.palette[value - 1]
+            state = format_block_state(block_id, props)
+            second_pass = block_id in NEEDS_SUPPORT
+            ax, ay, az = (int(v) for v in origin + (x0, y0, z0))
+            if area * (y1 - y0) == 1:
+                commands.append(((second_pass, ay, az, ax), f"setblock {t}{ax} {t}{ay} {t}{az} {state}"))
+                single_count += 1
+            else:
+                bx, by, bz = ax + x1 - x0 - 1, ay + y1 - y0 - 1, az + z1 - z0 - 1
+                commands.append(((second_pass, ay, az, ax),
+                                 f"fill {t}{ax} {t}{ay} {t}{az} {t}{bx} {t}{by} {t}{bz} {state}"))
+                fill_count += 1
+
+    commands.sort(key=lambda item: item[0])
+    stats = MergeStats(len(store), fill_count, single_count)
+    return [cmd for _, cmd in commands], stats
+
+
 # ============================================================================
 # MAIN EXECUTION
 # ============================================================================
 
-def main():
+def main(argv: Optional[List[str]] = None):
+    import argparse
+    from circuit_cache import ArtifactCache, write_if_changed
+    from profiler import StageProfiler
+
+    parser = argparse.ArgumentParser(description="Generate Quantum-Redstone circuits")
+    parser.add_argument('--profile', action='store_true',
+                        help="measure each stage and print a summary")
+    parser.add_argument('--profile-json', metavar='PATH',
+                        help="also write the profile as a JSON report (implies --profile)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="rebuild everything instead of reusing cached circuits and files")
+    parser.add_argument('--cache-dir', metavar='DIR',
+                        help="cache directory (default: $QR_CACHE_DIR or ~/.cache/quantum-redstone)")
+    parser.add_argument('--check', action='store_true',
+                        help="lint the circuits and simulate ALPHA + OMEGA = 15 before writing")
+    args = parser.parse_args(argv)
+    profiler = StageProfiler(enabled=args.profile or bool(args.profile_json))
+    cache = ArtifactCache(args.cache_dir, enabled=not args.no_cache)
+
     print("=" * 60)
     print("Quantum Redstone Circuit Generator v0.1.0")
     print("Hope&&Sauced Collaborative")
@@ -579,7 +1562,9 @@ def main():
     
     # Generate lookup table
     print("Generating phase lookup table...")
-    lookup_table = generate_lookup_table(16)
+    with profiler.stage("lookup_table") as record:
+        lookup_table = generate_lookup_table(16)
+        record.count(entries=len(lookup_table))
     
     # Print table for verification
     print("\nPhase Evolution Lookup Table:")
@@ -599,37 +1584,92 @@ def main():
     
     # Generate circuits
     print("Generating circuits...")
-    circuits = [
-        generate_state_preparation(),
-        generate_pauli_x(),
-        generate_pauli_z(),
-        generate_hadamard(),
-        generate_cnot(),
-        generate_phase_engine(lookup_table),
-        generate_conservation_verifier()
+    # (generator name, build, parameters): the name and parameters key the cache
+    generators = [
+        ('generate_state_preparation', generate_state_preparation, {}),
+        ('generate_pauli_x', generate_pauli_x, {}),
+        ('generate_pauli_z', generate_pauli_z, {}),
+        ('generate_hadamard', generate_hadamard, {}),
+        ('generate_cnot', generate_cnot, {}),
+        ('generate_phase_engine', lambda: generate_phase_engine(lookup_table),
+         {'steps': 16, 'max_signal': 15}),
+        ('generate_conservation_verifier', generate_conservation_verifier, {}),
     ]
+    circuits = []
+    circuit_keys = []
+    for name, generator, params in generators:
+        key = cache.key('circuit', name, **params)
+        with profiler.stage("generate") as record:
+            circuit = cache.circuit(key, generator)
+            record.name = f"generate.{circuit.name}"
+            record.count(blocks=len(circuit.blocks))
+        circuits.append(circuit)
+        circuit_keys.append(key)
     
     for circuit in circuits:
         print(f"  - {circuit.name}: {len(circuit.blocks)} blocks, {circuit.dimensions}")
     
     print()
-    
+
+    # Structural checks (collisions, unsupported components, bounds) and
+    # the ALPHA + OMEGA = 15 simulation, on request
+    if args.check:
+        from circuit_lint import lint_circuit
+        print("Linting circuits...")
+        with profiler.stage("lint") as record:
+            for circuit in circuits:
+                issues = lint_circuit(circuit)
+                record.count(issues=len(issues))
+                kinds = {}
+                for issue in issues:
+                    kinds[issue.kind] = kinds.get(issue.kind, 0) + 1
+                summary = ", ".join(f"{count} {kind}" for kind, count in sorted(kinds.items())) or "OK"
+                print(f"  - {circuit.name}: {summary}")
+
+        from redstone_sim import check_conservation
+        print("Simulating ALPHA + OMEGA = 15...")
+        with profiler.stage("simulate") as record:
+            for circuit in circuits:
+                broken = check_conservation(circuit)
+                if broken is None:
+                    continue
+                record.count(circuits=1, broken_cases=len(broken))
+                summary = f"{len(broken)} input case(s) break conservation" if broken else "OK"
+                print(f"  - {circuit.name}: {summary}")
+        print()
+
     # Export (use current directory on Windows)
     import os
     output_dir = os.path.dirname(os.path.abspath(__file__))
 
-    export_to_json(circuits, os.path.join(output_dir, 'quantum_circuits.json'))
-    export_lookup_table(lookup_table, os.path.join(output_dir, 'phase_lookup_table.json'))
+    circuits_path = os.path.join(output_dir, 'quantum_circuits.json')
+    with profiler.stage("json") as record:
+        key = cache.key('circuits_json', 'export_to_json', circuits=circuit_keys, compact=False)
+        if cache.file(key, circuits_path, lambda path: export_to_json(circuits, path)):
+            print(f"Reused cached circuits: {circuits_path}")
+        record.count(blocks_written=sum(len(c.blocks) for c in circuits))
+        record.wrote(circuits_path)
+    lookup_path = os.path.join(output_dir, 'phase_lookup_table.json')
+    with profiler.stage("lookup_json") as record:
+        key = cache.key('lookup_json', 'export_lookup_table', steps=16, max_signal=15)
+        if cache.file(key, lookup_path, lambda path: export_lookup_table(lookup_table, path)):
+            print(f"Reused cached lookup table: {lookup_path}")
+        record.wrote(lookup_path)
 
     # Generate mcfunction files
     print("\nGenerating mcfunction files...")
     mcfunc_dir = os.path.join(output_dir, 'mcfunctions')
     os.makedirs(mcfunc_dir, exist_ok=True)
-    for circuit in circuits:
-        mcfunc = generate_mcfunction(circuit)
-        filepath = os.path.join(mcfunc_dir, f'place_{circuit.name}.mcfunction')
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(mcfunc)
+    for circuit, circuit_key in zip(circuits, circuit_keys):
+        with profiler.stage(f"mcfunction.{circuit.name}") as record:
+            key = cache.key('mcfunction', 'generate_mcfunction', circuit=circuit_key,
+                            namespace='quantum', merge=False)
+            mcfunc = cache.fetch(key, lambda: generate_mcfunction(circuit).encode('utf-8'))
+            filepath = os.path.join(mcfunc_dir, f'place_{circuit.name}.mcfunction')
+            write_if_changed(filepath, mcfunc)
+            record.count(commands=sum(1 for line in mcfunc.splitlines()
+                                      if line and not line.startswith(b'#')))
+            record.wrote(filepath)
         print(f"  - {filepath}")
     
     print()
@@ -637,6 +1677,13 @@ def main():
     print("Generation complete!")
     print("=" * 60)
 
+    if profiler.enabled:
+        print()
+        print(profiler.summary())
+        if args.profile_json:
+            profiler.write_json(args.profile_json, command="quantum_circuit_generator")
+        profiler.close()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+"""
+Quantum-Redstone Command Line
+One entry point whose subcommands build only the circuits and formats
+they are asked for:
+
+    quantum-redstone generate   [CIRCUIT ...]            circuits JSON
+    quantum-redstone export     [CIRCUIT ...] -f stl     CAD / schematic files
+    quantum-redstone mcfunction [CIRCUIT ...]            placement functions
+    quantum-redstone lookup                              phase lookup table
+    quantum-redstone diff       OLD NEW [CIRCUIT ...]    update functions between snapshots
+    quantum-redstone place      [CIRCUIT ...] --origin   place on a live server over RCON
+    quantum-redstone world      WORLD [CIRCUIT ...]      write circuits into a world save
+    quantum-redstone bench      [benchmark options]      benchmark suite
+
+    quantum-redstone cache      [--clear]                cache statistics
+
+Start-up imports only argparse; NumPy and the generator, exporter,
+schematic and simulator modules are imported by the subcommand that uses
+them, so scripted calls and --help return in milliseconds. Generated
+circuits and rendered files are reused from the circuit_cache on-disk
+cache unless --no-cache is given.
+"""
+
+import sys
+from typing import List, Optional
+
+# Stock circuits and the quantum_circuit_generator function behind each.
+# Kept as names so parsing the command line imports nothing.
+CIRCUITS = {
+    'state_preparation': 'generate_state_preparation',
+    'pauli_x_gate': 'generate_pauli_x',
+    'pauli_z_gate': 'generate_pauli_z',
+    'hadamard_gate': 'generate_hadamard',
+    'cnot_gate': 'generate_cnot',
+    'phase_evolution_engine': 'generate_phase_engine',
+    'conservation_verifier': 'generate_conservation_verifier',
+}
+
+# Circuits whose generator takes the phase lookup table
+LOOKUP_CIRCUITS = {'phase_evolution_engine'}
+
+# Keys of export_cad.EXPORTERS and schematic.SCHEMATIC_EXPORTERS
+CAD_FORMATS = ['dxf', 'stl', 'obj', 'svg']
+SCHEMATIC_FORMATS = ['schem', 'litematic', 'nbt']
+
+
+def circuit_key(cache, name: str, steps: int = 16) -> str:
+    """Cache key of a stock circuit (matches quantum_circuit_generator.main)"""
+    params = {'steps': steps, 'max_signal': 15} if name in LOOKUP_CIRCUITS else {}
+    return cache.key('circuit', CIRCUITS[name], **params)
+
+
+def build_circuits(names: List[str], steps: int = 16, profiler=None, cache=None) -> List:
+    """Generate the named stock circuits in the order given, reusing cached ones"""
+    import quantum_circuit_generator as qcg
+    from circuit_cache import ArtifactCache
+    from profiler import StageProfiler
+
+    profiler = profiler or StageProfiler(enabled=False)
+    cache = cache or ArtifactCache(enabled=False)
+    circuits = []
+    for name in names:
+        generator = getattr(qcg, CIRCUITS[name])
+        if name in LOOKUP_CIRCUITS:
+            build = lambda: generator(qcg.generate_lookup_table(steps))
+        else:
+            build = generator
+        with profiler.stage(f"generate.{name}") as record:
+            circuit = cache.circuit(circuit_key(cache, name, steps), build)
+            record.count(blocks=len(circuit.blocks))
+        circuits.append(circuit)
+    return circuits
+
+
+def load_input(path: str, names: List[str]) -> List:
+    """Circuits from a JSON/.npz circuits file or a schematic, optionally filtered by name"""
+    from circuit_diff import load_snapshot
+
+    circuits = list(load_snapshot(path).values())
+    if names:
+        missing = set(names) - {c.name for c in circuits}
+        if missing:
+            raise ValueError(f"{path} has no circuit(s): {', '.join(sorted(missing))}")
+        circuits = [c for c in circuits if c.name in names]
+    return circuits
+
+
+def _circuits(args, profiler=None, cache=None) -> List:
+    if getattr(args, 'input', None):
+        return load_input(args.input, args.circuits)
+    return build_circuits(args.circuits or list(CIRCUITS), args.steps, profiler, cache)
+
+
+def _cache(args):
+    from circuit_cache import ArtifactCache
+    return ArtifactCache(args.cache_dir, max_bytes=int(args.cache_size * 1024 * 1024),
+                         enabled=not args.no_cache)
+
+
+def _profiler(args):
+    from profiler import StageProfiler
+    return StageProfiler(enabled=args.profile or bool(args.profile_json))
+
+
+def _finish_profile(profiler, args):
+    if profiler.enabled:
+        print()
+        print(profiler.summary())
+        if args.profile_json:
+            profiler.write_json(args.profile_json, command=f"quantum-redstone {args.command}")
+        profiler.close()
+
+
+# ============================================================================
+# SUBCOMMANDS
+# ============================================================================
+
+def cmd_generate(args) -> int:
+    import os
+    from circuit_cache import write_if_changed
+    from quantum_circuit_generator import export_to_json, export_to_npz
+
+    profiler = _profiler(args)
+    cache = _cache(args)
+    names = args.circuits or list(CIRCUITS)
+    keys = [circuit_key(cache, name, args.steps) for name in names]
+    if args.output.endswith('.npz'):
+        key = cache.key('circuits_npz', 'export_to_npz', circuits=keys)
+    else:
+        key = cache.key('circuits_json', 'export_to_json', circuits=keys, compact=args.compact)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+
+    # A cached rendering of the same circuits needs no generation at all
+    if not args.check:
+        data = cache.get(key)
+        if data is not None:
+            write_if_changed(args.output, data)
+            print(f"Reused cached circuits: {args.output}")
+            return 0
+
+    circuits = build_circuits(names, args.steps, profiler, cache)
+    for circuit in circuits:
+        print(f"  - {circuit.name}: {len(circuit.blocks)} blocks, {circuit.dimensions}")
+
+    if args.check:
+        from circuit_lint import lint_circuit
+        from redstone_sim import check_conservation
+        with profiler.stage("check") as record:
+            for circuit in circuits:
+                issues = lint_circuit(circuit)
+                broken = check_conservation(circuit)
+                record.count(issues=len(issues), broken_cases=len(broken or []))
+                summary = f"{len(issues)} lint issue(s)" if issues else "lint OK"
+                if broken is not None:
+                    summary += f", {len(broken)} conservation break(s)" if broken else ", conservation OK"
+                print(f"  - {circuit.name}: {summary}")
+
+    with profiler.stage("write") as record:
+        if args.output.endswith('.npz'):
+            cache.file(key, args.output, lambda path: export_to_npz(circuits, path))
+        else:
+            cache.file(key, args.output, lambda path: export_to_json(circuits, path, compact=args.compact))
+        record.wrote(args.output)
+    _finish_profile(profiler, args)
+    return 0
+
+
+def cmd_export(args) -> int:
+    import os
+
+    formats = args.format or CAD_FORMATS
+    profiler = _profiler(args)
+    circuits = _circuits(args, profiler, _cache(args))
+    os.makedirs(args.output, exist_ok=True)
+
+    schematic_formats = [fmt for fmt in formats if fmt in SCHEMATIC_FORMATS]
+    if schematic_formats:
+        from schematic import export_schematic
+        for circuit in circuits:
+            for fmt in schematic_formats:
+                path = os.path.join(args.output, f"{circuit.name}.{fmt}")
+                with profiler.stage(f"{circuit.name}.{fmt}") as record:
+                    export_schematic(circuit, path)
+                    record.wrote(path)
+
+    cad_formats = [fmt for fmt in formats if fmt in CAD_FORMATS]
+    if cad_formats:
+        from export_cad import circuit_data, export_circuits
+        export_circuits([circuit_data(c) for c in circuits], args.output, cad_formats,
+                        jobs=args.jobs, force=args.force, profiler=profiler)
+    _finish_profile(profiler, args)
+    return 0
+
+
+def cmd_mcfunction(args) -> int:
+    import os
+    from circuit_cache import write_if_changed
+    from quantum_circuit_generator import generate_mcfunction
+
+    os.makedirs(args.output, exist_ok=True)
+
+    if args.origin:
+        from chunk_planner import plan_chunked_placement
+        for circuit in _circuits(args, cache=_cache(args)):
+            plan_chunked_placement(circuit, tuple(args.origin), args.budget).write(args.output, args.namespace)
+        return 0
+
+    def write(name: str, text: bytes):
+        path = os.path.join(args.output, f'place_{name}.mcfunction')
+        write_if_changed(path, text)
+        print(f"Exported mcfunction: {path}")
+
+    if args.input:
+        for circuit in load_input(args.input, args.circuits):
+            text = generate_mcfunction(circuit, args.namespace, merge=args.merge)
+            write(circuit.name, text.encode('utf-8'))
+        return 0
+
+    # Stock circuits: a cached rendering skips generating the circuit
+    cache = _cache(args)
+    for name in args.circuits or list(CIRCUITS):
+        source = circuit_key(cache, name, args.steps)
+        key = cache.key('mcfunction', 'generate_mcfunction', circuit=source,
+                        namespace=args.namespace, merge=args.merge)
+        text = cache.get(key)
+        if text is None:
+            circuit = build_circuits([name], args.steps, cache=cache)[0]
+            text = generate_mcfunction(circuit, args.namespace, merge=args.merge).encode('utf-8')
+            cache.put(key, text)
+        write(name, text)
+    return 0
+
+
+def cmd_lookup(args) -> int:
+    from quantum_circuit_generator import export_lookup_table, generate_lookup_table
+
+    table = generate_lookup_table(args.steps, args.max_signal)
+    if args.print:
+        print(f"{'Step':>4} {'phi':>10} {'ALPHA':>6} {'OMEGA':>6}")
+        for entry in table:
+            print(f"{entry['step']:>4} {entry['phi_fraction']:>10} {entry['alpha']:>6} {entry['omega']:>6}")
+    if args.output != '-':
+        cache = _cache(args)
+        key = cache.key('lookup_json', 'export_lookup_table', steps=args.steps, max_signal=args.max_signal)
+        if cache.file(key, args.output, lambda path: export_lookup_table(table, path, args.max_signal)):
+            print(f"Reused cached lookup table: {args.output}")
+    return 0
+
+
+def cmd_diff(args) -> int:
+    import os
+    from circuit_diff import diff_snapshots, generate_diff_mcfunction
+
+    os.makedirs(args.output, exist_ok=True)
+    origin = tuple(args.origin) if args.origin else None
+    for diff in diff_snapshots(args.old, args.new):
+        if args.circuits and diff.name not in args.circuits:
+            continue
+        print(f"  - {diff.summary()}")
+        if diff.is_empty:
+            continue
+        path = os.path.join(args.output, f'update_{diff.name}.mcfunction')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(generate_diff_mcfunction(diff, origin))
+        print(f"Exported mcfunction: {path}")
+    return 0
+
+
+def cmd_place(args) -> int:
+    import asyncio
+    from rcon_client import MockRconServer, RconError, RconPool, place_circuit
+
+    circuits = _circuits(args, cache=_cache(args))
+
+    async def place() -> int:
+        mock = None
+        host, port = args.host, args.port
+        if args.mock:
+            mock = MockRconServer(args.password)
+            host, port = '127.0.0.1', await mock.start()
+        failed = 0
+        try:
+            async with RconPool(host, port, args.password, connections=args.connections,
+                                window=args.window, batch_size=args.batch) as pool:
+                x, y, z = args.origin
+                for circuit in circuits:
+                    failed += await place_circuit(pool, circuit, (x, y, z))
+                    print(f"Placed {circuit.name} at {x} {y} {z}")
+                    x += circuit.dimensions[0] + args.spacing
+            print(f"  {pool.metrics.summary()}")
+        finally:
+            if mock is not None:
+                print(f"  mock server: {len(mock.blocks)} blocks set by {len(mock.commands)} commands")
+                await mock.close()
+        return failed
+
+    try:
+        failed = asyncio.run(place())
+    except RconError as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+    if failed:
+        print(f"Error: {failed} commands failed", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_world(args) -> int:
+    from region_writer import stamp_world
+
+    circuits = _circuits(args, cache=_cache(args))
+    depth = max((circuit.dimensions[2] for circuit in circuits), default=0) + args.spacing
+    placements = []
+    x0, y, z = args.origin
+    for row in range(args.rows):
+        x = x0
+        for circuit in circuits:
+            placements.append((circuit, (x, y, z + row * depth)))
+            x += circuit.dimensions[0] + args.spacing
+    stamp_world(args.world, placements, source=args.source)
+    return 0
+
+
+def cmd_cache(args) -> int:
+    cache = _cache(args)
+    if args.clear:
+        print(f"Removed {cache.clear()} cache entries from {cache.directory}")
+        return 0
+    stats = cache.stats()
+    print(f"Cache: {stats['directory']}")
+    print(f"  {stats['entries']} entries, {stats['bytes'] / 1024 / 1024:.1f} MB "
+          f"of {stats['max_bytes'] / 1024 / 1024:.1f} MB")
+    return 0
+
+
+def cmd_bench(args) -> int:
+    from benchmarks import main as bench_main
+    return bench_main(args.bench_args)
+
+
+# ============================================================================
+# ARGUMENTS
+# ============================================================================
+
+def _add_circuit_args(parser, allow_input: bool = True):
+    parser.add_argument('circuits', nargs='*', metavar='CIRCUIT',
+                        help=f"circuits to build (default: all). One of: {', '.join(CIRCUITS)}")
+    parser.add_argument('--steps', type=int, default=16,
+                        help="phase steps for the phase evolution engine (default: 16)")
+    if allow_input:
+        parser.add_argument('--input', '-i', metavar='FILE',
+                            help="read circuits from a JSON/.npz circuits file or a "
+                                 ".schem/.litematic/.nbt schematic instead of generating")
+
+
+def _add_cache_args(parser):
+    parser.add_argument('--no-cache', action='store_true',
+                        help="rebuild instead of reusing cached circuits and files")
+    parser.add_argument('--cache-dir', metavar='DIR',
+                        help="cache directory (default: $QR_CACHE_DIR or ~/.cache/quantum-redstone)")
+    parser.add_argument('--cache-size', type=float, default=256, metavar='MB',
+                        help="evict least recently used entries beyond this size (default: 256)")
+
+
+def _add_profile_args(parser):
+    parser.add_argument('--profile', action='store_true',
+                        help="measure each stage and print a summary")
+    parser.add_argument('--profile-json', metavar='PATH',
+                        help="also write the profile as a JSON report (implies --profile)")
+
+
+def build_parser():
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(prog='quantum-redstone',
+                                     description="Quantum-Redstone circuit tools")
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND', required=True)
+
+    generate = commands.add_parser('generate', help="write circuits as JSON or .npz")
+    _add_circuit_args(generate, allow_input=False)
+    generate.add_argument('--output', '-o', default='quantum_circuits.json',
+                          help="output file; a .npz suffix writes a NumPy archive")
+    generate.add_argument('--compact', action='store_true', help="compact columnar JSON")
+    generate.add_argument('--check', action='store_true',
+                          help="lint and simulate the circuits before writing")
+    _add_profile_args(generate)
+    _add_cache_args(generate)
+    generate.set_defaults(handler=cmd_generate)
+
+    export = commands.add_parser('export', help="write CAD and schematic files")
+    _add_circuit_args(export)
+    export.add_argument('--format', '-f', action='append', choices=CAD_FORMATS + SCHEMATIC_FORMATS,
+                        help="output format, repeatable (default: all CAD formats)")
+    export.add_argument('--output', '-o', default='cad_exports', help="output directory")
+    export.add_argument('--jobs', '-j', type=int, default=None,
+                        help="worker processes for CAD export (default: all cores, 1 = serial)")
+    export.add_argument('--force', action='store_true',
+                        help="re-export outputs the manifest marks as up to date")
+    _add_profile_args(export)
+    _add_cache_args(export)
+    export.set_defaults(handler=cmd_export)
+
+    mcfunction = commands.add_parser('mcfunction', help="write placement mcfunction files")
+    _add_circuit_args(mcfunction)
+    mcfunction.add_argument('--output', '-o', default='mcfunctions', help="output directory")
+    mcfunction.add_argument('--namespace', default='quantum', help="datapack namespace")
+    mcfunction.add_argument('--merge', action='store_true',
+                            help="merge identical blocks into /fill commands and include NBT")
+    mcfunction.add_argument('--origin', type=int, nargs=3, metavar=('X', 'Y', 'Z'),
+                            help="place at this absolute position as per-chunk functions with "
+                                 "forceload scheduling (run <namespace>:place_<circuit>/start)")
+    mcfunction.add_argument('--budget', type=int, default=512, metavar='N',
+                            help="commands per tick for --origin placement (default: 512)")
+    _add_cache_args(mcfunction)
+    mcfunction.set_defaults(handler=cmd_mcfunction)
+
+    lookup = commands.add_parser('lookup', help="write the phase lookup table")
+    lookup.add_argument('--steps', type=int, default=16, help="phase steps (default: 16)")
+    lookup.add_argument('--max-signal', type=int, default=15, help="signal strength of ALPHA + OMEGA")
+    lookup.add_argument('--output', '-o', default='phase_lookup_table.json',
+                        help="output file ('-' to only print)")
+    lookup.add_argument('--print', action='store_true', help="print the table")
+    _add_cache_args(lookup)
+    lookup.set_defaults(handler=cmd_lookup)
+
+    diff = commands.add_parser('diff', help="write update functions between two circuit snapshots")
+    diff.add_argument('old', help="circuits JSON/.npz or schematic the build was placed from")
+    diff.add_argument('new', help="circuits JSON/.npz or schematic to update it to")
+    diff.add_argument('circuits', nargs='*', metavar='CIRCUIT', help="circuits to diff (default: all)")
+    diff.add_argument('--output', '-o', default='mcfunctions', help="output directory")
+    diff.add_argument('--origin', type=int, nargs=3, metavar=('X', 'Y', 'Z'),
+                      help="absolute build origin (default: ~relative, run where place_<circuit> ran)")
+    diff.set_defaults(handler=cmd_diff)
+
+    place = commands.add_parser('place', help="place circuits on a running server over RCON")
+    _add_circuit_args(place)
+    place.add_argument('--origin', type=int, nargs=3, metavar=('X', 'Y', 'Z'), required=True,
+                       help="absolute position of the first circuit; further circuits follow along +x")
+    place.add_argument('--spacing', type=int, default=4, help="gap between circuits (default: 4)")
+    place.add_argument('--host', default='localhost', help="server address (default: localhost)")
+    place.add_argument('--port', type=int, default=25575, help="RCON port (default: 25575)")
+    place.add_argument('--password', default=os.environ.get('QR_RCON_PASSWORD', ''),
+                       help="RCON password (default: $QR_RCON_PASSWORD)")
+    place.add_argument('--connections', type=int, default=2, help="RCON connections (default: 2)")
+    place.add_argument('--window', type=int, default=64,
+                       help="commands awaiting replies per connection (default: 64)")
+    place.add_argument('--batch', type=int, default=32,
+                       help="commands coalesced into one write (default: 32)")
+    place.add_argument('--mock', action='store_true',
+                       help="place into an in-process mock server instead (dry run)")
+    _add_cache_args(place)
+    place.set_defaults(handler=cmd_place)
+
+    world = commands.add_parser('world', help="write circuits into a world save's region files")
+    world.add_argument('world', help="world directory (created as a superflat world if missing)")
+    _add_circuit_args(world)
+    world.add_argument('--from', dest='source', metavar='WORLD',
+                       help="copy this world to WORLD first and write into the copy")
+    world.add_argument('--origin', type=int, nargs=3, metavar=('X', 'Y', 'Z'), default=[0, -60, 0],
+                       help="position of the first circuit (default: 0 -60 0, on superflat ground)")
+    world.add_argument('--spacing', type=int, default=4, help="gap between circuits (default: 4)")
+    world.add_argument('--rows', type=int, default=1,
+                       help="repeat the row of circuits this many times along +z (default: 1)")
+    _add_cache_args(world)
+    world.set_defaults(handler=cmd_world)
+
+    cache = commands.add_parser('cache', help="show or clear the on-disk cache")
+    cache.add_argument('--clear', action='store_true', help="delete every cache entry")
+    _add_cache_args(cache)
+    cache.set_defaults(handler=cmd_cache)
+
+    bench = commands.add_parser('bench', add_help=False,
+                                help="run the benchmark suite (options as for benchmarks.py)")
+    bench.set_defaults(handler=cmd_bench)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == 'bench':
+        args.bench_args = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    if getattr(args, 'circuits', None) and not getattr(args, 'input', None) and args.command != 'diff':
+        unknown = [name for name in args.circuits if name not in CIRCUITS]
+        if unknown:
+            parser.error(f"unknown circuit(s): {', '.join(unknown)} (choose from {', '.join(CIRCUITS)})")
+    try:
+        return args.handler(args)
+    except (ValueError, OSError) as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
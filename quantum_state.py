@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+State-Vector Reference Simulator for Quantum-Redstone Gates
+Applies the gates this project builds in redstone (X, Z, H, CNOT and
+phase rotation) to n-qubit registers, and converts the result to the
+ALPHA/OMEGA signal encoding so redstone circuits can be checked against
+ground truth.
+
+States are stored as (batch, 2**n) complex arrays and gates are applied
+in place on strided views of the (batch, 2, ..., 2) tensor, so registers
+of 20+ qubits fit comfortably in memory.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Optional, Iterable, Union
+
+import numpy as np
+
+from quantum_circuit_generator import phase_to_signals
+
+SQRT_HALF = 1 / math.sqrt(2)
+
+# ============================================================================
+# GATES
+# ============================================================================
+
+PAULI_X = np.array([[0, 1], [1, 0]], dtype=np.complex128)
+PAULI_Z = np.array([[1, 0], [0, -1]], dtype=np.complex128)
+HADAMARD = np.array([[SQRT_HALF, SQRT_HALF], [SQRT_HALF, -SQRT_HALF]], dtype=np.complex128)
+IDENTITY = np.eye(2, dtype=np.complex128)
+
+SINGLE_QUBIT_GATES = {'x': PAULI_X, 'z': PAULI_Z, 'h': HADAMARD}
+
+# Control is qubit 0 (the most significant bit of the basis index)
+CNOT = np.array([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, 1], [0, 0, 1, 0]], dtype=np.complex128)
+
+TWO_QUBIT_GATES = {'cnot': CNOT, 'cx': CNOT}
+
+
+def phase_gate(theta: float) -> np.ndarray:
+    """Phase rotation diag(1, e^(i*theta))"""
+    return np.array([[1, 0], [0, np.exp(1j * theta)]], dtype=np.complex128)
+
+
+@dataclass
+class Gate:
+    """One gate of a program: 'x', 'z', 'h', 'phase' (with theta) or 'cnot'"""
+    name: str
+    qubits: Tuple[int, ...]
+    theta: float = 0.0
+
+    def matrix(self) -> np.ndarray:
+        if self.name == 'phase':
+            return phase_gate(self.theta)
+        return SINGLE_QUBIT_GATES[self.name]
+
+
+GateSpec = Union[Gate, Tuple]
+
+
+def parse_gate(spec: GateSpec) -> Gate:
+    """Accept a Gate or a tuple like ('h', 0), ('phase', 0, theta), ('cnot', 0, 1)"""
+    if isinstance(spec, Gate):
+        return spec
+    name = spec[0].lower()
+    if name in SINGLE_QUBIT_GATES:
+        return Gate(name, (int(spec[1]),))
+    if name == 'phase':
+        return Gate(name, (int(spec[1]),), float(spec[2]))
+    if name in ('cnot', 'cx'):
+        control, target = int(spec[1]), int(spec[2])
+        if control == target:
+            raise ValueError(f"CNOT control and target must differ, got {control}")
+        return Gate('cnot', (control, target))
+    raise ValueError(f"Unknown gate '{spec[0]}'")
+
+
+def fuse_gates(gates: Iterable[GateSpec]) -> List[Tuple]:
+    """
+    Compile a gate list into ('u', qubit, matrix) and ('cnot', control,
+    target) operations, multiplying runs of single-qubit gates on the same
+    qubit into one 2x2 matrix. A run ends when a CNOT touches its qubit.
+    """
+    ops: List[Tuple] = []
+    pending: Dict[int, np.ndarray] = {}
+
+    def flush(qubit: int):
+        matrix = pending.pop(qubit, None)
+        if matrix is not None and not np.allclose(matrix, IDENTITY):
+            ops.append(('u', qubit, matrix))
+
+    for spec in gates:
+        gate = parse_gate(spec)
+        if gate.name == 'cnot':
+            for qubit in gate.qubits:
+                flush(qubit)
+            ops.append(('cnot',) + gate.qubits)
+        else:
+            qubit = gate.qubits[0]
+            pending[qubit] = gate.matrix() @ pending.get(qubit, IDENTITY)
+    for qubit in sorted(pending):
+        flush(qubit)
+    return ops
+
+
+# ============================================================================
+# STATE VECTOR
+# ============================================================================
+
+class StateVector:
+    """
+    A batch of n-qubit states. Qubit 0 is the most significant bit of the
+    basis index, so amplitudes[b, i] belongs to basis state |i> with qubit
+    0 leftmost.
+    """
+
+    def __init__(self, n_qubits: int, batch: int = 1, amplitudes: Optional[np.ndarray] = None):
+        if n_qubits < 1:
+            raise ValueError(f"n_qubits must be >= 1, got {n_qubits}")
+        self.n_qubits = n_qubits
+        if amplitudes is None:
+            amplitudes = np.zeros((batch, 1 << n_qubits), dtype=np.complex128)
+            amplitudes[:, 0] = 1
+        amplitudes = np.ascontiguousarray(amplitudes, dtype=np.complex128)
+        if amplitudes.ndim == 1:
+            amplitudes = amplitudes[None, :]
+        if amplitudes.shape[1] != 1 << n_qubits:
+            raise ValueError(f"expected {1 << n_qubits} amplitudes per state, got {amplitudes.shape[1]}")
+        self.amplitudes = amplitudes
+
+    @property
+    def batch(self) -> int:
+        return self.amplitudes.shape[0]
+
+    @classmethod
+    def from_signals(cls, alphas: np.ndarray, max_signal: int = 15) -> 'StateVector':
+        """
+        Product states with qubit k prepared so that cos^2(phi) = ALPHA / max_signal.
+        alphas has shape (batch, n_qubits).
+        """
+        alphas = np.atleast_2d(np.asarray(alphas, dtype=np.float64))
+        p0 = alphas / max_signal
+        if p0.min() < 0 or p0.max() > 1:
+            raise ValueError(f"ALPHA levels must lie in 0-{max_signal}")
+        qubit = np.stack([np.sqrt(p0), np.sqrt(1 - p0)], axis=-1).astype(np.complex128)
+        amplitudes = qubit[:, 0]
+        for k in range(1, alphas.shape[1]):
+            amplitudes = (amplitudes[:, :, None] * qubit[:, k, None, :]).reshape(len(alphas), -1)
+        return cls(alphas.shape[1], amplitudes=amplitudes)
+
+    def tensor(self) -> np.ndarray:
+        """View of the amplitudes as a (batch, 2, ..., 2) tensor"""
+        return self.amplitudes.reshape((self.batch,) + (2,) * self.n_qubits)
+
+    def _halves(self, psi: np.ndarray, axis: int) -> Tuple[np.ndarray, np.ndarray]:
+        index = [slice(None)] * psi.ndim
+        index[axis] = 0
+        a0 = psi[tuple(index)]
+        index[axis] = 1
+        return a0, psi[tuple(index)]
+
+    def _check_qubit(self, qubit: int):
+        if not 0 <= qubit < self.n_qubits:
+            raise ValueError(f"qubit {qubit} out of range for {self.n_qubits} qubits")
+
+    def apply_matrix(self, qubit: int, matrix: np.ndarray):
+        """Apply a 2x2 unitary to one qubit in place"""
+        self._check_qubit(qubit)
+        a0, a1 = self._halves(self.tensor(), 1 + qubit)
+        (m00, m01), (m10, m11) = matrix.tolist()
+        if m01 == 0 and m10 == 0:
+            if m00 != 1:
+                a0 *= m00
+            if m11 != 1:
+                a1 *= m11
+        elif m00 == 0 and m11 == 0:
+            saved = a0.copy()
+            np.multiply(a1, m01, out=a0)
+            np.multiply(saved, m10, out=a1)
+        else:
+            saved = a0.copy()
+            a0 *= m00
+            a0 += m01 * a1
+            a1 *= m11
+            a1 += m10 * saved
+
+    def apply_cnot(self, control: int, target: int):
+        """Flip the target qubit in place wherever the control qubit is |1>"""
+        self._check_qubit(control)
+        self._check_qubit(target)
+        _, controlled = self._halves(self.tensor(), 1 + control)
+        axis = 1 + target - (1 if control < target else 0)
+        t0, t1 = self._halves(controlled, axis)
+        saved = t0.copy()
+        t0[...] = t1
+        t1[...] = saved
+
+    def run(self, gates: Iterable[GateSpec], fuse: bool = True) -> 'StateVector':
+        """Apply a gate list in place (fusing single-qubit runs) and return self"""
+        ops = fuse_gates(gates) if fuse else [
+            ('cnot',) + g.qubits if g.name == 'cnot' else ('u', g.qubits[0], g.matrix())
+            for g in map(parse_gate, gates)]
+        for op in ops:
+            if op[0] == 'cnot':
+                self.apply_cnot(op[1], op[2])
+            else:
+                self.apply_matrix(op[1], op[2])
+        return self
+
+    def probability_zero(self, qubit: int) -> np.ndarray:
+        """P(qubit = |0>) for every state in the batch"""
+        self._check_qubit(qubit)
+        a0, _ = self._halves(self.tensor(), 1 + qubit)
+        weights = np.abs(a0.reshape(self.batch, -1)) ** 2
+        return weights.sum(axis=1)
+
+    def signals(self, qubit: int, max_signal: int = 15) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        ALPHA/OMEGA levels of one qubit: phase_to_signals() of the angle phi
+        with cos^2(phi) = P(|0>).
+        """
+        p0 = np.clip(self.probability_zero(qubit), 0.0, 1.0)
+        pairs = [phase_to_signals(math.acos(math.sqrt(p)), max_signal) for p in p0.tolist()]
+        levels = np.array(pairs, dtype=np.int16).reshape(-1, 2)
+        return levels[:, 0], levels[:, 1]
+
+
+def simulate(gates: Iterable[GateSpec], n_qubits: int, batch: int = 1, fuse: bool = True) -> StateVector:
+    """Run a gate list on |0...0> (repeated batch times)"""
+    return StateVector(n_qubits, batch).run(gates, fuse)
+
+
+# ============================================================================
+# REDSTONE CROSS-CHECK
+# ============================================================================
+
+# Gate programs of the generated circuits. Qubits are named by the prefix of
+# their ALPHA/OMEGA rails in redstone_sim.GATE_PORTS ('' for the target).
+REFERENCE_PROGRAMS: Dict[str, Dict] = {
+    'pauli_x_gate': {'qubits': [''], 'gates': [('x', 0)]},
+    'pauli_z_gate': {'qubits': [''], 'gates': [('z', 0)]},
+    'hadamard_gate': {'qubits': [''], 'gates': [('h', 0)]},
+    'cnot_gate': {'qubits': ['control_', ''], 'gates': [('cnot', 0, 1)]},
+}
+
+
+def reference_mismatches(table, max_signal: int = 15) -> np.ndarray:
+    """
+    Compare a redstone_sim.TransferTable with the state-vector result of
+    the same gate. Returns a grid mask of entries whose inputs are valid
+    (ALPHA + OMEGA = max_signal on every qubit) but whose ALPHA/OMEGA
+    outputs differ from the reference.
+    """
+    program = REFERENCE_PROGRAMS.get(table.circuit)
+    if program is None:
+        raise KeyError(f"No reference program for circuit '{table.circuit}'")
+    grid = table.values.shape[:-1]
+    mesh = np.meshgrid(*table.levels, indexing='ij')
+    mesh = dict(zip(table.inputs, (m.reshape(-1) for m in mesh)))
+
+    valid = np.ones(int(np.prod(grid, dtype=np.int64)), dtype=bool)
+    alphas = []
+    for prefix in program['qubits']:
+        alpha, omega = mesh[prefix + 'alpha'], mesh[prefix + 'omega']
+        valid &= alpha + omega == max_signal
+        alphas.append(alpha)
+    alphas = np.stack(alphas, axis=1)
+
+    mismatch = np.zeros(len(valid), dtype=bool)
+    rows = np.flatnonzero(valid)
+    if len(rows):
+        state = StateVector.from_signals(alphas[rows], max_signal).run(program['gates'])
+        values = table.values.reshape(len(valid), -1)
+        for k, prefix in enumerate(program['qubits']):
+            if prefix + 'alpha' not in table.outputs:
+                continue
+            alpha, omega = state.signals(k, max_signal)
+            got_alpha = values[rows, table.outputs.index(prefix + 'alpha')]
+            got_omega = values[rows, table.outputs.index(prefix + 'omega')]
+            mismatch[rows] |= (got_alpha != alpha) | (got_omega != omega)
+    return mismatch.reshape(grid)
@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+"""
+Async RCON Placement for Quantum-Redstone Circuits
+Streams the placement commands for a Circuit to a running server over
+RCON, so a build can be updated live without copying a datapack and
+running /reload.
+
+- RconPool keeps a few authenticated connections. Each pipelines up to
+  `window` commands at a time, and each batch of packets goes out in a
+  single socket write.
+- submit() blocks once `queue_size` commands are outstanding, so
+  producers slow to the server's pace (backpressure).
+- Timeouts, dropped connections and "not loaded" replies are retried
+  with exponential backoff on a fresh connection. setblock and fill are
+  idempotent, so a resend is safe.
+- RconMetrics records throughput, latency percentiles, retries and bytes.
+- place_circuit() places a circuit chunk by chunk using chunk_planner.
+  Each chunk is force-loaded a few visits ahead and released once its
+  commands are acknowledged.
+
+MockRconServer speaks the same protocol and applies setblock, fill and
+forceload to an in-memory world, so all of this runs offline.
+"""
+
+import asyncio
+import statistics
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple, Optional, Set, Iterable
+
+PACKET_RESPONSE = 0
+PACKET_COMMAND = 2
+PACKET_AUTH_RESPONSE = 2
+PACKET_AUTH = 3
+
+# Largest command body a Minecraft server accepts in one packet
+MAX_COMMAND_BYTES = 1446
+
+DEFAULT_PORT = 25575
+
+# Replies that mean "try again later" rather than a failed command
+RETRY_REPLIES = ("not loaded",)
+
+
+class RconError(Exception):
+    """Authentication failure or a command that failed after every retry"""
+
+
+def encode_packet(request_id: int, kind: int, body: str) -> bytes:
+    """Length-prefixed little-endian RCON packet"""
+    payload = struct.pack('<ii', request_id, kind) + body.encode('utf-8') + b'\x00\x00'
+    return struct.pack('<i', len(payload)) + payload
+
+
+async def read_packet(reader: asyncio.StreamReader) -> Tuple[int, int, str]:
+    """Read one packet; returns (request_id, kind, body)"""
+    (length,) = struct.unpack('<i', await reader.readexactly(4))
+    if not 10 <= length <= 1 << 20:
+        raise ConnectionError(f"malformed RCON packet length {length}")
+    data = await reader.readexactly(length)
+    request_id, kind = struct.unpack('<ii', data[:8])
+    return request_id, kind, data[8:-2].decode('utf-8', errors='replace')
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+@dataclass
+class RconMetrics:
+    """Delivery counters and per-command latencies (seconds)"""
+    commands: int = 0
+    batches: int = 0
+    retries: int = 0
+    failures: int = 0
+    reconnects: int = 0
+    bytes_sent: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    finished: Optional[float] = None
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Acknowledged commands per second"""
+        return self.commands / self.elapsed if self.elapsed > 0 else 0.0
+
+    def percentile(self, p: float) -> float:
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else 0.0
+        return statistics.quantiles(self.latencies, n=100, method='inclusive')[int(p) - 1]
+
+    def summary(self) -> str:
+        return (f"{self.commands} commands in {self.elapsed:.2f} s ({self.throughput:,.0f}/s), "
+                f"{self.batches} batches, latency p50 {self.percentile(50) * 1000:.1f} ms "
+                f"p95 {self.percentile(95) * 1000:.1f} ms p99 {self.percentile(99) * 1000:.1f} ms, "
+                f"{self.retries} retries, {self.reconnects} reconnects, {self.failures} failed, "
+                f"{self.bytes_sent / 1024:.0f} KB sent")
+
+
+# ============================================================================
+# CONNECTION POOL
+# ============================================================================
+
+class _Pending:
+    """A submitted command and the future its reply resolves"""
+    __slots__ = ('command', 'future', 'attempts', 'sent')
+
+    def __init__(self, command: str, future: asyncio.Future):
+        self.command = command
+        self.future = future
+        self.attempts = 0
+        self.sent = 0.0
+
+
+class RconConnection:
+    """One authenticated connection; replies are matched to requests by id"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, window: int):
+        self.reader = reader
+        self.writer = writer
+        self.window = asyncio.Semaphore(window)
+        self.closed = False
+        self._next_id = 0
+        self._replies: Dict[int, asyncio.Future] = {}
+        self._reader_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def open(cls, host: str, port: int, password: str, window: int,
+                   timeout: float) -> 'RconConnection':
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        connection = cls(reader, writer, window)
+        try:
+            writer.write(encode_packet(0, PACKET_AUTH, password))
+            await writer.drain()
+            while True:
+                request_id, kind, _ = await asyncio.wait_for(read_packet(reader), timeout)
+                if kind == PACKET_AUTH_RESPONSE:
+                    break
+            if request_id == -1:
+                raise RconError(f"RCON authentication failed for {host}:{port}")
+        except BaseException:
+            writer.close()
+            raise
+        connection._reader_task = asyncio.create_task(connection._read_replies())
+        return connection
+
+    async def _read_replies(self):
+        try:
+            while True:
+                request_id, _, body = await read_packet(self.reader)
+                future = self._replies.pop(request_id, None)
+                if future is not None and not future.done():
+                    future.set_result(body)
+        except (asyncio.IncompleteReadError, ConnectionError, OSError) as error:
+            self._fail(ConnectionError(f"RCON connection lost: {error}"))
+
+    def _fail(self, error: Exception):
+        self.closed = True
+        for future in self._replies.values():
+            if not future.done():
+                future.set_exception(error)
+        self._replies.clear()
+        self.writer.close()
+
+    async def send(self, commands: List[str]) -> List[asyncio.Future]:
+        """Write a batch of commands in one write; returns a reply future per command"""
+        loop = asyncio.get_running_loop()
+        packets = []
+        futures = []
+        for command in commands:
+            self._next_id = self._next_id % 0x7FFFFFFF + 1
+            future = loop.create_future()
+            self._replies[self._next_id] = future
+            packets.append(encode_packet(self._next_id, PACKET_COMMAND, command))
+            futures.append(future)
+        if self.closed:
+            self._replies.clear()
+            for future in futures:
+                future.set_exception(ConnectionError("RCON connection closed"))
+            return futures
+        data = b''.join(packets)
+        try:
+            self.writer.write(data)
+            await self.writer.drain()
+        except (ConnectionError, OSError) as error:
+            self._fail(ConnectionError(f"RCON write failed: {error}"))
+        return futures
+
+    async def close(self):
+        if self._reader_task:
+            self._reader_task.cancel()
+        if not self.closed:
+            self._fail(ConnectionError("RCON connection closed"))
+        try:
+            await self.writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+class RconPool:
+    """
+    Pipelined RCON delivery over `connections` connections. Commands are
+    taken from one queue in batches of up to batch_size, and each
+    connection keeps at most `window` commands awaiting replies.
+    """
+
+    def __init__(self, host: str = 'localhost', port: int = DEFAULT_PORT, password: str = '',
+                 connections: int = 2, window: int = 64, batch_size: int = 32,
+                 queue_size: int = 4096, max_retries: int = 5, retry_delay: float = 0.05,
+                 timeout: float = 10.0):
+        if batch_size > window:
+            raise ValueError(f"batch_size ({batch_size}) must not exceed window ({window})")
+        self.host, self.port, self.password = host, port, password
+        self.connections = connections
+        self.window = window
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.metrics = RconMetrics()
+        self._queue: Optional[asyncio.Queue] = None
+        self._capacity: Optional[asyncio.Semaphore] = None
+        self._queue_size = queue_size
+        self._outstanding = 0
+        self._idle: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+        self._completions: Set[asyncio.Task] = set()
+        self._error: Optional[BaseException] = None
+
+    async def __aenter__(self) -> 'RconPool':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        """Open the connections (authentication errors surface here)"""
+        self._queue = asyncio.Queue()
+        self._capacity = asyncio.Semaphore(self._queue_size)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        first = await self._connect()
+        self.metrics = RconMetrics()
+        self._workers = [asyncio.create_task(self._worker(first if i == 0 else None))
+                         for i in range(self.connections)]
+
+    async def _connect(self) -> RconConnection:
+        return await RconConnection.open(self.host, self.port, self.password, self.window, self.timeout)
+
+    async def submit(self, command: str) -> asyncio.Future:
+        """
+        Queue a command, waiting while queue_size commands are outstanding.
+        Returns a future resolving to the server's reply.
+        """
+        if self._error:
+            raise self._error
+        if len(command.encode('utf-8')) > MAX_COMMAND_BYTES:
+            raise ValueError(f"command exceeds {MAX_COMMAND_BYTES} bytes: {command[:60]}...")
+        await self._capacity.acquire()
+        item = _Pending(command, asyncio.get_running_loop().create_future())
+        self._outstanding += 1
+        self._idle.clear()
+        self._queue.put_nowait(item)
+        return item.future
+
+    async def execute(self, command: str) -> str:
+        """Send one command and wait for its reply"""
+        return await (await self.submit(command))
+
+    async def run(self, commands: Iterable[str]) -> List[str]:
+        """Send commands and wait for every reply (in submission order)"""
+        futures = [await self.submit(command) for command in commands]
+        return await asyncio.gather(*futures)
+
+    async def join(self):
+        """Wait until every submitted command has been answered or has failed"""
+        await self._idle.wait()
+        if self._error:
+            raise self._error
+
+    async def close(self):
+        await self.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self.metrics.finished = time.perf_counter()
+
+    # ----- delivery -----
+
+    def _finish(self, item: _Pending, reply: Optional[str] = None, error: Optional[Exception] = None):
+        if not item.future.done():
+            if error is None:
+                item.future.set_result(reply)
+            else:
+                item.future.set_exception(error)
+        self._capacity.release()
+        self._outstanding -= 1
+        if self._outstanding == 0:
+            self._idle.set()
+
+    def _retry(self, item: _Pending, reason: str):
+        item.attempts += 1
+        if item.attempts > self.max_retries:
+            self.metrics.failures += 1
+            self._finish(item, error=RconError(f"'{item.command}' failed after "
+                                               f"{self.max_retries} retries: {reason}"))
+            return
+        self.metrics.retries += 1
+        delay = self.retry_delay * 2 ** (item.attempts - 1)
+        asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, item)
+
+    async def _worker(self, connection: Optional[RconConnection]):
+        failures = 0
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                while len(batch) < self.batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+
+                while batch:
+                    while connection is None or connection.closed:
+                        try:
+                            if connection is not None:
+                                self.metrics.reconnects += 1
+                            connection = await self._connect()
+                            failures = 0
+                        except RconError as error:
+                            self._error = error
+                            for item in batch:
+                                self._finish(item, error=error)
+                            batch = []
+                            break
+                        except (OSError, asyncio.TimeoutError):
+                            failures += 1
+                            await asyncio.sleep(min(self.retry_delay * 2 ** failures, 5.0))
+                    if not batch:
+                        break
+                    for _ in batch:
+                        await connection.window.acquire()
+                    if not connection.closed:
+                        break
+                    # Lost while waiting for the window: nothing was sent, so
+                    # reconnect without spending the batch's retries
+                    for _ in batch:
+                        connection.window.release()
+                if not batch:
+                    continue
+                now = time.perf_counter()
+                for item in batch:
+                    item.sent = now
+                futures = await connection.send([item.command for item in batch])
+                self.metrics.batches += 1
+                self.metrics.bytes_sent += sum(len(item.command.encode('utf-8')) + 14 for item in batch)
+                task = asyncio.create_task(self._complete(connection, batch, futures))
+                self._completions.add(task)
+                task.add_done_callback(self._completions.discard)
+        finally:
+            if connection is not None:
+                await connection.close()
+
+    async def _complete(self, connection: RconConnection, batch: List[_Pending],
+                        futures: List[asyncio.Future]):
+        deadline = time.perf_counter() + self.timeout
+        for item, future in zip(batch, futures):
+            try:
+                reply = await asyncio.wait_for(future, max(deadline - time.perf_counter(), 0.001))
+            except asyncio.TimeoutError:
+                connection._fail(ConnectionError("RCON reply timed out"))
+                self._retry(item, "timed out")
+            except ConnectionError as error:
+                self._retry(item, str(error))
+            else:
+                if any(marker in reply for marker in RETRY_REPLIES):
+                    self._retry(item, reply)
+                else:
+                    self.metrics.commands += 1
+                    self.metrics.latencies.append(time.perf_counter() - item.sent)
+                    self._finish(item, reply)
+            finally:
+                connection.window.release()
+
+
+# ============================================================================
+# CIRCUIT PLACEMENT
+# ============================================================================
+
+async def place_circuit(pool: RconPool, circuit, origin: Tuple[int, int, int],
+                        lookahead: int = 4) -> int:
+    """
+    Place a circuit at an absolute origin through a started pool, chunk by
+    chunk: each chunk is force-loaded `lookahead` visits before its
+    commands are streamed and released once they are all acknowledged.
+    Components supported from another chunk follow once all structure is
+    placed. Returns the number of commands that failed.
+    """
+    from chunk_planner import plan_chunk_batches
+
+    # A budget above the block count keeps every chunk visit in one batch
+    visits = plan_chunk_batches(circuit, origin, budget=len(circuit.blocks) + 2)
+    loaded: Dict[Tuple[int, int], List] = {}        # chunk -> [holders, forceload add reply]
+    removing: Dict[Tuple[int, int], asyncio.Future] = {}
+    failed = 0
+
+    async def acquire(visit):
+        if visit.chunk not in loaded:
+            if visit.chunk in removing:
+                # Let a pending forceload remove land before adding again
+                await removing[visit.chunk]
+            loaded[visit.chunk] = [0, await pool.submit(visit.forceload('add'))]
+        loaded[visit.chunk][0] += 1
+
+    async def release(visit, futures):
+        nonlocal failed
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        failed += sum(1 for result in results if isinstance(result, BaseException))
+        held = loaded[visit.chunk]
+        held[0] -= 1
+        if held[0]:
+            return
+        del loaded[visit.chunk]
+        done = asyncio.get_running_loop().create_future()
+        removing[visit.chunk] = done
+        try:
+            await pool.execute(visit.forceload('remove'))
+        finally:
+            del removing[visit.chunk]
+            done.set_result(None)
+
+    for deferred in (False, True):
+        queue = [visit for visit in visits if visit.deferred == deferred]
+        in_flight = []
+        acquired = 0
+        for i, visit in enumerate(queue):
+            while acquired < min(i + lookahead + 1, len(queue)):
+                await acquire(queue[acquired])
+                acquired += 1
+            await loaded[visit.chunk][1]
+            futures = [await pool.submit(command) for command in visit.commands]
+            in_flight.append(asyncio.create_task(release(visit, futures)))
+        # Structure must exist before components that hang on it
+        await asyncio.gather(*in_flight)
+    return failed
+
+
+# ============================================================================
+# MOCK SERVER
+# ============================================================================
+
+class MockRconServer:
+    """
+    Offline stand-in for a Minecraft server's RCON port. Commands run one
+    at a time across all connections, as on the server's main thread.
+    setblock and fill write to `blocks` and are refused outside
+    force-loaded chunks, like an unloaded chunk on a real server.
+    drop_every closes a connection after that many commands, without
+    replying, to exercise retries.
+    """
+
+    def __init__(self, password: str = '', latency: float = 0.0, drop_every: int = 0,
+                 require_loaded: bool = True):
+        self.password = password
+        self.latency = latency
+        self.drop_every = drop_every
+        self.require_loaded = require_loaded
+        self.commands: List[str] = []
+        self.blocks: Dict[Tuple[int, int, int], str] = {}
+        self.forced: Set[Tuple[int, int]] = set()
+        self.port = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._main_thread = asyncio.Lock()
+
+    async def __aenter__(self) -> 'MockRconServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> int:
+        self._server = await asyncio.start_server(self._serve, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        handled = 0
+        try:
+            request_id, kind, body = await read_packet(reader)
+            ok = kind == PACKET_AUTH and body == self.password
+            writer.write(encode_packet(request_id if ok else -1, PACKET_AUTH_RESPONSE, ''))
+            await writer.drain()
+            if not ok:
+                return
+            while True:
+                request_id, kind, body = await read_packet(reader)
+                if self.drop_every and handled and handled % self.drop_every == 0:
+                    return
+                async with self._main_thread:
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    reply = self.execute(body)
+                handled += 1
+                writer.write(encode_packet(request_id, PACKET_RESPONSE, reply))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _loaded(self, x: int, z: int) -> bool:
+        return not self.require_loaded or (x // 16, z // 16) in self.forced
+
+    def execute(self, command: str) -> str:
+        """Apply one command to the in-memory world and return the reply"""
+        self.commands.append(command)
+        parts = command.split(' ')
+        if parts[0] == 'forceload' and len(parts) == 4:
+            chunk = (int(parts[2]) // 16, int(parts[3]) // 16)
+            (self.forced.add if parts[1] == 'add' else self.forced.discard)(chunk)
+            return f"Marked chunk {chunk[0]}, {chunk[1]} to be force loaded"
+        if parts[0] == 'setblock':
+            x, y, z = map(int, parts[1:4])
+            if not self._loaded(x, z):
+                return "That position is not loaded"
+            self.blocks[(x, y, z)] = ' '.join(parts[4:])
+            return f"Changed the block at {x}, {y}, {z}"
+        if parts[0] == 'fill':
+            lo = [int(v) for v in parts[1:4]]
+            hi = [int(v) for v in parts[4:7]]
+            if not all(self._loaded(x, z) for x in (lo[0], hi[0]) for z in (lo[2], hi[2])):
+                return "That position is not loaded"
+            state = ' '.join(parts[7:])
+            for x in range(lo[0], hi[0] + 1):
+                for y in range(lo[1], hi[1] + 1):
+                    for z in range(lo[2], hi[2] + 1):
+                        self.blocks[(x, y, z)] = state
+            count = (hi[0] - lo[0] + 1) * (hi[1] - lo[1] + 1) * (hi[2] - lo[2] + 1)
+            return f"Successfully filled {count} block(s)"
+        return f"Unknown or incomplete command: {command}"
@@ -0,0 +1,949 @@
+#!/usr/bin/env python3
+"""
+Redstone Signal Simulator for Quantum-Redstone Circuits
+Executes the block graph of a generated Circuit tick by tick:
+- redstone wire with per-block decay (whole networks relaxed at once)
+- torches, levers/buttons and redstone blocks as sources
+- comparators (compare/subtract) and repeaters with tick delays
+- containers read by comparators, lamps and pistons as outputs
+
+Only blocks whose inputs changed are re-evaluated on each tick
+(dirty-set worklist), so large layouts settle in time proportional to
+the activity rather than the block count. BatchSimulator and truth_table() settle a
+circuit for every input combination at once, producing transfer tables
+that compose_tables() chains without re-simulating.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Optional, Set
+
+import numpy as np
+
+from quantum_circuit_generator import Circuit, NEIGHBOUR_OFFSETS, resolve_placement, support_offset
+from circuit_lint import pack_position, pack_positions
+
+MAX_SIGNAL = 15
+
+# Node kinds
+SOLID = 0
+WIRE = 1
+TORCH = 2
+LEVER = 3
+POWER_BLOCK = 4
+COMPARATOR = 5
+REPEATER = 6
+CONTAINER = 7
+LAMP = 8
+CONSUMER = 9
+TRANSPARENT = 10
+
+_DIRECTIONS = list(NEIGHBOUR_OFFSETS)
+_DIRECTION_INDEX = {name: i for i, name in enumerate(_DIRECTIONS)}
+_OPPOSITE = [_DIRECTION_INDEX[name] for name in ('west', 'east', 'down', 'up', 'north', 'south')]
+_UP = _DIRECTION_INDEX['up']
+_DOWN = _DIRECTION_INDEX['down']
+_HORIZONTAL = [_DIRECTION_INDEX[name] for name in ('east', 'west', 'south', 'north')]
+
+# Slots per container, for the comparator fill-level formula
+CONTAINER_SLOTS = {
+    'minecraft:chest': 27,
+    'minecraft:trapped_chest': 27,
+    'minecraft:barrel': 27,
+    'minecraft:hopper': 5,
+    'minecraft:dropper': 9,
+    'minecraft:dispenser': 9,
+}
+
+
+def block_kind(block_id: str) -> int:
+    """Classify a block id into a simulator node kind"""
+    if block_id == 'minecraft:redstone_wire':
+        return WIRE
+    if block_id in ('minecraft:redstone_torch', 'minecraft:redstone_wall_torch'):
+        return TORCH
+    if block_id == 'minecraft:lever' or block_id.endswith('_button'):
+        return LEVER
+    if block_id == 'minecraft:redstone_block':
+        return POWER_BLOCK
+    if block_id == 'minecraft:comparator':
+        return COMPARATOR
+    if block_id == 'minecraft:repeater':
+        return REPEATER
+    if block_id in CONTAINER_SLOTS:
+        return CONTAINER
+    if block_id == 'minecraft:redstone_lamp':
+        return LAMP
+    if block_id in ('minecraft:piston', 'minecraft:sticky_piston'):
+        return CONSUMER
+    if 'glass' in block_id or block_id == 'minecraft:air':
+        return TRANSPARENT
+    return SOLID
+
+
+def container_signal(block_id: str, nbt: Optional[Dict], max_stack: int = 64) -> int:
+    """Comparator output for a container: floor(1 + fullness * 14), 0 if empty"""
+    items = (nbt or {}).get('Items', [])
+    total = sum(item.get('Count', 1) for item in items)
+    if total <= 0:
+        return 0
+    fullness = sum(item.get('Count', 1) / max_stack for item in items) / CONTAINER_SLOTS[block_id]
+    return min(MAX_SIGNAL, int(1 + fullness * 14))
+
+
+@dataclass
+class Port:
+    """A named input or output position of a gate"""
+    name: str
+    pos: Tuple[int, int, int]
+
+
+# Input/output positions of the generators in quantum_circuit_generator
+GATE_PORTS: Dict[str, Dict[str, List[Port]]] = {
+    'state_preparation': {
+        'inputs': [Port('lever', (0, 1, 1))],
+        'outputs': [Port('alpha', (6, 0, 1)), Port('omega', (6, 0, 0))],
+    },
+    'pauli_x_gate': {
+        'inputs': [Port('alpha', (0, 2, 4)), Port('omega', (0, 0, 0))],
+        'outputs': [Port('alpha', (9, 0, 0)), Port('omega', (9, 2, 4))],
+    },
+    'pauli_z_gate': {
+        'inputs': [Port('alpha', (0, 0, 2)), Port('omega', (0, 0, 1)), Port('phase', (0, 0, 0))],
+        'outputs': [Port('alpha', (9, 0, 2)), Port('omega', (9, 0, 1)), Port('phase', (9, 0, 0))],
+    },
+    'cnot_gate': {
+        'inputs': [Port('control_alpha', (0, 4, 14)), Port('control_omega', (0, 4, 13)),
+                   Port('alpha', (0, 0, 7)), Port('omega', (0, 0, 0))],
+        'outputs': [Port('control_alpha', (19, 4, 14)), Port('control_omega', (19, 4, 13)),
+                    Port('alpha', (19, 0, 7)), Port('omega', (19, 0, 0))],
+    },
+    'phase_evolution_engine': {
+        'inputs': [],
+        'outputs': [Port('alpha', (39, 0, 12)), Port('omega', (39, 0, 14))],
+    },
+    'chain_lookup': {   # max_signal=15
+        'inputs': [Port('alpha', (0, 1, 5)), Port('phase', (96, 1, 8))],
+        'outputs': [Port('alpha', (97, 1, 10)), Port('omega', (97, 1, 12)), Port('phase', (97, 1, 0))],
+    },
+    'conservation_verifier': {
+        'inputs': [Port('alpha', (0, 0, 2)), Port('omega', (0, 0, 0))],
+        'outputs': [Port('valid', (7, 0, 1)), Port('lamp', (8, 1, 1))],
+    },
+}
+
+
+class RedstoneSimulator:
+    """
+    Tick-based redstone simulator over a Circuit.
+
+    One node is created per occupied position (the last block placed
+    there). Wire, solid-block and lamp updates are instant and settle
+    within a tick; torches, comparators and repeaters schedule their new
+    output after their delay. The generators treat a comparator's or
+    repeater's `facing` as the direction its signal leaves; pass
+    facing_is_output=False for vanilla block states, where `facing` points
+    at the input. Torches and levers with nothing behind them sit on
+    unpowered ground.
+    """
+
+    def __init__(self, circuit: Circuit, facing_is_output: bool = True):
+        self.circuit = circuit
+        store = circuit.blocks
+        positions, state_ids, rows = resolve_placement(store)
+        self.positions = positions.astype(np.int64)
+        n = len(rows)
+        self._node_of: Dict[int, int] = dict(zip(pack_positions(self.positions).tolist(), range(n)))
+
+        # Six face neighbours per node (-1 = empty), in NEIGHBOUR_OFFSETS order
+        self.neighbours = np.full((n, 6), -1, dtype=np.int64)
+        for d, offset in enumerate(NEIGHBOUR_OFFSETS.values()):
+            keys = pack_positions(self.positions + np.asarray(offset, dtype=np.int64)).tolist()
+            self.neighbours[:, d] = [self._node_of.get(k, -1) for k in keys]
+        self._nbrs = self.neighbours.tolist()
+
+        self.block_ids: List[str] = []
+        self.kind: List[int] = []
+        self.output_dir: List[int] = []    # diodes: direction the signal leaves
+        self.attached: List[int] = []      # torches/levers: node they hang on, -1 for ground
+        self.delay: List[int] = []
+        self.mode: List[str] = []
+        self.out: List[int] = [0] * n      # emitted level of sources, wires and diodes
+        self.strong: List[int] = [0] * n   # solid blocks: strong power
+        self.weak: List[int] = [0] * n     # solid blocks: weak power from wire
+
+        for node, (row, state) in enumerate(zip(rows.tolist(), state_ids.tolist())):
+            block_id, props = store.palette[state]
+            props = props or {}
+            kind = block_kind(block_id)
+            self.block_ids.append(block_id)
+            self.kind.append(kind)
+
+            facing = props.get('facing')
+            out_dir = -1
+            if kind in (COMPARATOR, REPEATER) and facing in _DIRECTION_INDEX:
+                out_dir = _DIRECTION_INDEX[facing]
+                if not facing_is_output:
+                    out_dir = _OPPOSITE[out_dir]
+            self.output_dir.append(out_dir)
+
+            attach = -1
+            if kind in (TORCH, LEVER):
+                x, y, z = self.positions[node].tolist()
+                dx, dy, dz = support_offset(block_id, props)
+                attach = self._node_of.get(pack_position(x + dx, y + dy, z + dz), -1)
+            self.attached.append(attach)
+
+            self.delay.append(max(1, int(props.get('delay', 1))))
+            self.mode.append(props.get('mode', 'compare'))
+
+            if kind == POWER_BLOCK:
+                self.out[node] = MAX_SIGNAL
+            elif kind == LEVER:
+                self.out[node] = MAX_SIGNAL if str(props.get('powered', 'false')) == 'true' else 0
+            elif kind == CONTAINER:
+                self.out[node] = container_signal(block_id, store.nbt.get(int(row)))
+
+        self._build_wire_networks()
+
+        self.tick = 0
+        self.updates = 0
+        self._driven: Dict[int, int] = {}
+        self._pending: Dict[int, Tuple[int, int]] = {}   # node -> (due tick, value)
+        self._schedule: Dict[int, List[int]] = defaultdict(list)
+        self._dirty: Set[int] = {node for node in range(n) if self.kind[node] != WIRE}
+        self._dirty_wires: Set[int] = {node for node in range(n) if self.kind[node] == WIRE}
+
+    # ----- topology -----
+
+    def _build_wire_networks(self):
+        """Group wires into connected networks, including one-block steps up and down"""
+        n = len(self.kind)
+        self.wire_links: List[List[int]] = [[] for _ in range(n)]
+        for node in range(n):
+            if self.kind[node] != WIRE:
+                continue
+            x, y, z = self.positions[node].tolist()
+            links = []
+            for d in _HORIZONTAL:
+                dx, _, dz = NEIGHBOUR_OFFSETS[_DIRECTIONS[d]]
+                for dy in (0, 1, -1):
+                    other = self._node_of.get(pack_position(x + dx, y + dy, z + dz), -1)
+                    if other >= 0 and self.kind[other] == WIRE:
+                        links.append(other)
+            self.wire_links[node] = links
+
+        self.network: List[int] = [-1] * n
+        self.networks: List[List[int]] = []
+        for start in range(n):
+            if self.kind[start] != WIRE or self.network[start] >= 0:
+                continue
+            members = [start]
+            self.network[start] = len(self.networks)
+            for node in members:
+                for other in self.wire_links[node]:
+                    if self.network[other] < 0:
+                        self.network[other] = len(self.networks)
+                        members.append(other)
+            self.networks.append(members)
+
+    def node_at(self, x: int, y: int, z: int) -> int:
+        node = self._node_of.get(pack_position(x, y, z))
+        if node is None:
+            raise KeyError(f"No block at {(x, y, z)} in {self.circuit.name}")
+        return node
+
+    # ----- power model -----
+
+    def emission(self, src: int, d: int) -> int:
+        """Power node src delivers to its neighbour in direction d"""
+        kind = self.kind[src]
+        if src in self._driven and kind != WIRE:
+            return self._driven[src]
+        if kind in (LEVER, POWER_BLOCK, WIRE):
+            return self.out[src]
+        if kind == TORCH:
+            target = self._nbrs[src][d]
+            return 0 if target >= 0 and target == self.attached[src] else self.out[src]
+        if kind in (COMPARATOR, REPEATER):
+            return self.out[src] if d == self.output_dir[src] else 0
+        if kind in (SOLID, LAMP):
+            return self.strong[src]
+        return 0
+
+    def block_power(self, node: int) -> int:
+        """Power level a solid block passes to torches and diodes reading it"""
+        return max(self.strong[node], self.weak[node])
+
+    def _wire_input(self, node: int) -> int:
+        if node in self._driven:
+            return self._driven[node]
+        level = 0
+        for d, src in enumerate(self._nbrs[node]):
+            if src >= 0 and self.kind[src] != WIRE:
+                level = max(level, self.emission(src, _OPPOSITE[d]))
+        return level
+
+    def _diode_rear(self, node: int) -> int:
+        out_dir = self.output_dir[node]
+        if out_dir < 0:
+            return 0
+        rear = self._nbrs[node][_OPPOSITE[out_dir]]
+        if rear < 0:
+            return 0
+        kind = self.kind[rear]
+        if kind == CONTAINER:
+            return self.out[rear] if self.kind[node] == COMPARATOR else 0
+        if kind in (SOLID, LAMP):
+            return self.block_power(rear)
+        return self.emission(rear, out_dir)
+
+    def _diode_side(self, node: int) -> int:
+        out_dir = self.output_dir[node]
+        level = 0
+        for d in _HORIZONTAL:
+            if d == out_dir or d == _OPPOSITE[out_dir]:
+                continue
+            side = self._nbrs[node][d]
+            if side >= 0 and self.kind[side] in (WIRE, COMPARATOR, REPEATER, POWER_BLOCK):
+                level = max(level, self.emission(side, _OPPOSITE[d]))
+        return level
+
+    def _target(self, node: int) -> int:
+        """Output a delayed component is heading for given its current inputs"""
+        kind = self.kind[node]
+        if kind == TORCH:
+            attach = self.attached[node]
+            if attach < 0:
+                return MAX_SIGNAL
+            if self.kind[attach] in (SOLID, LAMP):
+                level = self.block_power(attach)
+            else:
+                level = self.emission(attach, self._nbrs[attach].index(node))
+            return 0 if level > 0 else MAX_SIGNAL
+        rear = self._diode_rear(node)
+        if kind == REPEATER:
+            return MAX_SIGNAL if rear > 0 else 0
+        side = self._diode_side(node)
+        if self.mode[node] == 'subtract':
+            return max(rear - side, 0)
+        return rear if rear >= side else 0
+
+    def _solid_levels(self, node: int) -> Tuple[int, int]:
+        strong = weak = 0
+        for d, src in enumerate(self._nbrs[node]):
+            if src < 0:
+                continue
+            kind = self.kind[src]
+            toward = _OPPOSITE[d]
+            if kind in (COMPARATOR, REPEATER):
+                strong = max(strong, self.emission(src, toward))
+            elif kind == TORCH and d == _DOWN:
+                strong = max(strong, self.out[src])
+            elif kind == LEVER and self.attached[src] == node:
+                strong = max(strong, self.out[src])
+            elif kind == WIRE and d != _DOWN:
+                weak = max(weak, self.out[src])
+        if node in self._driven:
+            strong = max(strong, self._driven[node])
+        return strong, weak
+
+    def _consumer_powered(self, node: int) -> int:
+        level = 0
+        for d, src in enumerate(self._nbrs[node]):
+            if src >= 0:
+                level = max(level, self.emission(src, _OPPOSITE[d]))
+        return level
+
+    # ----- updates -----
+
+    def _mark_neighbours(self, node: int):
+        for other in self._nbrs[node]:
+            if other >= 0:
+                if self.kind[other] == WIRE:
+                    self._dirty_wires.add(other)
+                else:
+                    self._dirty.add(other)
+
+    def _relax_network(self, members: List[int]):
+        """Recompute wire levels for one network from its external inputs"""
+        level = {node: self._wire_input(node) for node in members}
+        buckets: List[List[int]] = [[] for _ in range(MAX_SIGNAL + 1)]
+        for node, value in level.items():
+            if value > 0:
+                buckets[value].append(node)
+        for value in range(MAX_SIGNAL, 0, -1):
+            for node in buckets[value]:
+                if level[node] != value:
+                    continue
+                for other in self.wire_links[node]:
+                    if level[other] < value - 1:
+                        level[other] = value - 1
+                        buckets[value - 1].append(other)
+        for node, value in level.items():
+            self.updates += 1
+            if self.out[node] != value:
+                self.out[node] = value
+                self._mark_neighbours(node)
+
+    def _evaluate(self, node: int):
+        self.updates += 1
+        kind = self.kind[node]
+        if node in self._driven and kind not in (SOLID, LAMP):
+            self._pending.pop(node, None)
+            return
+        if kind in (SOLID, LAMP):
+            levels = self._solid_levels(node)
+            changed = (self.strong[node], self.weak[node]) != levels
+            self.strong[node], self.weak[node] = levels
+            if kind == LAMP:
+                lit = MAX_SIGNAL if max(*levels, self._consumer_powered(node)) > 0 else 0
+                changed = changed or lit != self.out[node]
+                self.out[node] = lit
+            if changed:
+                self._mark_neighbours(node)
+        elif kind == CONSUMER:
+            self.out[node] = MAX_SIGNAL if self._consumer_powered(node) > 0 else 0
+        elif kind in (TORCH, COMPARATOR, REPEATER):
+            target = self._target(node)
+            pending = self._pending.get(node)
+            if target == self.out[node]:
+                self._pending.pop(node, None)
+            elif pending is None or pending[1] != target:
+                due = self.tick + self.delay[node]
+                self._pending[node] = (due, target)
+                self._schedule[due].append(node)
+
+    def _settle(self):
+        """Propagate instant updates until nothing is dirty"""
+        while self._dirty or self._dirty_wires:
+            while self._dirty:
+                self._evaluate(self._dirty.pop())
+            networks = {self.network[node] for node in self._dirty_wires}
+            self._dirty_wires.clear()
+            for net in networks:
+                self._relax_network(self.networks[net])
+
+    def step(self):
+        """Advance one redstone tick"""
+        self._settle()
+        self.tick += 1
+        for node in self._schedule.pop(self.tick, []):
+            pending = self._pending.get(node)
+            if pending is None or pending[0] != self.tick:
+                continue
+            del self._pending[node]
+            if self.out[node] != pending[1]:
+                self.out[node] = pending[1]
+                self._mark_neighbours(node)
+                self._dirty.add(node)
+        self._settle()
+
+    def run(self, max_ticks: int = 1000) -> int:
+        """
+        Tick until no outputs are pending (or max_ticks elapse) and return
+        the number of ticks taken.
+        """
+        start = self.tick
+        self._settle()
+        while self._pending and self.tick - start < max_ticks:
+            self.step()
+        return self.tick - start
+
+    @property
+    def stable(self) -> bool:
+        return not (self._pending or self._dirty or self._dirty_wires)
+
+    # ----- inputs and outputs -----
+
+    def set_lever(self, x: int, y: int, z: int, on: bool):
+        """Switch a lever or hold a button"""
+        node = self.node_at(x, y, z)
+        if self.kind[node] != LEVER:
+            raise ValueError(f"{self.block_ids[node]} at {(x, y, z)} is not a lever or button")
+        self.out[node] = MAX_SIGNAL if on else 0
+        self._mark_neighbours(node)
+
+    def drive(self, x: int, y: int, z: int, level: Optional[int]):
+        """
+        Hold a block at a fixed signal level, as if fed by an external
+        source (None releases it). Used to inject gate inputs on wire rails.
+        """
+        node = self.node_at(x, y, z)
+        if level is None:
+            self._driven.pop(node, None)
+        else:
+            if not 0 <= level <= MAX_SIGNAL:
+                raise ValueError(f"signal level must be 0-{MAX_SIGNAL}, got {level}")
+            self._driven[node] = level
+            if self.kind[node] not in (SOLID, LAMP, WIRE):
+                self.out[node] = level
+        if self.kind[node] == WIRE:
+            self._dirty_wires.add(node)
+        else:
+            self._dirty.add(node)
+            self._mark_neighbours(node)
+
+    def power(self, x: int, y: int, z: int) -> int:
+        """Signal level at a position (wire level, component output or block power)"""
+        node = self.node_at(x, y, z)
+        if self.kind[node] == SOLID:
+            return self.block_power(node)
+        return self.out[node]
+
+    def read_ports(self, ports: List[Port]) -> Dict[str, int]:
+        return {port.name: self.power(*port.pos) for port in ports}
+
+
+def simulate_gate(circuit: Circuit, inputs: Dict[str, int],
+                  max_ticks: int = 1000, **options) -> Dict[str, int]:
+    """
+    Drive a generated gate's named inputs (see GATE_PORTS) and return its
+    outputs once the circuit settles. A 'lever' input switches the lever.
+    """
+    ports = GATE_PORTS.get(circuit.name)
+    if ports is None:
+        raise KeyError(f"No port map for circuit '{circuit.name}'")
+    sim = RedstoneSimulator(circuit, **options)
+    by_name = {port.name: port for port in ports['inputs']}
+    for name, level in inputs.items():
+        if name not in by_name:
+            raise KeyError(f"{circuit.name} has no input '{name}'")
+        if name == 'lever':
+            sim.set_lever(*by_name[name].pos, on=bool(level))
+        else:
+            sim.drive(*by_name[name].pos, level)
+    sim.run(max_ticks)
+    return sim.read_ports(ports['outputs'])
+
+
+def check_conservation(circuit: Circuit, max_ticks: int = 1000,
+                       **options) -> Optional[List[Tuple[Dict[str, int], Dict[str, int]]]]:
+    """
+    Simulate a gate over its input cases and return the (inputs, outputs)
+    pairs whose outputs break ALPHA + OMEGA = 15.
+
+    ALPHA inputs are swept over 0-15 with OMEGA = 15 - ALPHA; lever-driven
+    gates are run with the lever off and on. Returns None for circuits
+    without ALPHA/OMEGA outputs in GATE_PORTS.
+    """
+    ports = GATE_PORTS.get(circuit.name)
+    if ports is None or not {'alpha', 'omega'} <= {port.name for port in ports['outputs']}:
+        return None
+    inputs = {port.name for port in ports['inputs']}
+    if {'alpha', 'omega'} <= inputs:
+        cases = [{'alpha': a, 'omega': MAX_SIGNAL - a} for a in range(MAX_SIGNAL + 1)]
+    elif 'lever' in inputs:
+        cases = [{'lever': 0}, {'lever': 1}]
+    else:
+        cases = [{}]
+
+    broken = []
+    for levels in cases:
+        result = simulate_gate(circuit, levels, max_ticks, **options)
+        if result['alpha'] + result['omega'] != MAX_SIGNAL:
+            broken.append((levels, result))
+    return broken
+
+
+# ============================================================================
+# BATCHED EVALUATION
+# ============================================================================
+
+def _pad_table(rows: List[List[int]], fill: int) -> np.ndarray:
+    """Stack ragged index lists into a rectangular table padded with fill"""
+    width = max([len(row) for row in rows] + [1])
+    table = np.full((len(rows), width), fill, dtype=np.int64)
+    for i, row in enumerate(rows):
+        table[i, :len(row)] = row
+    return table
+
+
+class BatchResult:
+    """Settled levels of every node for each entry of a batch"""
+
+    def __init__(self, sim: RedstoneSimulator, out: np.ndarray, strong: np.ndarray,
+                 weak: np.ndarray, settled: np.ndarray, rounds: int):
+        self.sim = sim
+        self.out = out
+        self.strong = strong
+        self.weak = weak
+        self.settled = settled
+        self.rounds = rounds
+
+    def power(self, x: int, y: int, z: int) -> np.ndarray:
+        """Signal level at a position for every batch entry, as RedstoneSimulator.power()"""
+        node = self.sim.node_at(x, y, z)
+        if self.sim.kind[node] == SOLID:
+            return np.maximum(self.strong[:, node], self.weak[:, node])
+        return self.out[:, node]
+
+
+class BatchSimulator:
+    """
+    Steady-state evaluation of a circuit for a whole batch of inputs.
+
+    Uses the same block model as RedstoneSimulator, compiled once into
+    gather tables: node levels live in (batch, nodes) arrays and every
+    component is updated together each round until nothing changes. Tick
+    timing is not modelled; entries that never settle (clocks, oscillating
+    feedback) are reported through BatchResult.settled.
+    """
+
+    def __init__(self, circuit: Circuit, **options):
+        sim = self.sim = RedstoneSimulator(circuit, **options)
+        n = len(sim.kind)
+        kind = sim.kind
+        nbrs = sim._nbrs
+        zero = 3 * n   # levels are gathered from [out | strong | weak | 0]
+
+        def emission_index(src: int, d: int) -> int:
+            # Mirrors RedstoneSimulator.emission() as an index into the level row
+            if src < 0:
+                return zero
+            k = kind[src]
+            if k in (LEVER, POWER_BLOCK, WIRE):
+                return src
+            if k == TORCH:
+                return zero if nbrs[src][d] == sim.attached[src] else src
+            if k in (COMPARATOR, REPEATER):
+                return src if d == sim.output_dir[src] else zero
+            if k in (SOLID, LAMP):
+                return n + src
+            return zero
+
+        def nodes_of(*kinds) -> np.ndarray:
+            return np.array([i for i, k in enumerate(kind) if k in kinds], dtype=np.int64)
+
+        self.wires = nodes_of(WIRE)
+        self.solids = nodes_of(SOLID, LAMP)
+        self.lit = nodes_of(LAMP, CONSUMER)
+        self.torches = nodes_of(TORCH)
+        self.diodes = nodes_of(COMPARATOR, REPEATER)
+        self.levers = nodes_of(LEVER)
+
+        wire_slot = {node: i for i, node in enumerate(self.wires.tolist())}
+        self._wire_in = _pad_table([
+            [emission_index(src, _OPPOSITE[d]) for d, src in enumerate(nbrs[node])
+             if src >= 0 and kind[src] != WIRE]
+            for node in self.wires.tolist()], zero)
+        self._wire_links = _pad_table(
+            [[wire_slot[other] for other in sim.wire_links[node]] for node in self.wires.tolist()],
+            len(self.wires))
+
+        strong_in, weak_in = [], []
+        for node in self.solids.tolist():
+            strong, weak = [], []
+            for d, src in enumerate(nbrs[node]):
+                if src < 0:
+                    continue
+                k = kind[src]
+                if k in (COMPARATOR, REPEATER):
+                    strong.append(emission_index(src, _OPPOSITE[d]))
+                elif (k == TORCH and d == _DOWN) or (k == LEVER and sim.attached[src] == node):
+                    strong.append(src)
+                elif k == WIRE and d != _DOWN:
+                    weak.append(src)
+            strong_in.append(strong)
+            weak_in.append(weak)
+        self._strong_in = _pad_table(strong_in, zero)
+        self._weak_in = _pad_table(weak_in, zero)
+
+        self._lit_in = _pad_table([
+            [emission_index(src, _OPPOSITE[d]) for d, src in enumerate(nbrs[node])]
+            + ([n + node, 2 * n + node] if kind[node] == LAMP else [])
+            for node in self.lit.tolist()], zero)
+
+        torch_in = []
+        for node in self.torches.tolist():
+            attach = sim.attached[node]
+            if attach < 0:
+                torch_in.append([])
+            elif kind[attach] in (SOLID, LAMP):
+                torch_in.append([n + attach, 2 * n + attach])
+            else:
+                torch_in.append([emission_index(attach, nbrs[attach].index(node))])
+        self._torch_in = _pad_table(torch_in, zero)
+
+        rear_in, side_in = [], []
+        for node in self.diodes.tolist():
+            out_dir = sim.output_dir[node]
+            rear, side = [], []
+            if out_dir >= 0:
+                src = nbrs[node][_OPPOSITE[out_dir]]
+                if src >= 0:
+                    if kind[src] == CONTAINER:
+                        rear = [src] if kind[node] == COMPARATOR else []
+                    elif kind[src] in (SOLID, LAMP):
+                        rear = [n + src, 2 * n + src]
+                    else:
+                        rear = [emission_index(src, out_dir)]
+                for d in _HORIZONTAL:
+                    if d in (out_dir, _OPPOSITE[out_dir]):
+                        continue
+                    src = nbrs[node][d]
+                    if src >= 0 and kind[src] in (WIRE, COMPARATOR, REPEATER, POWER_BLOCK):
+                        side.append(emission_index(src, _OPPOSITE[d]))
+            rear_in.append(rear)
+            side_in.append(side)
+        self._rear_in = _pad_table(rear_in, zero)
+        self._side_in = _pad_table(side_in, zero)
+        self._is_comparator = np.array([kind[i] == COMPARATOR for i in self.diodes.tolist()], dtype=bool)
+        self._subtract = np.array([sim.mode[i] == 'subtract' for i in self.diodes.tolist()], dtype=bool)
+
+        self._initial = np.array(sim.out, dtype=np.int16)
+
+    def run(self, drive: Optional[Dict[Tuple[int, int, int], np.ndarray]] = None,
+            levers: Optional[Dict[Tuple[int, int, int], np.ndarray]] = None,
+            batch: Optional[int] = None, max_rounds: Optional[int] = None) -> BatchResult:
+        """
+        Settle the circuit for every batch entry.
+
+        drive maps positions to per-entry signal levels (as
+        RedstoneSimulator.drive()); levers maps lever positions to per-entry
+        on/off states. Scalars broadcast across the batch.
+        """
+        sim = self.sim
+        n = len(sim.kind)
+        drive = drive or {}
+        levers = levers or {}
+        sizes = {np.size(v) for v in list(drive.values()) + list(levers.values()) if np.ndim(v)}
+        if len(sizes) > 1:
+            raise ValueError(f"inconsistent batch sizes {sorted(sizes)}")
+        batch = batch or (sizes.pop() if sizes else 1)
+        max_rounds = max_rounds or 2 * n + 32
+
+        out = np.tile(self._initial, (batch, 1))
+        for pos, state in levers.items():
+            node = sim.node_at(*pos)
+            if sim.kind[node] != LEVER:
+                raise ValueError(f"{sim.block_ids[node]} at {pos} is not a lever or button")
+            out[:, node] = np.where(np.broadcast_to(state, (batch,)), MAX_SIGNAL, 0)
+
+        driven_nodes, driven_levels = [], []
+        for pos, level in drive.items():
+            level = np.broadcast_to(np.asarray(level, dtype=np.int16), (batch,))
+            if level.min() < 0 or level.max() > MAX_SIGNAL:
+                raise ValueError(f"signal levels at {pos} must be 0-{MAX_SIGNAL}")
+            driven_nodes.append(sim.node_at(*pos))
+            driven_levels.append(level)
+        driven_nodes = np.array(driven_nodes, dtype=np.int64)
+        driven_levels = np.stack(driven_levels, axis=1) if driven_levels else np.zeros((batch, 0), np.int16)
+        is_wire = np.array([sim.kind[i] == WIRE for i in driven_nodes.tolist()], dtype=bool)
+        is_solid = np.array([sim.kind[i] in (SOLID, LAMP) for i in driven_nodes.tolist()], dtype=bool)
+        wire_slot = np.searchsorted(self.wires, driven_nodes[is_wire])
+        held = driven_nodes[~is_wire & ~is_solid]
+        solid_driven = driven_nodes[is_solid]
+        out[:, held] = driven_levels[:, ~is_wire & ~is_solid]
+
+        strong = np.zeros((batch, n), dtype=np.int16)
+        weak = np.zeros((batch, n), dtype=np.int16)
+        zero = np.zeros((batch, 1), dtype=np.int16)
+        link_pad = np.full((batch, 1), -1, dtype=np.int16)
+        changed = np.ones(batch, dtype=bool)
+
+        rounds = 0
+        while rounds < max_rounds:
+            rounds += 1
+            levels = np.concatenate([out, strong, weak, zero], axis=1)
+            new_out = out.copy()
+
+            if len(self.wires):
+                source = levels[:, self._wire_in].max(axis=2)
+                source[:, wire_slot] = driven_levels[:, is_wire]
+                wire = source
+                while True:
+                    padded = np.concatenate([wire, link_pad], axis=1)
+                    relaxed = np.maximum(source, padded[:, self._wire_links].max(axis=2) - 1)
+                    if np.array_equal(relaxed, wire):
+                        break
+                    wire = relaxed
+                new_out[:, self.wires] = wire
+
+            new_strong = np.zeros_like(strong)
+            new_weak = np.zeros_like(weak)
+            new_strong[:, self.solids] = levels[:, self._strong_in].max(axis=2)
+            new_weak[:, self.solids] = levels[:, self._weak_in].max(axis=2)
+            new_strong[:, solid_driven] = np.maximum(new_strong[:, solid_driven],
+                                                     driven_levels[:, is_solid])
+
+            new_out[:, self.torches] = np.where(levels[:, self._torch_in].max(axis=2) > 0, 0, MAX_SIGNAL)
+
+            rear = levels[:, self._rear_in].max(axis=2)
+            side = levels[:, self._side_in].max(axis=2)
+            compared = np.where(self._subtract, np.maximum(rear - side, 0), np.where(rear >= side, rear, 0))
+            new_out[:, self.diodes] = np.where(self._is_comparator, compared,
+                                               np.where(rear > 0, MAX_SIGNAL, 0))
+
+            new_out[:, self.lit] = np.where(levels[:, self._lit_in].max(axis=2) > 0, MAX_SIGNAL, 0)
+            new_out[:, held] = driven_levels[:, ~is_wire & ~is_solid]
+
+            changed = ((new_out != out).any(axis=1) | (new_strong != strong).any(axis=1)
+                       | (new_weak != weak).any(axis=1))
+            out, strong, weak = new_out, new_strong, new_weak
+            if not changed.any():
+                break
+        return BatchResult(sim, out, strong, weak, ~changed, rounds)
+
+
+@dataclass
+class TransferTable:
+    """
+    Settled outputs of a circuit over a grid of input levels.
+
+    values has shape (*[len(l) for l in levels], len(outputs)); settled
+    marks grid entries whose simulation reached a steady state.
+    """
+    circuit: str
+    inputs: List[str]
+    levels: List[np.ndarray]
+    outputs: List[str]
+    values: np.ndarray
+    settled: np.ndarray
+
+    def output(self, name: str) -> np.ndarray:
+        return self.values[..., self.outputs.index(name)]
+
+    def conservation_breaks(self) -> np.ndarray:
+        """
+        Grid mask of entries whose ALPHA/OMEGA inputs conserve (or that
+        have none) but whose ALPHA + OMEGA outputs do not sum to 15.
+        """
+        grid = self.values.shape[:-1]
+        if not {'alpha', 'omega'} <= set(self.outputs):
+            return np.zeros(grid, dtype=bool)
+        broken = self.output('alpha') + self.output('omega') != MAX_SIGNAL
+        if {'alpha', 'omega'} <= set(self.inputs):
+            a, o = self.inputs.index('alpha'), self.inputs.index('omega')
+            mesh = np.meshgrid(*self.levels, indexing='ij')
+            broken &= mesh[a] + mesh[o] == MAX_SIGNAL
+        return broken | ~self.settled
+
+    def violations(self) -> List[Tuple[Dict[str, int], Dict[str, int]]]:
+        """(inputs, outputs) for every entry flagged by conservation_breaks()"""
+        found = []
+        for index in zip(*np.nonzero(self.conservation_breaks())):
+            inputs = {name: int(self.levels[i][j]) for i, (name, j) in enumerate(zip(self.inputs, index))}
+            outputs = dict(zip(self.outputs, self.values[index].tolist()))
+            found.append((inputs, outputs))
+        return found
+
+    def select(self, **fixed: int) -> 'TransferTable':
+        """Slice the table at fixed levels of some inputs"""
+        index, inputs, levels = [], [], []
+        for name, values in zip(self.inputs, self.levels):
+            if name in fixed:
+                hits = np.flatnonzero(values == fixed[name])
+                if not len(hits):
+                    raise ValueError(f"{self.circuit} has no level {fixed[name]} for input '{name}'")
+                index.append(int(hits[0]))
+            else:
+                index.append(slice(None))
+                inputs.append(name)
+                levels.append(values)
+        unknown = set(fixed) - set(self.inputs)
+        if unknown:
+            raise KeyError(f"{self.circuit} has no input(s) {sorted(unknown)}")
+        index = tuple(index)
+        return TransferTable(self.circuit, inputs, levels, list(self.outputs),
+                             self.values[index], self.settled[index])
+
+
+def _input_levels(name: str) -> np.ndarray:
+    if name in ('alpha', 'omega'):
+        return np.arange(MAX_SIGNAL + 1, dtype=np.int16)
+    return np.array([0, MAX_SIGNAL], dtype=np.int16)   # levers and control rails
+
+
+def truth_table(circuit: Circuit, ports: Optional[Dict[str, List[Port]]] = None,
+                levels: Optional[Dict[str, np.ndarray]] = None, **options) -> TransferTable:
+    """
+    Evaluate a circuit over every combination of its input levels in one
+    batched pass.
+
+    ALPHA/OMEGA inputs take all 16 levels, other rails (controls, phase)
+    and levers are swept over off/on; levels overrides the levels of any
+    input. Levers not listed in the ports are added as extra inputs named
+    'lever@x,y,z'. ports defaults to GATE_PORTS[circuit.name].
+    """
+    ports = ports or GATE_PORTS.get(circuit.name)
+    if ports is None:
+        raise KeyError(f"No port map for circuit '{circuit.name}'")
+    batch_sim = BatchSimulator(circuit, **options)
+    sim = batch_sim.sim
+
+    inputs = list(ports['inputs'])
+    listed = {port.pos for port in inputs}
+    for node in batch_sim.levers.tolist():
+        pos = tuple(sim.positions[node].tolist())
+        if pos not in listed:
+            inputs.append(Port('lever@' + ','.join(map(str, pos)), pos))
+
+    axes = [np.asarray((levels or {}).get(port.name, _input_levels(port.name)), dtype=np.int16)
+            for port in inputs]
+    grid = tuple(len(axis) for axis in axes)
+    mesh = [m.reshape(-1) for m in np.meshgrid(*axes, indexing='ij')]
+    batch = int(np.prod(grid, dtype=np.int64))
+
+    drive, levers = {}, {}
+    for port, column in zip(inputs, mesh):
+        if sim.kind[sim.node_at(*port.pos)] == LEVER:
+            levers[port.pos] = column > 0
+        else:
+            drive[port.pos] = column
+    result = batch_sim.run(drive=drive, levers=levers, batch=batch)
+
+    values = np.stack([result.power(*port.pos) for port in ports['outputs']], axis=-1)
+    return TransferTable(
+        circuit=circuit.name,
+        inputs=[port.name for port in inputs],
+        levels=axes,
+        outputs=[port.name for port in ports['outputs']],
+        values=values.reshape(grid + (len(ports['outputs']),)),
+        settled=result.settled.reshape(grid),
+    )
+
+
+def compose_tables(tables: List[TransferTable]) -> TransferTable:
+    """
+    Chain tables that take the same inputs over the same levels (e.g.
+    alpha, omega over 0-15): each table's outputs of those names feed the
+    next table's inputs. Use select() first to fix any other inputs.
+    Entries whose outputs fall off the next table's level grid are marked
+    unsettled.
+    """
+    if not tables:
+        raise ValueError("compose_tables() needs at least one table")
+    first = tables[0]
+    for table in tables:
+        if (table.inputs != first.inputs
+                or any(not np.array_equal(a, b) for a, b in zip(table.levels, first.levels))):
+            raise ValueError(f"{table.circuit}: composable tables must share inputs "
+                             f"{first.inputs} and their levels")
+        missing = set(first.inputs) - set(table.outputs)
+        if missing:
+            raise ValueError(f"{table.circuit}: composable tables need outputs {sorted(missing)}")
+
+    # Level -> grid index along each input axis, -1 off the grid
+    slots = []
+    for level in first.levels:
+        slot = np.full(MAX_SIGNAL + 1, -1, dtype=np.int64)
+        slot[np.asarray(level, dtype=np.int64)] = np.arange(len(level))
+        slots.append(slot)
+
+    values = np.stack([first.output(name) for name in first.inputs], axis=-1)
+    settled = first.settled
+    for table in tables[1:]:
+        index = [slot[np.clip(values[..., i], 0, MAX_SIGNAL)] for i, slot in enumerate(slots)]
+        on_grid = np.logical_and.reduce([i >= 0 for i in index])
+        index = tuple(np.maximum(i, 0) for i in index)
+        settled = settled & on_grid & table.settled[index]
+        values = np.stack([table.output(name)[index] for name in first.inputs], axis=-1)
+    return TransferTable(
+        circuit=' -> '.join(table.circuit for table in tables),
+        inputs=list(first.inputs),
+        levels=list(first.levels),
+        outputs=list(first.inputs),
+        values=values,
+        settled=settled,
+    )
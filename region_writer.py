@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Offline World Writer for Quantum-Redstone Circuits
+Stamps placed circuits straight into a Java Edition world save
+(region/r.<x>.<z>.mca, Anvil format, 1.18+ chunk layout), with no server
+and no commands:
+
+- blocks from every circuit are resolved together (later placements win)
+  and grouped by region, chunk and 16x16x16 section
+- each touched section's palette and bit-packed block states are decoded,
+  overlaid and repacked once; untouched chunks are copied through as
+  compressed bytes
+- block entities come from Block.nbt and replace any at the same position
+- touched chunks drop their heightmaps and light so the game recomputes them
+
+Works on a copy of an existing world or on a new superflat world written
+with a level.dat. Chunks not yet generated are created as superflat chunks
+using the same layers.
+"""
+
+import gzip
+import os
+import shutil
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional, Iterable
+
+import numpy as np
+
+from quantum_circuit_generator import Circuit, resolve_placement
+from schematic import (
+    DATA_VERSION, AIR, TagByte, TagFloat, TagLong, decode_nbt, encode_nbt, palette_bits,
+    typed_block_entity,
+)
+
+SECTOR_BYTES = 4096
+REGION_CHUNKS = 32
+MAX_CHUNK_SECTORS = 255             # larger chunks go to an external c.<x>.<z>.mcc file
+
+COMPRESSION_GZIP = 1
+COMPRESSION_ZLIB = 2
+COMPRESSION_NONE = 3
+EXTERNAL_FLAG = 128
+
+# Overworld build limits (1.18+)
+MIN_Y = -64
+MAX_Y = 320                         # exclusive
+MIN_SECTION = MIN_Y // 16
+
+# Default superflat preset, bottom up from MIN_Y
+FLAT_LAYERS = (("minecraft:bedrock", 1), ("minecraft:dirt", 2), ("minecraft:grass_block", 1))
+FLAT_BIOME = "minecraft:plains"
+
+StateKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _state_key(block_id: str, properties: Optional[Dict] = None) -> StateKey:
+    """Order-independent block state key, as palettes store properties unordered"""
+    return block_id, tuple(sorted((k, str(v)) for k, v in (properties or {}).items()))
+
+
+def _intern(key: StateKey, keys: Dict[StateKey, int], states: List[StateKey]) -> int:
+    if key not in keys:
+        keys[key] = len(states)
+        states.append(key)
+    return keys[key]
+
+
+def _state_compound(key: StateKey) -> Dict:
+    block_id, props = key
+    return {'Name': block_id, 'Properties': dict(props)} if props else {'Name': block_id}
+
+
+# ============================================================================
+# SECTION PACKING
+# ============================================================================
+
+def pack_section_states(values: np.ndarray, bits: int) -> np.ndarray:
+    """
+    Pack palette indices into 64-bit longs without spanning long
+    boundaries (chunk section layout since 1.16), lowest bits first.
+    """
+    per_long = 64 // bits
+    count = -(-len(values) // per_long)
+    padded = np.zeros(count * per_long, dtype=np.uint64)
+    padded[:len(values)] = values
+    shifts = np.arange(per_long, dtype=np.uint64) * np.uint64(bits)
+    return np.bitwise_or.reduce(padded.reshape(count, per_long) << shifts, axis=1).view(np.int64)
+
+
+def unpack_section_states(longs: np.ndarray, bits: int, count: int = 4096) -> np.ndarray:
+    """Inverse of pack_section_states"""
+    per_long = 64 // bits
+    shifts = np.arange(per_long, dtype=np.uint64) * np.uint64(bits)
+    mask = np.uint64((1 << bits) - 1)
+    values = (np.asarray(longs).view(np.uint64)[:, None] >> shifts) & mask
+    return values.reshape(-1)[:count].astype(np.int64)
+
+
+def _section_volume(section: Dict, keys: Dict[StateKey, int], states: List[StateKey]) -> np.ndarray:
+    """Decode a section's block states into global state ids (y, z, x order)"""
+    block_states = section.get('block_states')
+    if not block_states or not block_states.get('palette'):
+        return np.full(4096, _intern(_state_key(AIR), keys, states), dtype=np.int64)
+    remap = np.array([_intern(_state_key(entry['Name'], entry.get('Properties')), keys, states)
+                      for entry in block_states['palette']], dtype=np.int64)
+    if len(remap) == 1 or 'data' not in block_states:
+        return np.full(4096, remap[0], dtype=np.int64)
+    bits = palette_bits(len(remap), minimum=4)
+    return remap[unpack_section_states(block_states['data'], bits)]
+
+
+def _encode_section_states(volume: np.ndarray, states: List[StateKey]) -> Dict:
+    used = np.flatnonzero(np.bincount(volume, minlength=len(states)))
+    block_states = {'palette': [_state_compound(states[s]) for s in used.tolist()]}
+    if len(used) > 1:
+        local = np.zeros(len(states), dtype=np.int64)
+        local[used] = np.arange(len(used))
+        block_states['data'] = pack_section_states(local[volume], palette_bits(len(used), minimum=4))
+    return block_states
+
+
+# ============================================================================
+# REGION FILES
+# ============================================================================
+
+class RegionFile:
+    """
+    One r.<x>.<z>.mca file: a sector table and compressed chunk NBT.
+    Chunks are kept as raw stored bytes until read or replaced.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.chunks: Dict[int, bytes] = {}          # chunk index -> compression byte + payload
+        self.timestamps = np.zeros(REGION_CHUNKS * REGION_CHUNKS, dtype='>u4')
+        if self.path.exists() and self.path.stat().st_size >= 2 * SECTOR_BYTES:
+            self._load()
+
+    def _load(self):
+        data = self.path.read_bytes()
+        locations = np.frombuffer(data, dtype='>u4', count=1024)
+        self.timestamps = np.frombuffer(data, dtype='>u4', count=1024, offset=SECTOR_BYTES).copy()
+        for index in np.flatnonzero(locations).tolist():
+            start = int(locations[index] >> 8) * SECTOR_BYTES
+            (length,) = struct.unpack_from('>i', data, start)
+            if length <= 0 or start + 4 + length > len(data):
+                continue            # damaged entry: the game regenerates it too
+            self.chunks[index] = data[start + 4:start + 4 + length]
+
+    @staticmethod
+    def index(cx: int, cz: int) -> int:
+        return (cx % REGION_CHUNKS) + (cz % REGION_CHUNKS) * REGION_CHUNKS
+
+    def _external_path(self, cx: int, cz: int) -> Path:
+        return self.path.with_name(f"c.{cx}.{cz}.mcc")
+
+    def read(self, cx: int, cz: int) -> Optional[Dict]:
+        """Decoded chunk root compound, or None if the chunk was never saved"""
+        stored = self.chunks.get(self.index(cx, cz))
+        if stored is None:
+            return None
+        compression, payload = stored[0], stored[1:]
+        if compression & EXTERNAL_FLAG:
+            compression &= ~EXTERNAL_FLAG
+            payload = self._external_path(cx, cz).read_bytes()
+        if compression == COMPRESSION_ZLIB:
+            payload = zlib.decompress(payload)
+        elif compression == COMPRESSION_GZIP:
+            payload = gzip.decompress(payload)
+        elif compression != COMPRESSION_NONE:
+            raise ValueError(f"{self.path}: chunk {cx} {cz} uses unsupported compression {compression}")
+        return decode_nbt(payload)[1]
+
+    def write(self, cx: int, cz: int, chunk: Dict):
+        payload = zlib.compress(encode_nbt(chunk), 6)
+        external = self._external_path(cx, cz)
+        if (len(payload) + 5 + SECTOR_BYTES - 1) // SECTOR_BYTES > MAX_CHUNK_SECTORS:
+            external.parent.mkdir(parents=True, exist_ok=True)
+            external.write_bytes(payload)
+            stored = bytes([COMPRESSION_ZLIB | EXTERNAL_FLAG])
+        else:
+            if external.exists():
+                external.unlink()
+            stored = bytes([COMPRESSION_ZLIB]) + payload
+        self.chunks[self.index(cx, cz)] = stored
+        self.timestamps[self.index(cx, cz)] = int(time.time())
+
+    def save(self):
+        """Rewrite the file with chunks packed in index order"""
+        locations = np.zeros(1024, dtype='>u4')
+        body = []
+        sector = 2
+        for index in sorted(self.chunks):
+            stored = self.chunks[index]
+            record = struct.pack('>i', len(stored)) + stored
+            sectors = -(-len(record) // SECTOR_BYTES)
+            body.append(record + b'\x00' * (sectors * SECTOR_BYTES - len(record)))
+            locations[index] = (sector << 8) | sectors
+            sector += sectors
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix('.mca.tmp')
+        with open(temporary, 'wb') as f:
+            f.write(locations.tobytes())
+            f.write(self.timestamps.astype('>u4').tobytes())
+            f.writelines(body)
+        os.replace(temporary, self.path)
+
+
+# ============================================================================
+# WORLD WRITER
+# ============================================================================
+
+@dataclass
+class WorldWriteStats:
+    """What a write_circuits call touched"""
+    blocks: int
+    block_entities: int
+    sections: int
+    chunks: int
+    created_chunks: int
+    regions: int
+    elapsed: float
+
+    def summary(self) -> str:
+        return (f"{self.blocks} blocks, {self.block_entities} block entities in {self.sections} sections, "
+                f"{self.chunks} chunks ({self.created_chunks} new), {self.regions} region files, "
+                f"{self.elapsed:.2f} s")
+
+
+def _flat_sections(layers: Iterable[Tuple[str, int]], keys: Dict[StateKey, int],
+                   states: List[StateKey]) -> Dict[int, np.ndarray]:
+    """Section volumes of a superflat chunk, keyed by section y"""
+    air = _intern(_state_key(AIR), keys, states)
+    column = []
+    for block_id, height in layers:
+        column.extend([_intern(_state_key(block_id), keys, states)] * height)
+    sections = {}
+    for start in range(0, len(column), 16):
+        levels = np.array(column[start:start + 16] + [air] * (16 - len(column[start:start + 16])))
+        sections[MIN_SECTION + start // 16] = np.repeat(levels, 256).astype(np.int64)
+    return sections
+
+
+def _new_chunk(cx: int, cz: int) -> Dict:
+    return {
+        'DataVersion': DATA_VERSION,
+        'xPos': cx,
+        'yPos': MIN_SECTION,
+        'zPos': cz,
+        'Status': 'minecraft:full',
+        'LastUpdate': TagLong(0),
+        'InhabitedTime': TagLong(0),
+        'sections': [],
+        'block_entities': [],
+        'block_ticks': [],
+        'fluid_ticks': [],
+        'PostProcessing': [],
+        'structures': {'References': {}, 'starts': {}},
+    }
+
+
+def _gather(placements: Iterable[Tuple[Circuit, Tuple[int, int, int]]],
+            keys: Dict[StateKey, int], states: List[StateKey]):
+    """
+    World positions and global state ids of every placement, with later
+    blocks winning a shared position, plus {index: (block_id, nbt)} for
+    the surviving blocks that carry NBT.
+    """
+    positions, state_ids, nbt = [], [], {}
+    offset = 0
+    for circuit, origin in placements:
+        store = circuit.blocks
+        local, ids, rows = resolve_placement(store)
+        remap = np.array([_intern(_state_key(block_id, props), keys, states)
+                          for block_id, props in store.palette], dtype=np.int64)
+        positions.append(local.astype(np.int64) + np.asarray(origin, dtype=np.int64))
+        state_ids.append(remap[ids] if len(ids) else np.empty(0, dtype=np.int64))
+        if store.nbt:
+            for i in np.flatnonzero(np.isin(rows, list(store.nbt))).tolist():
+                nbt[offset + i] = (store.palette[ids[i]][0], store.nbt[int(rows[i])])
+        offset += len(rows)
+    if not offset:
+        return np.empty((0, 3), dtype=np.int64), np.empty(0, dtype=np.int64), {}
+    positions = np.concatenate(positions)
+    state_ids = np.concatenate(state_ids)
+
+    low, high = positions[:, 1].min(), positions[:, 1].max()
+    if low < MIN_Y or high >= MAX_Y:
+        raise ValueError(f"blocks span y {low}..{high}, outside the world's {MIN_Y}..{MAX_Y - 1}")
+    shifted = positions - positions.min(axis=0)
+    extent = shifted.max(axis=0) + 1
+    flat = (shifted[:, 1] * extent[2] + shifted[:, 2]) * extent[0] + shifted[:, 0]
+    _, reversed_index = np.unique(flat[::-1], return_index=True)
+    winners = len(flat) - 1 - reversed_index
+    entities = {}
+    if nbt:
+        for i in np.flatnonzero(np.isin(winners, list(nbt))).tolist():
+            entities[i] = nbt[int(winners[i])]
+    return positions[winners], state_ids[winners], entities
+
+
+def write_circuits(world_dir: str, placements: Iterable[Tuple[Circuit, Tuple[int, int, int]]],
+                   layers: Iterable[Tuple[str, int]] = FLAT_LAYERS) -> WorldWriteStats:
+    """
+    Write circuits placed at absolute origins into the overworld region
+    files of world_dir. Chunks that do not exist yet are created as
+    superflat chunks with the given layers. Close the game or server
+    first: it overwrites region files it has open.
+    """
+    started = time.perf_counter()
+    keys: Dict[StateKey, int] = {}
+    states: List[StateKey] = []
+    positions, state_ids, entities = _gather(placements, keys, states)
+    flat = _flat_sections(layers, keys, states)
+    air = keys[_state_key(AIR)]
+
+    sections = positions >> 4
+    order = np.lexsort((sections[:, 1], sections[:, 2], sections[:, 0],
+                        sections[:, 2] >> 5, sections[:, 0] >> 5))
+    positions, state_ids, sections = positions[order], state_ids[order], sections[order]
+    sorted_at = np.empty_like(order)
+    sorted_at[order] = np.arange(len(order))
+    entity_at = {int(sorted_at[i]): value for i, value in entities.items()}
+    local = ((positions[:, 1] & 15) * 16 + (positions[:, 2] & 15)) * 16 + (positions[:, 0] & 15)
+
+    region_dir = Path(world_dir) / "region"
+    chunk_keys = sections[:, [0, 2]]
+    chunk_breaks = np.flatnonzero(np.any(chunk_keys[1:] != chunk_keys[:-1], axis=1)) + 1
+    chunk_starts, chunk_ends = np.r_[0, chunk_breaks], np.r_[chunk_breaks, len(positions)]
+    region, region_key = None, None
+    regions = 0
+    created = section_count = 0
+    for start, end in zip(chunk_starts.tolist(), chunk_ends.tolist()):
+        cx, cz = int(chunk_keys[start, 0]), int(chunk_keys[start, 1])
+        rx, rz = cx >> 5, cz >> 5
+        if region is None or (rx, rz) != region_key:
+            if region is not None:
+                region.save()
+            region, region_key = RegionFile(region_dir / f"r.{rx}.{rz}.mca"), (rx, rz)
+            regions += 1
+
+        chunk = region.read(cx, cz)
+        volumes: Dict[int, np.ndarray] = {}
+        if chunk is None:
+            chunk = _new_chunk(cx, cz)
+            volumes = {y: volume.copy() for y, volume in flat.items()}
+            created += 1
+        by_y = {int(section['Y']): section for section in chunk.get('sections', [])}
+
+        ys = sections[start:end, 1]
+        y_breaks = np.r_[start, start + np.flatnonzero(ys[1:] != ys[:-1]) + 1, end]
+        for lo, hi in zip(y_breaks[:-1].tolist(), y_breaks[1:].tolist()):
+            sy = int(sections[lo, 1])
+            if sy not in volumes:
+                volumes[sy] = (_section_volume(by_y[sy], keys, states) if sy in by_y
+                               else np.full(4096, air, dtype=np.int64))
+            volumes[sy][local[lo:hi]] = state_ids[lo:hi]
+            section_count += 1
+
+        for sy, volume in volumes.items():
+            section = by_y.setdefault(sy, {'Y': TagByte(sy), 'biomes': {'palette': [FLAT_BIOME]}})
+            section['block_states'] = _encode_section_states(volume, states)
+            section.pop('BlockLight', None)
+            section.pop('SkyLight', None)
+        chunk['sections'] = [by_y[y] for y in sorted(by_y)]
+
+        # Placed blocks replace whatever block entity stood there
+        kept = chunk.get('block_entities', [])
+        if kept:
+            written = {tuple(p) for p in positions[start:end].tolist()}
+            kept = [entity for entity in kept
+                    if (entity.get('x'), entity.get('y'), entity.get('z')) not in written]
+        for i in range(start, end):
+            if i in entity_at:
+                block_id, nbt = entity_at[i]
+                x, y, z = positions[i].tolist()
+                entity = {'id': block_id, 'x': x, 'y': y, 'z': z, 'keepPacked': TagByte(0)}
+                entity.update(typed_block_entity(nbt))
+                kept.append(entity)
+        chunk['block_entities'] = kept
+
+        chunk.pop('Heightmaps', None)
+        chunk['isLightOn'] = TagByte(0)
+        region.write(cx, cz, chunk)
+    if region is not None:
+        region.save()
+
+    return WorldWriteStats(
+        blocks=len(positions),
+        block_entities=len(entity_at),
+        sections=section_count,
+        chunks=len(chunk_starts) if len(positions) else 0,
+        created_chunks=created,
+        regions=regions,
+        elapsed=time.perf_counter() - started,
+    )
+
+
+# ============================================================================
+# WORLDS
+# ============================================================================
+
+def flat_level_data(name: str, layers: Iterable[Tuple[str, int]] = FLAT_LAYERS,
+                    spawn: Tuple[int, int, int] = (0, MIN_Y + 4, 0), seed: int = 0) -> Dict:
+    """level.dat root compound for a creative superflat world"""
+    dimensions = {
+        'minecraft:overworld': {
+            'type': 'minecraft:overworld',
+            'generator': {
+                'type': 'minecraft:flat',
+                'settings': {
+                    'layers': [{'block': block_id, 'height': height} for block_id, height in layers],
+                    'biome': FLAT_BIOME,
+                    'features': TagByte(0),
+                    'lakes': TagByte(0),
+                    'structure_overrides': [],
+                },
+            },
+        },
+        'minecraft:the_nether': {
+            'type': 'minecraft:the_nether',
+            'generator': {'type': 'minecraft:noise', 'settings': 'minecraft:nether',
+                          'biome_source': {'type': 'minecraft:multi_noise', 'preset': 'minecraft:nether'}},
+        },
+        'minecraft:the_end': {
+            'type': 'minecraft:the_end',
+            'generator': {'type': 'minecraft:noise', 'settings': 'minecraft:end',
+                          'biome_source': {'type': 'minecraft:the_end'}},
+        },
+    }
+    return {'Data': {
+        'DataVersion': DATA_VERSION,
+        'version': 19133,
+        'Version': {'Id': DATA_VERSION, 'Name': '1.20.1', 'Series': 'main', 'Snapshot': TagByte(0)},
+        'LevelName': name,
+        'GameType': 1,
+        'Difficulty': TagByte(0),
+        'allowCommands': TagByte(1),
+        'hardcore': TagByte(0),
+        'initialized': TagByte(1),
+        'LastPlayed': TagLong(int(time.time() * 1000)),
+        'Time': TagLong(0),
+        'DayTime': TagLong(6000),
+        'SpawnX': spawn[0],
+        'SpawnY': spawn[1],
+        'SpawnZ': spawn[2],
+        'SpawnAngle': TagFloat(0.0),
+        'DataPacks': {'Enabled': ['vanilla'], 'Disabled': []},
+        'WorldGenSettings': {
+            'seed': TagLong(seed),
+            'generate_features': TagByte(0),
+            'bonus_chest': TagByte(0),
+            'dimensions': dimensions,
+        },
+    }}
+
+
+def create_flat_world(world_dir: str, name: Optional[str] = None,
+                      layers: Iterable[Tuple[str, int]] = FLAT_LAYERS) -> Path:
+    """Start a new superflat world: writes level.dat and an empty region directory"""
+    path = Path(world_dir)
+    if (path / "level.dat").exists():
+        raise ValueError(f"{path} already contains a world")
+    (path / "region").mkdir(parents=True, exist_ok=True)
+    level = flat_level_data(name or path.name, tuple(layers))
+    (path / "level.dat").write_bytes(gzip.compress(encode_nbt(level)))
+    return path
+
+
+def copy_world(source: str, world_dir: str) -> Path:
+    """Copy an existing world to write into, leaving the original untouched"""
+    if not (Path(source) / "level.dat").exists():
+        raise ValueError(f"{source} is not a world save (no level.dat)")
+    if Path(world_dir).exists():
+        raise ValueError(f"{world_dir} already exists")
+    shutil.copytree(source, world_dir, ignore=shutil.ignore_patterns('session.lock'))
+    return Path(world_dir)
+
+
+def stamp_world(world_dir: str, placements: Iterable[Tuple[Circuit, Tuple[int, int, int]]],
+                source: Optional[str] = None,
+                layers: Iterable[Tuple[str, int]] = FLAT_LAYERS) -> WorldWriteStats:
+    """
+    Write placements into world_dir: a copy of source if given, an existing
+    world, or else a new superflat world.
+    """
+    layers = tuple(layers)
+    if source is not None:
+        copy_world(source, world_dir)
+    elif not (Path(world_dir) / "level.dat").exists():
+        create_flat_world(world_dir, layers=layers)
+    stats = write_circuits(world_dir, placements, layers)
+    print(f"Exported world: {world_dir} ({stats.summary()})")
+    return stats
@@ -0,0 +1,705 @@
+#!/usr/bin/env python3
+"""
+Schematic Export for Quantum-Redstone Circuits
+Writes circuits as gzip-compressed binary NBT, and reads them back:
+- .schem (Sponge schematic v2: WorldEdit, FAWE; v3 is also read)
+- .litematic (Litematica)
+- .nbt (vanilla structure block)
+"""
+
+import gzip
+import struct
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from quantum_circuit_generator import (
+    NBT_BYTE_KEYS, BlockStore, Circuit, format_block_state, resolve_placement,
+)
+
+# Minecraft 1.20.1: item NBT still uses the byte "Count" the generators emit
+DATA_VERSION = 3465
+
+LITEMATIC_VERSION = 5
+SPONGE_VERSION = 2
+
+AIR = "minecraft:air"
+
+
+# ============================================================================
+# NBT ENCODING
+# ============================================================================
+
+TAG_END = 0
+TAG_BYTE = 1
+TAG_SHORT = 2
+TAG_INT = 3
+TAG_LONG = 4
+TAG_FLOAT = 5
+TAG_DOUBLE = 6
+TAG_BYTE_ARRAY = 7
+TAG_STRING = 8
+TAG_LIST = 9
+TAG_COMPOUND = 10
+TAG_INT_ARRAY = 11
+TAG_LONG_ARRAY = 12
+
+
+class TagByte(int):
+    """int written as TAG_Byte"""
+    snbt_suffix = 'b'
+
+
+class TagShort(int):
+    """int written as TAG_Short"""
+    snbt_suffix = 's'
+
+
+class TagLong(int):
+    """int written as TAG_Long"""
+    snbt_suffix = 'L'
+
+
+class TagFloat(float):
+    """float written as TAG_Float"""
+    snbt_suffix = 'f'
+
+
+_SCALAR_FORMATS = {
+    TAG_BYTE: '>b',
+    TAG_SHORT: '>h',
+    TAG_INT: '>i',
+    TAG_LONG: '>q',
+    TAG_FLOAT: '>f',
+    TAG_DOUBLE: '>d',
+}
+
+_SCALAR_STRUCTS = {tag: struct.Struct(fmt) for tag, fmt in _SCALAR_FORMATS.items()}
+
+_ARRAY_DTYPES = {
+    TAG_BYTE_ARRAY: '>i1',
+    TAG_INT_ARRAY: '>i4',
+    TAG_LONG_ARRAY: '>i8',
+}
+
+# Keys whose integer values are bytes in block entity NBT
+_BYTE_KEYS = NBT_BYTE_KEYS
+
+
+# Exact types resolved without walking the isinstance chain in tag_type
+_EXACT_TAGS = {
+    TagByte: TAG_BYTE,
+    bool: TAG_BYTE,
+    TagShort: TAG_SHORT,
+    TagLong: TAG_LONG,
+    int: TAG_INT,
+    TagFloat: TAG_FLOAT,
+    float: TAG_DOUBLE,
+    str: TAG_STRING,
+    dict: TAG_COMPOUND,
+    list: TAG_LIST,
+}
+
+
+def tag_type(value) -> int:
+    """Map a Python value to its NBT tag id"""
+    tag = _EXACT_TAGS.get(type(value))
+    if tag is not None:
+        return tag
+    if isinstance(value, TagByte) or isinstance(value, bool):
+        return TAG_BYTE
+    if isinstance(value, TagShort):
+        return TAG_SHORT
+    if isinstance(value, TagLong):
+        return TAG_LONG
+    if isinstance(value, int):
+        return TAG_INT
+    if isinstance(value, TagFloat):
+        return TAG_FLOAT
+    if isinstance(value, float):
+        return TAG_DOUBLE
+    if isinstance(value, str):
+        return TAG_STRING
+    if isinstance(value, (bytes, bytearray)):
+        return TAG_BYTE_ARRAY
+    if isinstance(value, np.ndarray):
+        if value.dtype.itemsize == 1:
+            return TAG_BYTE_ARRAY
+        if value.dtype.itemsize == 4:
+            return TAG_INT_ARRAY
+        if value.dtype.itemsize == 8:
+            return TAG_LONG_ARRAY
+        raise TypeError(f"No NBT array tag for dtype {value.dtype}")
+    if isinstance(value, dict):
+        return TAG_COMPOUND
+    if isinstance(value, (list, tuple)):
+        return TAG_LIST
+    raise TypeError(f"Cannot encode {type(value).__name__} as NBT")
+
+
+def _write_string(out: BytesIO, text: str):
+    data = text.encode('utf-8')
+    out.write(struct.pack('>H', len(data)))
+    out.write(data)
+
+
+def _write_payload(out: BytesIO, tag: int, value):
+    scalar = _SCALAR_STRUCTS.get(tag)
+    if scalar is not None:
+        out.write(scalar.pack(value))
+    elif tag == TAG_STRING:
+        _write_string(out, value)
+    elif tag in _ARRAY_DTYPES:
+        array = np.frombuffer(value, dtype=np.uint8) if isinstance(value, (bytes, bytearray)) else value
+        out.write(struct.pack('>i', len(array)))
+        out.write(np.ascontiguousarray(array).astype(_ARRAY_DTYPES[tag], copy=False).tobytes())
+    elif tag == TAG_LIST:
+        element = tag_type(value[0]) if len(value) else TAG_END
+        out.write(struct.pack('>bi', element, len(value)))
+        for item in value:
+            if tag_type(item) != element:
+                raise TypeError("NBT lists must hold a single tag type")
+            _write_payload(out, element, item)
+    elif tag == TAG_COMPOUND:
+        for key, item in value.items():
+            item_tag = tag_type(item)
+            out.write(struct.pack('>b', item_tag))
+            _write_string(out, key)
+            _write_payload(out, item_tag, item)
+        out.write(b'\x00')
+
+
+def encode_nbt(root: Dict, name: str = "") -> bytes:
+    """Encode a compound as an uncompressed named root tag"""
+    out = BytesIO()
+    out.write(struct.pack('>b', TAG_COMPOUND))
+    _write_string(out, name)
+    _write_payload(out, TAG_COMPOUND, root)
+    return out.getvalue()
+
+
+def write_nbt_file(path: str, root: Dict, name: str = ""):
+    """Write a gzip-compressed NBT file"""
+    Path(path).write_bytes(gzip.compress(encode_nbt(root, name)))
+
+
+# ============================================================================
+# NBT DECODING
+# ============================================================================
+
+# Decoded scalars keep their tag type, so a decoded tree re-encodes unchanged
+_SCALAR_TYPES = {
+    TAG_BYTE: TagByte,
+    TAG_SHORT: TagShort,
+    TAG_INT: int,
+    TAG_LONG: TagLong,
+    TAG_FLOAT: TagFloat,
+    TAG_DOUBLE: float,
+}
+_NATIVE_DTYPES = {TAG_BYTE_ARRAY: np.int8, TAG_INT_ARRAY: np.int32, TAG_LONG_ARRAY: np.int64}
+_INT = struct.Struct('>i')
+_USHORT = struct.Struct('>H')
+
+
+def _read_string(data: bytes, pos: int) -> Tuple[str, int]:
+    (length,) = _USHORT.unpack_from(data, pos)
+    pos += 2
+    return data[pos:pos + length].decode('utf-8', errors='replace'), pos + length
+
+
+def _read_payload(data: bytes, pos: int, tag: int):
+    scalar = _SCALAR_STRUCTS.get(tag)
+    if scalar is not None:
+        return _SCALAR_TYPES[tag](scalar.unpack_from(data, pos)[0]), pos + scalar.size
+    if tag == TAG_STRING:
+        return _read_string(data, pos)
+    if tag in _ARRAY_DTYPES:
+        (length,) = _INT.unpack_from(data, pos)
+        dtype = np.dtype(_ARRAY_DTYPES[tag])
+        array = np.frombuffer(data, dtype=dtype, count=length, offset=pos + 4)
+        return array.astype(_NATIVE_DTYPES[tag]), pos + 4 + length * dtype.itemsize
+    if tag == TAG_LIST:
+        element, length = struct.unpack_from('>bi', data, pos)
+        pos += 5
+        scalar = _SCALAR_STRUCTS.get(element)
+        if scalar is not None:
+            # Numeric lists unpack in one call
+            fmt = scalar.format[1:]
+            values = struct.unpack_from(f'>{length}{fmt}', data, pos)
+            return [_SCALAR_TYPES[element](v) for v in values], pos + length * scalar.size
+        items = []
+        for _ in range(max(length, 0)):
+            item, pos = _read_payload(data, pos, element)
+            items.append(item)
+        return items, pos
+    if tag == TAG_COMPOUND:
+        compound = {}
+        while True:
+            item_tag = data[pos]
+            if item_tag == TAG_END:
+                return compound, pos + 1
+            (length,) = _USHORT.unpack_from(data, pos + 1)
+            pos += 3 + length
+            key = data[pos - length:pos].decode('utf-8', errors='replace')
+            # Scalars and strings, the bulk of most trees, are read inline
+            scalar = _SCALAR_STRUCTS.get(item_tag)
+            if scalar is not None:
+                compound[key] = _SCALAR_TYPES[item_tag](scalar.unpack_from(data, pos)[0])
+                pos += scalar.size
+            elif item_tag == TAG_STRING:
+                compound[key], pos = _read_string(data, pos)
+            else:
+                compound[key], pos = _read_payload(data, pos, item_tag)
+    raise ValueError(f"Unknown NBT tag id {tag} at byte {pos}")
+
+
+def decode_nbt(data: bytes) -> Tuple[str, Dict]:
+    """Decode an uncompressed named root compound; returns (name, compound)"""
+    if not data or data[0] != TAG_COMPOUND:
+        raise ValueError("NBT data does not start with a compound tag")
+    name, pos = _read_string(data, 1)
+    root, _ = _read_payload(data, pos, TAG_COMPOUND)
+    return name, root
+
+
+def read_nbt_file(path: str) -> Tuple[str, Dict]:
+    """Read an NBT file, gzip-compressed or not; returns (name, compound)"""
+    data = Path(path).read_bytes()
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+    return decode_nbt(data)
+
+
+def typed_block_entity(nbt: Dict) -> Dict:
+    """Convert JSON-style block entity NBT, casting Slot/Count to bytes"""
+    def convert(key, value):
+        if isinstance(value, dict):
+            return {k: convert(k, v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [convert(key, v) for v in value]
+        if key in _BYTE_KEYS and isinstance(value, int):
+            return TagByte(value)
+        return value
+    return convert(None, nbt)
+
+
+# ============================================================================
+# BLOCK DATA PACKING
+# ============================================================================
+
+def encode_varints(values: np.ndarray) -> np.ndarray:
+    """Encode non-negative integers as LEB128 varints, returning a uint8 array"""
+    values = np.asarray(values, dtype=np.uint32)
+    widths = np.ones(len(values), dtype=np.int64)
+    for shift in (7, 14, 21, 28):
+        widths += values >= (1 << shift)
+    if widths.max(initial=1) == 1:
+        return values.astype(np.uint8)
+
+    starts = np.cumsum(widths) - widths
+    out = np.empty(int(widths.sum()), dtype=np.uint8)
+    for k in range(int(widths.max())):
+        mask = widths > k
+        chunk = (values[mask] >> (7 * k)) & 0x7F
+        more = (widths[mask] > k + 1).astype(np.uint32) << 7
+        out[starts[mask] + k] = chunk | more
+    return out
+
+
+def pack_long_array(values: np.ndarray, bits: int) -> np.ndarray:
+    """
+    Pack integers into 64-bit longs with values spanning long boundaries
+    (Litematica layout), least-significant bit first.
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    shifts = np.arange(bits, dtype=np.uint64)
+    stream = ((values[:, None] >> shifts) & np.uint64(1)).astype(np.uint8).ravel()
+    padded = -len(stream) % 64
+    if padded:
+        stream = np.concatenate([stream, np.zeros(padded, dtype=np.uint8)])
+    return np.packbits(stream, bitorder='little').view('<i8')
+
+
+def decode_varints(data: np.ndarray, count: int = -1) -> np.ndarray:
+    """Decode LEB128 varints from a byte array (inverse of encode_varints)"""
+    data = np.asarray(data).view(np.uint8)
+    if not len(data) or data.max() < 0x80:
+        values = data.astype(np.int64)
+    else:
+        ends = np.flatnonzero(data < 0x80)
+        if not len(ends) or ends[-1] != len(data) - 1:
+            raise ValueError("varint data ends inside a value")
+        starts = np.r_[0, ends[:-1] + 1]
+        # Byte k of a value carries bits 7k..7k+6
+        place = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+        if place.max() > 4:
+            raise ValueError("varint longer than 5 bytes")
+        parts = (data & 0x7F).astype(np.int64) << (7 * place)
+        values = np.bitwise_or.reduceat(parts, starts)
+    if count >= 0:
+        if len(values) < count:
+            raise ValueError(f"expected {count} varints, found {len(values)}")
+        values = values[:count]
+    return values
+
+
+def unpack_long_array(longs: np.ndarray, bits: int, count: int) -> np.ndarray:
+    """Inverse of pack_long_array: count values spanning long boundaries"""
+    longs = np.asarray(longs, dtype=np.int64).view(np.uint64)
+    if count * bits > len(longs) * 64:
+        raise ValueError(f"{len(longs)} longs cannot hold {count} values of {bits} bits")
+    # Every 64 values fill exactly `bits` longs with the same layout, so
+    # each of the 64 slots is one vector operation over all periods
+    periods = -(-count // 64)
+    words = np.zeros(periods * bits, dtype=np.uint64)
+    words[:len(longs)] = longs[:len(words)]
+    words = np.ascontiguousarray(words.reshape(periods, bits).T)
+    mask = np.uint64((1 << bits) - 1)
+    values = np.empty((64, periods), dtype=np.int64)
+    column = np.empty(periods, dtype=np.uint64)
+    for slot in range(64):
+        word, shift = divmod(slot * bits, 64)
+        np.right_shift(words[word], np.uint64(shift), out=column)
+        if shift + bits > 64:
+            column |= words[word + 1] << np.uint64(64 - shift)
+        column &= mask
+        values[slot] = column.view(np.int64)
+    return values.T.reshape(-1)[:count]
+
+
+def palette_bits(palette_size: int, minimum: int = 2) -> int:
+    """Bits per entry needed to index a palette"""
+    return max(minimum, int(palette_size - 1).bit_length())
+
+
+def _dense_volume(circuit: Circuit) -> Tuple[np.ndarray, np.ndarray, List[str], np.ndarray, np.ndarray]:
+    """
+    Flatten a circuit into a dense volume over its bounding box.
+
+    Returns (origin, size, state_names, volume, rows): volume holds indices
+    into state_names in (y, z, x) order with 0 = air, and rows are the
+    store rows left after repeated positions are resolved.
+    """
+    store = circuit.blocks
+    positions, state_ids, rows = resolve_placement(store)
+    if not len(positions):
+        return (np.zeros(3, dtype=np.int64), np.ones(3, dtype=np.int64),
+                [AIR], np.zeros(1, dtype=np.int64), rows)
+
+    origin = positions.min(axis=0).astype(np.int64)
+    local = positions.astype(np.int64) - origin
+    size = local.max(axis=0) + 1
+
+    used, remap = np.unique(state_ids, return_inverse=True)
+    state_names = [AIR] + [format_block_state(*store.palette[s]) for s in used.tolist()]
+
+    volume = np.zeros(int(np.prod(size)), dtype=np.int64)
+    index = (local[:, 1] * size[2] + local[:, 2]) * size[0] + local[:, 0]
+    volume[index] = remap.reshape(-1) + 1
+    return origin, size, state_names, volume, rows
+
+
+def _block_entities(circuit: Circuit, rows: np.ndarray, origin: np.ndarray):
+    """Yield (block_id, local (x, y, z), typed nbt) for surviving rows with NBT"""
+    store = circuit.blocks
+    for row in sorted(int(r) for r in rows if int(r) in store.nbt):
+        x, y, z = (int(v) for v in store.positions[row] - origin)
+        block_id, _ = store.state(row)
+        yield block_id, (x, y, z), typed_block_entity(store.nbt[row])
+
+
+def _state_compound(state_name: str) -> Dict:
+    """Split 'id[k=v,...]' into a {Name, Properties} palette compound"""
+    if '[' not in state_name:
+        return {'Name': state_name}
+    block_id, props = state_name[:-1].split('[', 1)
+    return {
+        'Name': block_id,
+        'Properties': dict(item.split('=', 1) for item in props.split(','))
+    }
+
+
+# ============================================================================
+# FORMAT WRITERS
+# ============================================================================
+
+def circuit_to_schem(circuit: Circuit) -> Dict:
+    """Build the Sponge schematic v2 root compound for a circuit"""
+    origin, size, state_names, volume, rows = _dense_volume(circuit)
+    width, height, length = (int(v) for v in size)
+    if max(width, height, length) > 0xFFFF:
+        raise ValueError(f"{circuit.name} exceeds the 65535-block schematic extent")
+
+    entities = []
+    for block_id, (x, y, z), nbt in _block_entities(circuit, rows, origin):
+        entity = {'Pos': np.array([x, y, z], dtype=np.int32), 'Id': block_id}
+        entity.update(nbt)
+        entities.append(entity)
+
+    return {
+        'Version': SPONGE_VERSION,
+        'DataVersion': DATA_VERSION,
+        'Metadata': {'Name': circuit.name, 'Author': 'Hope&&Sauced Collaborative'},
+        # Sponge stores extents as unsigned shorts; TAG_Short is signed
+        'Width': TagShort(width - 0x10000 if width > 0x7FFF else width),
+        'Height': TagShort(height - 0x10000 if height > 0x7FFF else height),
+        'Length': TagShort(length - 0x10000 if length > 0x7FFF else length),
+        'Offset': np.array(origin, dtype=np.int32),
+        'PaletteMax': len(state_names),
+        'Palette': {name: i for i, name in enumerate(state_names)},
+        'BlockData': encode_varints(volume),
+        'BlockEntities': entities,
+    }
+
+
+def circuit_to_litematic(circuit: Circuit, author: str = "Hope&&Sauced Collaborative") -> Dict:
+    """Build the Litematica root compound (one region) for a circuit"""
+    origin, size, state_names, volume, rows = _dense_volume(circuit)
+    sx, sy, sz = (int(v) for v in size)
+    now = TagLong(int(time.time() * 1000))
+
+    tile_entities = []
+    for block_id, (x, y, z), nbt in _block_entities(circuit, rows, origin):
+        entity = {'x': x, 'y': y, 'z': z, 'id': block_id}
+        entity.update(nbt)
+        tile_entities.append(entity)
+
+    region = {
+        'Position': {'x': int(origin[0]), 'y': int(origin[1]), 'z': int(origin[2])},
+        'Size': {'x': sx, 'y': sy, 'z': sz},
+        'BlockStatePalette': [_state_compound(name) for name in state_names],
+        'BlockStates': pack_long_array(volume, palette_bits(len(state_names))),
+        'TileEntities': tile_entities,
+        'Entities': [],
+        'PendingBlockTicks': [],
+        'PendingFluidTicks': [],
+    }
+
+    return {
+        'Version': LITEMATIC_VERSION,
+        'MinecraftDataVersion': DATA_VERSION,
+        'Metadata': {
+            'Name': circuit.name,
+            'Author': author,
+            'Description': circuit.description,
+            'RegionCount': 1,
+            'TotalBlocks': int(np.count_nonzero(volume)),
+            'TotalVolume': sx * sy * sz,
+            'EnclosingSize': {'x': sx, 'y': sy, 'z': sz},
+            'TimeCreated': now,
+            'TimeModified': now,
+        },
+        'Regions': {circuit.name: region},
+    }
+
+
+def circuit_to_structure(circuit: Circuit) -> Dict:
+    """Build the vanilla structure block root compound for a circuit"""
+    origin, size, state_names, volume, rows = _dense_volume(circuit)
+    entity_nbt = {pos: nbt for _, pos, nbt in _block_entities(circuit, rows, origin)}
+
+    occupied = np.flatnonzero(volume)
+    sx, sy, sz = (int(v) for v in size)
+    xs = occupied % sx
+    zs = (occupied // sx) % sz
+    ys = occupied // (sx * sz)
+
+    blocks = []
+    for state, x, y, z in zip((volume[occupied] - 1).tolist(), xs.tolist(), ys.tolist(), zs.tolist()):
+        entry = {'state': state, 'pos': [x, y, z]}
+        nbt = entity_nbt.get((x, y, z))
+        if nbt is not None:
+            entry['nbt'] = nbt
+        blocks.append(entry)
+
+    return {
+        'DataVersion': DATA_VERSION,
+        'size': [sx, sy, sz],
+        # Structures leave unlisted positions untouched, so air is not stored
+        'palette': [_state_compound(name) for name in state_names[1:]],
+        'blocks': blocks,
+        'entities': [],
+    }
+
+
+def export_schem(circuit: Circuit, filepath: str):
+    """Export circuit to a Sponge .schem file"""
+    write_nbt_file(filepath, circuit_to_schem(circuit), name="Schematic")
+    print(f"Exported schematic: {filepath}")
+
+
+def export_litematic(circuit: Circuit, filepath: str):
+    """Export circuit to a Litematica .litematic file"""
+    write_nbt_file(filepath, circuit_to_litematic(circuit))
+    print(f"Exported litematic: {filepath}")
+
+
+def export_structure(circuit: Circuit, filepath: str):
+    """Export circuit to a vanilla structure .nbt file"""
+    write_nbt_file(filepath, circuit_to_structure(circuit))
+    print(f"Exported structure: {filepath}")
+
+
+SCHEMATIC_EXPORTERS = {
+    '.schem': export_schem,
+    '.litematic': export_litematic,
+    '.nbt': export_structure,
+}
+
+
+def export_schematic(circuit: Circuit, filepath: str):
+    """Export circuit in the schematic format selected by the file suffix"""
+    suffix = Path(filepath).suffix.lower()
+    exporter = SCHEMATIC_EXPORTERS.get(suffix)
+    if exporter is None:
+        raise ValueError(f"Unknown schematic format '{suffix}' "
+                         f"(expected one of {', '.join(SCHEMATIC_EXPORTERS)})")
+    exporter(circuit, filepath)
+
+
+# ============================================================================
+# FORMAT READERS
+# ============================================================================
+
+# States that mark "nothing here" in a schematic
+EMPTY_BLOCKS = {AIR, "minecraft:cave_air", "minecraft:void_air", "minecraft:structure_void"}
+
+
+def _parse_state(state_name: str) -> Tuple[str, Dict]:
+    compound = _state_compound(state_name)
+    return compound['Name'], compound.get('Properties')
+
+
+def plain_nbt(value):
+    """Decoded NBT as JSON-style values (tag types dropped, arrays as lists)"""
+    if isinstance(value, dict):
+        return {k: plain_nbt(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [plain_nbt(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        return float(value)
+    return value
+
+
+def _add_volume(store: BlockStore, name: str, palette: List[Tuple[str, Dict]], volume: np.ndarray,
+                size: Tuple[int, int, int], origin, entities: Dict[Tuple[int, int, int], Dict]):
+    """
+    Append the non-empty voxels of a (y, z, x) ordered volume of palette
+    indices, and the block entities at local positions, to a store.
+    """
+    sx, sy, sz = size
+    if volume.size and volume.max() >= len(palette):
+        raise ValueError(f"{name}: block data references entries outside the palette")
+    remap = np.array([-1 if block_id in EMPTY_BLOCKS else store.intern(block_id, props)
+                      for block_id, props in palette], dtype=np.int64)
+    states = remap[volume]
+    occupied = np.flatnonzero(states >= 0)
+    local = np.column_stack([occupied % sx, occupied // (sx * sz), (occupied // sx) % sz])
+    first = len(store)
+    store.extend_arrays(local + np.asarray(origin, dtype=np.int64), states[occupied])
+    for (x, y, z), nbt in entities.items():
+        index = (y * sz + z) * sx + x
+        row = int(np.searchsorted(occupied, index))
+        if nbt and 0 <= x < sx and 0 <= y < sy and 0 <= z < sz and row < len(occupied) \
+                and occupied[row] == index:
+            store.nbt[first + row] = nbt
+
+
+def schem_to_circuit(root: Dict, name: str = "schematic") -> Circuit:
+    """Circuit from a Sponge schematic root compound (v2, or v3 nested under 'Schematic')"""
+    root = root.get('Schematic', root)
+    blocks = root.get('Blocks', root)           # v3 groups block data under 'Blocks'
+    width, height, length = (int(root[k]) & 0xFFFF for k in ('Width', 'Height', 'Length'))
+    palette = [None] * len(blocks['Palette'])
+    for state_name, index in blocks['Palette'].items():
+        palette[index] = _parse_state(state_name)
+    if any(entry is None for entry in palette):
+        raise ValueError(f"{name}: schematic palette indices are not contiguous")
+    volume = decode_varints(blocks['Data' if 'Data' in blocks else 'BlockData'], width * height * length)
+
+    entities = {}
+    for entity in blocks.get('BlockEntities', []):
+        x, y, z = (int(v) for v in entity['Pos'])
+        nbt = entity.get('Data', entity)        # v3 nests the NBT under 'Data'
+        entities[(x, y, z)] = plain_nbt({k: v for k, v in nbt.items() if k not in ('Pos', 'Id', 'id')})
+
+    metadata = root.get('Metadata', {})
+    name = metadata.get('Name', name)
+    origin = np.asarray(root.get('Offset', (0, 0, 0)), dtype=np.int64)
+    store = BlockStore()
+    _add_volume(store, name, palette, volume, (width, height, length), origin, entities)
+    return Circuit(name, f"Imported from {name}.schem", store, (width, height, length))
+
+
+def litematic_to_circuit(root: Dict, name: str = "litematic") -> Circuit:
+    """Circuit from a Litematica root compound; all regions are merged"""
+    metadata = root.get('Metadata', {})
+    name = metadata.get('Name', name)
+    store = BlockStore()
+    for region in root['Regions'].values():
+        position = np.array([region['Position'][k] for k in 'xyz'], dtype=np.int64)
+        size = np.array([region['Size'][k] for k in 'xyz'], dtype=np.int64)
+        # A negative size extends from the position towards lower coordinates
+        origin = np.where(size < 0, position + size + 1, position)
+        sx, sy, sz = (int(v) for v in np.abs(size))
+        palette = [(entry['Name'], entry.get('Properties')) for entry in region['BlockStatePalette']]
+        volume = unpack_long_array(region['BlockStates'], palette_bits(len(palette)), sx * sy * sz)
+        entities = {}
+        for entity in region.get('TileEntities', []):
+            nbt = {k: v for k, v in entity.items() if k not in ('x', 'y', 'z', 'id')}
+            entities[(int(entity['x']), int(entity['y']), int(entity['z']))] = plain_nbt(nbt)
+        _add_volume(store, name, palette, volume, (sx, sy, sz), origin, entities)
+    positions = store.positions
+    dimensions = tuple(int(v) for v in (np.ptp(positions, axis=0) + 1)) if len(positions) else (0, 0, 0)
+    description = metadata.get('Description') or f"Imported from {name}.litematic"
+    return Circuit(name, description, store, dimensions)
+
+
+def structure_to_circuit(root: Dict, name: str = "structure") -> Circuit:
+    """Circuit from a vanilla structure root compound (first palette of multi-palette files)"""
+    palette_list = root['palette'] if 'palette' in root else root['palettes'][0]
+    palette = [(entry['Name'], entry.get('Properties')) for entry in palette_list]
+    blocks = root['blocks']
+    states = np.fromiter((block['state'] for block in blocks), dtype=np.int64, count=len(blocks))
+    positions = np.array([block['pos'] for block in blocks], dtype=np.int64).reshape(-1, 3)
+    if len(states) and states.max() >= len(palette):
+        raise ValueError(f"{name}: block states reference entries outside the palette")
+
+    store = BlockStore()
+    remap = np.array([-1 if block_id in EMPTY_BLOCKS else store.intern(block_id, props)
+                      for block_id, props in palette], dtype=np.int64)
+    kept = np.flatnonzero(remap[states] >= 0) if len(states) else states
+    store.extend_arrays(positions[kept], remap[states[kept]])
+    for row, i in enumerate(kept.tolist()):
+        if 'nbt' in blocks[i]:
+            nbt = {k: v for k, v in blocks[i]['nbt'].items() if k not in ('x', 'y', 'z', 'id')}
+            if nbt:
+                store.nbt[row] = plain_nbt(nbt)
+    dimensions = tuple(int(v) for v in root.get('size', (0, 0, 0)))
+    return Circuit(name, f"Imported from {name}.nbt", store, dimensions)
+
+
+SCHEMATIC_READERS = {
+    '.schem': schem_to_circuit,
+    '.litematic': litematic_to_circuit,
+    '.nbt': structure_to_circuit,
+}
+
+
+def load_schematic(filepath: str) -> Circuit:
+    """Load a .schem, .litematic or structure .nbt file as a Circuit"""
+    path = Path(filepath)
+    reader = SCHEMATIC_READERS.get(path.suffix.lower())
+    if reader is None:
+        raise ValueError(f"Unknown schematic format '{path.suffix}' "
+                         f"(expected one of {', '.join(SCHEMATIC_READERS)})")
+    return reader(read_nbt_file(filepath)[1], path.stem)
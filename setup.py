@@ -27,7 +27,7 @@ setup(
     },
     license="MIT",
     packages=find_packages(exclude=["tests", "tests.*"]),
-    py_modules=["quantum_circuit_generator", "export_cad"],
+    py_modules=["quantum_circuit_generator", "export_cad", "schematic", "circuit_lint", "redstone_sim", "quantum_state", "gate_compiler", "benchmarks", "profiler", "quantum_redstone_cli", "circuit_cache", "chunk_planner", "circuit_diff", "rcon_client", "region_writer"],
     python_requires=">=3.10",
     install_requires=[
         "numpy>=1.24.0",
@@ -48,7 +48,7 @@ setup(
     },
     entry_points={
         "console_scripts": [
-            "quantum-redstone=quantum_circuit_generator:main",
+            "quantum-redstone=quantum_redstone_cli:main",
             "qr-generate=quantum_circuit_generator:main",
             "qr-export-cad=export_cad:main",
         ],
@@ -0,0 +1,87 @@
+"""Tests for the columnar BlockStore behind Circuit.blocks"""
+
+import copy
+import json
+
+import numpy as np
+import pytest
+
+import quantum_circuit_generator as qcg
+from quantum_circuit_generator import Block, BlockStore, Circuit
+
+
+def repeater_circuit() -> Circuit:
+    return Circuit("repeaters", "", [
+        Block(0, 0, 0, "minecraft:repeater", {"facing": "east", "delay": 1}),
+        Block(1, 0, 0, "minecraft:repeater", {"delay": 1, "facing": "east"}),
+        Block(2, 0, 0, "minecraft:chest", {"facing": "west"}, {"Items": [{"Slot": 0, "Count": 4}]}),
+    ], (3, 1, 1))
+
+
+def test_store_indexes_like_the_block_list():
+    blocks = list(qcg.generate_hadamard().blocks)
+    store = BlockStore(blocks)
+    assert store == blocks
+    assert store[-1] == blocks[-1]
+    assert store[2:5] == blocks[2:5]
+    with pytest.raises(IndexError):
+        store[len(blocks)]
+
+
+def test_equal_states_share_a_palette_entry_whatever_the_property_order():
+    circuit = repeater_circuit()
+    assert len(circuit.blocks.palette) == 2
+    assert circuit.blocks.state_ids.tolist() == [0, 0, 1]
+
+
+@pytest.mark.parametrize("edit", [
+    lambda block: setattr(block, 'x', 99),
+    lambda block: setattr(block, 'block_id', 'minecraft:stone'),
+    lambda block: block.properties.__setitem__('facing', 'up'),
+    lambda block: block.nbt.__setitem__('Items', []),
+])
+def test_editing_a_view_raises(edit):
+    circuit = repeater_circuit()
+    with pytest.raises((AttributeError, TypeError)):
+        edit(circuit.blocks[2])
+    assert circuit.blocks[2] == repeater_circuit().blocks[2]
+
+
+def test_assigned_blocks_write_back():
+    circuit = repeater_circuit()
+    block = circuit.blocks[0].mutable()
+    block.x = 99
+    block.properties['facing'] = 'up'
+    circuit.blocks[0] = block
+    assert circuit.blocks[0] == Block(99, 0, 0, "minecraft:repeater", {"facing": "up", "delay": 1})
+    # The other repeater keeps the shared palette entry
+    assert circuit.blocks[1].properties == {"facing": "east", "delay": 1}
+
+    chest = copy.copy(circuit.blocks[2])
+    chest.nbt['Items'][0]['Count'] = 9
+    circuit.blocks[2] = chest
+    chest.nbt['Items'][0]['Count'] = 1   # stored as a copy
+    assert circuit.blocks[2].nbt['Items'][0]['Count'] == 9
+    circuit.blocks[2] = Block(2, 0, 0, "minecraft:stone")
+    assert circuit.blocks[2].nbt is None and 2 not in circuit.blocks.nbt
+
+
+def test_views_copy_back_into_new_stores():
+    circuit = repeater_circuit()
+    copied = BlockStore(circuit.blocks[i] for i in range(len(circuit.blocks)))
+    assert copied == circuit.blocks
+    assert isinstance(copied.nbt[2], dict)
+    assert json.loads(json.dumps([block.to_dict() for block in copied])) == list(circuit.blocks.iter_dicts())
+
+
+def test_subset_and_extend_translate_blocks():
+    store = qcg.generate_cnot().blocks
+    rows = np.arange(len(store))[::3]
+    part = store.subset(rows, (5, 0, -2))
+    np.testing.assert_array_equal(part.positions, store.positions[rows] + [5, 0, -2])
+    assert [b.block_id for b in part] == [store[i].block_id for i in rows.tolist()]
+    merged = BlockStore()
+    merged.extend_store(store, (1, 2, 3))
+    merged.extend_store(store)
+    assert len(merged) == 2 * len(store)
+    assert merged[len(store):] == list(store)
@@ -0,0 +1,100 @@
+"""Run chunked placement plans tick by tick and check their invariants"""
+
+import numpy as np
+import pytest
+
+import quantum_circuit_generator as qcg
+from benchmarks import synthetic_circuit
+from chunk_planner import plan_chunked_placement
+from gate_compiler import compile_program
+
+ORIGIN = (-7, 64, 13)
+
+
+def run_plan(plan):
+    """
+    Execute a plan's functions as the game would: forceload add takes
+    effect from the next tick. Returns (world, commands per function run).
+    Fails if a block is placed in a chunk that is not loaded yet.
+    """
+    files = plan.functions('q')
+    loaded, pending, world = set(), set(), {}
+
+    def run(name, cost):
+        for line in files[name].splitlines():
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split()
+            if parts[0] == 'function':
+                run(parts[1].split(':', 1)[1], cost)
+                continue
+            if parts[0] == 'schedule':
+                continue
+            cost[0] += 1
+            if parts[0] == 'forceload':
+                chunk = (int(parts[2]) // 16, int(parts[3]) // 16)
+                if parts[1] == 'add':
+                    pending.add(chunk)
+                else:
+                    loaded.discard(chunk)
+                    pending.discard(chunk)
+                continue
+            if parts[0] == 'setblock':
+                low = high = tuple(map(int, parts[1:4]))
+                state = ' '.join(parts[4:])
+            else:
+                low, high = tuple(map(int, parts[1:4])), tuple(map(int, parts[4:7]))
+                state = ' '.join(parts[7:])
+            for cx in range(low[0] // 16, high[0] // 16 + 1):
+                for cz in range(low[2] // 16, high[2] // 16 + 1):
+                    assert (cx, cz) in loaded, (name, line)
+            for x in range(low[0], high[0] + 1):
+                for y in range(low[1], high[1] + 1):
+                    for z in range(low[2], high[2] + 1):
+                        world[(x, y, z)] = state.split('{')[0]
+
+    costs = [[0]]
+    run(f"{plan.name}/start", costs[-1])
+    for t in range(len(plan.ticks)):
+        loaded |= pending
+        pending.clear()
+        costs.append([0])
+        run(f"{plan.name}/tick_{t}", costs[-1])
+    assert not loaded and not pending, "chunks left force-loaded"
+    return world, [cost[0] for cost in costs]
+
+
+def expected_world(circuit):
+    positions, state_ids, _ = qcg.resolve_placement(circuit.blocks)
+    return {tuple((position + ORIGIN).tolist()): qcg.format_block_state(*circuit.blocks.palette[state])
+            for position, state in zip(positions.astype(np.int64), state_ids)}
+
+
+CASES = [
+    (qcg.generate_cnot, 8),
+    (qcg.generate_hadamard, 8),
+    (lambda: qcg.generate_phase_engine(qcg.generate_lookup_table(16)), 8),
+    (lambda: compile_program("".join(f"h {i}\ncnot {i} {i + 1}\n" for i in range(11)) * 3, "prog"), 64),
+    (lambda: synthetic_circuit(20_000), 512),
+]
+
+
+@pytest.mark.parametrize("generator, budget", CASES)
+def test_plan_places_whole_circuit_within_budget(generator, budget):
+    circuit = generator()
+    plan = plan_chunked_placement(circuit, ORIGIN, budget)
+    world, costs = run_plan(plan)
+    assert max(costs) <= budget
+    assert costs == plan.tick_costs()
+    assert world == expected_world(circuit)
+
+
+def test_batches_of_a_chunk_visit_are_marked():
+    plan = plan_chunked_placement(synthetic_circuit(20_000), ORIGIN, 64)
+    for batch in plan.batches:
+        assert batch.cost <= plan.budget
+    # Every visit to a chunk opens with a first batch and closes with a last one
+    for chunk in {batch.chunk for batch in plan.batches}:
+        visits = [b for tick in plan.ticks for b in (plan.batches[i] for i in tick) if b.chunk == chunk]
+        assert visits[0].first and visits[-1].last
+        assert sum(b.first for b in visits) == sum(b.last for b in visits)
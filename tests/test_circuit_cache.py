@@ -0,0 +1,50 @@
+"""Tests for the content-addressed artifact cache"""
+
+import os
+
+import quantum_circuit_generator as qcg
+from circuit_cache import CACHED_MODULES, LOW_WATER, ArtifactCache, code_version
+
+
+def test_code_version_covers_every_cached_module():
+    assert {'quantum_circuit_generator', 'circuit_lint', 'schematic'} <= set(CACHED_MODULES)
+    assert code_version(('quantum_circuit_generator',)) != code_version()
+    cache = ArtifactCache(enabled=False, modules=('quantum_circuit_generator',))
+    assert cache.key('circuit', 'generate_cnot') != ArtifactCache(enabled=False).key('circuit', 'generate_cnot')
+
+
+def test_circuit_round_trips_through_the_cache(tmp_path):
+    cache = ArtifactCache(str(tmp_path))
+    key = cache.key('circuit', 'generate_cnot')
+    built = cache.circuit(key, qcg.generate_cnot)
+    cached = cache.circuit(key, lambda: None)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert [block.to_dict() for block in cached.blocks] == [block.to_dict() for block in built.blocks]
+
+
+def test_file_is_left_untouched_on_a_hit(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "cache"))
+    path = tmp_path / "out.txt"
+    key = cache.key('text', 'render')
+    assert not cache.file(key, str(path), lambda p: path.write_text("hello"))
+    os.utime(path, (0, 0))
+    assert cache.file(key, str(path), lambda p: None)
+    assert path.read_text() == "hello"
+    assert path.stat().st_mtime == 0
+
+
+def test_evict_trims_least_recently_used_to_low_water(tmp_path):
+    cache = ArtifactCache(str(tmp_path), max_bytes=10_000)
+    keys = [cache.key('blob', 'test', i=i) for i in range(12)]
+    for i, key in enumerate(keys):
+        cache.put(key, bytes(1000))
+        os.utime(cache._path(key), (i, i))
+    # Crossing max_bytes evicted the oldest entries
+    assert cache.size() <= 10_000
+    assert not cache._path(keys[0]).exists()
+    assert cache.evict() > 0
+    assert cache.size() <= 10_000 * LOW_WATER
+    survivors = [key for key in keys if cache._path(key).exists()]
+    assert survivors == keys[-len(survivors):]
+    assert cache.clear() == len(survivors)
+    assert cache.size() == 0
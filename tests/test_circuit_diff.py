@@ -0,0 +1,115 @@
+"""Applying a diff's commands to the old revision must give the new one"""
+
+import random
+
+import pytest
+
+import quantum_circuit_generator as qcg
+from circuit_diff import diff_circuits, generate_diff_mcfunction
+
+
+def world_of(circuit, origin=(0, 0, 0)):
+    """{position: (block state, SNBT or None)} of a built circuit"""
+    positions, state_ids, rows = qcg.resolve_placement(circuit.blocks)
+    world = {}
+    for position, state, row in zip(positions.tolist(), state_ids.tolist(), rows.tolist()):
+        nbt = circuit.blocks.nbt.get(row)
+        key = tuple(p + o for p, o in zip(position, origin))
+        world[key] = (qcg.format_block_state(*circuit.blocks.palette[state]), qcg.to_snbt(nbt) if nbt else None)
+    return world
+
+
+def apply(world, text):
+    """Run the setblock/fill/data commands of an mcfunction against a world dict"""
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        parts = line.split(' ')
+        if parts[0] == 'data':
+            position = tuple(int(v.lstrip('~')) for v in parts[3:6])
+            assert position in world, line
+            world[position] = (world[position][0], ' '.join(parts[6:]))
+            continue
+        if parts[0] == 'setblock':
+            low = high = tuple(int(v.lstrip('~')) for v in parts[1:4])
+            state = ' '.join(parts[4:])
+        else:
+            assert parts[0] == 'fill', line
+            low = tuple(int(v.lstrip('~')) for v in parts[1:4])
+            high = tuple(int(v.lstrip('~')) for v in parts[4:7])
+            state = ' '.join(parts[7:])
+        nbt = None
+        if '{' in state:
+            state, nbt = state.split('{', 1)
+            nbt = '{' + nbt
+        for x in range(low[0], high[0] + 1):
+            for y in range(low[1], high[1] + 1):
+                for z in range(low[2], high[2] + 1):
+                    if state == 'minecraft:air':
+                        world.pop((x, y, z), None)
+                    else:
+                        world[(x, y, z)] = (state, nbt)
+    return world
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return qcg.generate_phase_engine(qcg.generate_lookup_table(16))
+
+
+def edited(circuit, seed):
+    """Random additions, replacements and removals"""
+    rng = random.Random(seed)
+    blocks = list(circuit.blocks)
+    for _ in range(10):
+        op = rng.choice('amr')
+        if op == 'a':
+            blocks.append(qcg.Block(rng.randint(0, 70), rng.randint(0, 6), rng.randint(0, 25), 'minecraft:stone'))
+        elif op == 'm':
+            i = rng.randrange(len(blocks))
+            blocks[i] = qcg.Block(blocks[i].x, blocks[i].y, blocks[i].z, 'minecraft:glass')
+        else:
+            blocks.pop(rng.randrange(len(blocks)))
+    return qcg.Circuit(circuit.name, circuit.description, blocks, circuit.dimensions)
+
+
+def retagged(circuit):
+    """Drop one block's NBT and move another's onto a different block"""
+    blocks = list(circuit.blocks)
+    tagged = [i for i, block in enumerate(blocks) if block.nbt]
+    first, second = tagged[:2]
+    b = blocks[first]
+    blocks[first] = qcg.Block(b.x, b.y, b.z, b.block_id, b.properties, None)
+    b = blocks[second]
+    blocks[second] = qcg.Block(b.x, b.y, b.z, 'minecraft:barrel', None, b.nbt)
+    return qcg.Circuit(circuit.name, circuit.description, blocks, circuit.dimensions)
+
+
+def revisions(engine):
+    lookup = qcg.generate_lookup_table(16)
+    recounted = [dict(e, chest_items=e['chest_items'] + 1) if e['step'] % 3 == 0 else e for e in lookup]
+    yield 'chest_counts', qcg.generate_phase_engine(recounted)
+    yield 'same', qcg.generate_phase_engine(lookup)
+    yield 'retagged', retagged(engine)
+    for seed in range(5):
+        yield f'random{seed}', edited(engine, seed)
+
+
+@pytest.mark.parametrize("origin", [None, (100, 64, -37)])
+def test_diff_turns_old_revision_into_new(engine, origin):
+    base = origin or (0, 0, 0)
+    for name, new in revisions(engine):
+        diff = diff_circuits(engine, new)
+        world = apply(world_of(engine, base), generate_diff_mcfunction(diff, origin))
+        assert world == world_of(new, base), name
+
+
+def test_unchanged_revision_gives_empty_diff(engine):
+    diff = diff_circuits(engine, qcg.generate_phase_engine(qcg.generate_lookup_table(16)))
+    assert diff.is_empty
+    assert diff.commands() == []
+
+
+def test_diff_from_and_to_nothing(engine):
+    assert apply({}, generate_diff_mcfunction(diff_circuits(None, engine))) == world_of(engine)
+    assert apply(world_of(engine), generate_diff_mcfunction(diff_circuits(engine, None))) == {}
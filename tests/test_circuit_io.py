@@ -0,0 +1,44 @@
+"""Round-trip tests for the JSON and .npz circuit formats"""
+
+import json
+
+import pytest
+
+import quantum_circuit_generator as qcg
+from benchmarks import stock_circuits, synthetic_circuit
+from export_cad import load_circuits
+from quantum_circuit_generator import (Circuit, export_to_json, export_to_npz, load_from_json,
+                                       load_from_npz)
+
+
+def circuits():
+    return stock_circuits() + [synthetic_circuit(20_000), Circuit('empty', '', [], (0, 0, 0))]
+
+
+def test_full_json_matches_the_nested_dump(tmp_path):
+    path = tmp_path / "circuits.json"
+    export_to_json(circuits(), str(path))
+    expected = dict(qcg._FILE_HEADER, circuits=[circuit.to_dict() for circuit in circuits()])
+    assert path.read_text() == json.dumps(expected, indent=2)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_json_round_trips(tmp_path, compact):
+    path = tmp_path / "circuits.json"
+    export_to_json(circuits(), str(path), compact=compact)
+    assert load_from_json(str(path)) == circuits()
+
+
+def test_npz_round_trips(tmp_path):
+    path = tmp_path / "circuits.npz"
+    export_to_npz(circuits(), str(path))
+    assert load_from_npz(str(path)) == circuits()
+
+
+def test_export_cad_reads_every_format_alike(tmp_path):
+    export_to_json(circuits(), str(tmp_path / "full.json"))
+    export_to_json(circuits(), str(tmp_path / "compact.json"), compact=True)
+    export_to_npz(circuits(), str(tmp_path / "circuits.npz"))
+    loaded = [[Circuit.from_dict(data) for data in load_circuits(str(tmp_path / name))]
+              for name in ("full.json", "compact.json", "circuits.npz")]
+    assert loaded[0] == loaded[1] == loaded[2] == circuits()
@@ -0,0 +1,105 @@
+"""Tests for the voxel index and the structural lint pass"""
+
+import numpy as np
+import pytest
+
+import quantum_circuit_generator as qcg
+from benchmarks import synthetic_circuit
+from circuit_lint import CHUNK_SIZE, VoxelIndex, format_lint_report, lint_circuit, pack_positions
+from quantum_circuit_generator import Block, Circuit
+
+
+def issues_by_kind(circuit, **kwargs):
+    return sorted((issue.kind, issue.position) for issue in lint_circuit(circuit, **kwargs))
+
+
+def test_clean_circuit_has_no_issues():
+    circuit = Circuit('clean', '', [
+        Block(0, 0, 0, 'minecraft:stone'),
+        Block(0, 1, 0, 'minecraft:redstone_wire'),
+        Block(1, 0, 0, 'minecraft:redstone_wall_torch', {'facing': 'east'}),
+        Block(2, 0, 0, 'minecraft:lever', {'face': 'floor', 'facing': 'east'}),
+    ], (3, 2, 1))
+    assert lint_circuit(circuit) == []
+    assert format_lint_report(circuit, []) == "clean: OK"
+
+
+def test_collision_reports_every_row_and_the_winner():
+    circuit = Circuit('stack', '', [Block(0, 0, 0, 'minecraft:stone'), Block(1, 0, 0, 'minecraft:stone'),
+                                    Block(0, 0, 0, 'minecraft:glass')], (2, 1, 1))
+    [issue] = lint_circuit(circuit)
+    assert (issue.kind, issue.position, issue.rows) == ('collision', (0, 0, 0), [0, 2])
+    assert issue.message.endswith("minecraft:glass wins")
+
+
+def test_components_need_a_solid_block_to_rest_on():
+    circuit = Circuit('floating', '', [
+        Block(0, 2, 0, 'minecraft:redstone_wire'),                            # nothing below
+        Block(1, 1, 0, 'minecraft:redstone_wire'),
+        Block(1, 2, 0, 'minecraft:repeater', {'facing': 'east'}),             # on wire
+        Block(2, 1, 0, 'minecraft:redstone_wall_torch', {'facing': 'east'}),  # nothing to the west
+        Block(3, 1, 0, 'minecraft:stone'),
+        Block(4, 1, 0, 'minecraft:redstone_wall_torch', {'facing': 'east'}),  # on the stone
+        Block(5, 0, 0, 'minecraft:stone_button', {'face': 'ceiling'}),        # nothing above
+    ], (6, 3, 1))
+    assert issues_by_kind(circuit) == [('unsupported', (0, 2, 0)), ('unsupported', (1, 1, 0)),
+                                       ('unsupported', (1, 2, 0)), ('unsupported', (2, 1, 0)),
+                                       ('unsupported', (5, 0, 0))]
+    # Raising the ground lets the bottom layer rest on the world
+    assert ('unsupported', (1, 1, 0)) not in issues_by_kind(circuit, ground_y=1)
+
+
+def test_only_the_block_left_at_a_position_needs_support():
+    circuit = Circuit('replaced', '', [Block(0, 3, 0, 'minecraft:redstone_wire'),
+                                       Block(0, 3, 0, 'minecraft:stone')], (1, 4, 1))
+    assert issues_by_kind(circuit) == [('collision', (0, 3, 0))]
+
+
+def test_out_of_bounds_blocks():
+    circuit = Circuit('bounds', '', [Block(-1, 0, 0, 'minecraft:stone'), Block(1, 0, 0, 'minecraft:stone'),
+                                     Block(0, 0, 2, 'minecraft:stone')], (2, 1, 2))
+    assert issues_by_kind(circuit) == [('out_of_bounds', (-1, 0, 0)), ('out_of_bounds', (0, 0, 2))]
+
+
+def test_hadamard_collisions_are_found():
+    issues = lint_circuit(qcg.generate_hadamard())
+    collisions = {issue.position for issue in issues if issue.kind == 'collision'}
+    assert {(6, 0, 3), (7, 2, 3)} <= collisions
+    index = VoxelIndex(qcg.generate_hadamard())
+    assert [index.block_id(row) for row in index.rows_at(6, 0, 3)] == ['minecraft:comparator', 'minecraft:hopper']
+
+
+def test_index_queries_match_a_scan():
+    circuit = synthetic_circuit(20_000)
+    index = VoxelIndex(circuit)
+    positions = circuit.blocks.positions
+    placed = {}
+    for row, position in enumerate(positions.tolist()):
+        placed.setdefault(tuple(position), []).append(row)
+    last = {position: rows[-1] for position, rows in placed.items()}
+    assert len(index) == len(last)
+    for (x, y, z), row in list(last.items())[::97]:
+        assert index.get(x, y, z) == row
+        assert index.rows_at(x, y, z) == placed[(x, y, z)]
+        expected = {name: last[(x + dx, y + dy, z + dz)] for name, (dx, dy, dz) in qcg.NEIGHBOUR_OFFSETS.items()
+                    if (x + dx, y + dy, z + dz) in last}
+        assert index.neighbours(x, y, z) == expected
+    assert index.get(-5, -5, -5) is None and index.rows_at(-5, -5, -5) == []
+
+    rng = np.random.default_rng(0)
+    high = positions.max(axis=0)
+    for _ in range(20):
+        lo = rng.integers(-4, high + 1)
+        hi = lo + rng.integers(0, 2 * CHUNK_SIZE, 3)
+        inside = np.flatnonzero(np.all((positions >= lo) & (positions <= hi), axis=1))
+        np.testing.assert_array_equal(index.region(tuple(lo), tuple(hi)), inside)
+
+
+def test_packed_keys_sort_like_positions_and_reject_overflow():
+    positions = np.array([[-3, 5, 2], [-3, -1, 9], [0, 0, -1], [2, -64, 0], [2, 319, -7]])
+    order = np.argsort(pack_positions(positions))
+    assert positions[order].tolist() == sorted(positions.tolist())
+    with pytest.raises(ValueError):
+        pack_positions(np.array([[0, 1 << 11, 0]]))
+    with pytest.raises(ValueError):
+        pack_positions(np.array([[-(1 << 25) - 1, 0, 0]]))
@@ -0,0 +1,93 @@
+"""Tests for the quantum-redstone subcommand CLI"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import quantum_circuit_generator as qcg
+from quantum_redstone_cli import CIRCUITS, main
+
+
+@pytest.fixture
+def cli(tmp_path):
+    """main() with a private cache directory"""
+    def run(*argv):
+        args = list(argv)
+        if args[0] not in ('diff', 'bench'):
+            args += ['--cache-dir', str(tmp_path / 'cache')]
+        return main(args)
+    return run
+
+
+def test_parsing_imports_no_heavy_modules():
+    code = ("import sys, quantum_redstone_cli as cli\n"
+            "cli.build_parser().parse_args(['export', 'cnot_gate', '-f', 'stl'])\n"
+            "print(sorted({'numpy', 'quantum_circuit_generator', 'export_cad', 'schematic', 'redstone_sim'}"
+            " & set(sys.modules)))\n")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=Path(__file__).resolve().parents[1])
+    assert result.stdout.strip() == '[]'
+
+
+def test_generate_writes_only_the_named_circuits(cli, tmp_path, capsys):
+    output = tmp_path / 'circuits.json'
+    assert cli('generate', 'cnot_gate', 'pauli_x_gate', '-o', str(output)) == 0
+    assert qcg.load_from_json(str(output)) == [qcg.generate_cnot(), qcg.generate_pauli_x()]
+    first = output.read_bytes()
+
+    output.unlink()
+    capsys.readouterr()
+    assert cli('generate', 'cnot_gate', 'pauli_x_gate', '-o', str(output)) == 0
+    assert "Reused cached circuits" in capsys.readouterr().out
+    assert output.read_bytes() == first
+
+
+def test_generate_check_reports_lint_and_conservation(cli, tmp_path, capsys):
+    output = tmp_path / 'circuits.npz'
+    assert cli('generate', 'hadamard_gate', '--check', '-o', str(output)) == 0
+    out = capsys.readouterr().out
+    assert "hadamard_gate: " in out and "lint issue(s)" in out
+    assert qcg.load_from_npz(str(output)) == [qcg.generate_hadamard()]
+
+
+@pytest.mark.parametrize("merge", [False, True])
+def test_mcfunction_matches_the_generator(cli, tmp_path, merge):
+    output = tmp_path / 'functions'
+    args = ['mcfunction', 'pauli_z_gate', '-o', str(output)] + (['--merge'] if merge else [])
+    assert cli(*args) == cli(*args) == 0   # the second run renders from the cache
+    assert [path.name for path in output.iterdir()] == ['place_pauli_z_gate.mcfunction']
+    expected = qcg.generate_mcfunction(qcg.generate_pauli_z(), 'quantum', merge=merge)
+    assert (output / 'place_pauli_z_gate.mcfunction').read_text(encoding='utf-8') == expected
+
+
+def test_mcfunction_reads_an_input_file(cli, tmp_path):
+    circuits = tmp_path / 'circuits.json'
+    qcg.export_to_json([qcg.generate_cnot(), qcg.generate_pauli_x()], str(circuits))
+    assert cli('mcfunction', 'cnot_gate', '-i', str(circuits), '-o', str(tmp_path / 'out')) == 0
+    assert [path.name for path in (tmp_path / 'out').iterdir()] == ['place_cnot_gate.mcfunction']
+    assert cli('mcfunction', 'missing', '-i', str(circuits), '-o', str(tmp_path / 'out')) == 1
+
+
+def test_lookup_writes_the_table(cli, tmp_path):
+    output = tmp_path / 'lookup.json'
+    assert cli('lookup', '--steps', '8', '-o', str(output)) == 0
+    expected = tmp_path / 'expected.json'
+    qcg.export_lookup_table(qcg.generate_lookup_table(8), str(expected))
+    assert json.loads(output.read_text()) == json.loads(expected.read_text())
+
+
+def test_export_writes_the_requested_formats(cli, tmp_path):
+    output = tmp_path / 'cad'
+    assert cli('export', 'pauli_x_gate', '-f', 'stl', '-f', 'obj', '-f', 'schem', '-o', str(output), '-j', '1') == 0
+    assert {path.name for path in output.iterdir()} == {
+        'pauli_x_gate.stl', 'pauli_x_gate.obj', 'pauli_x_gate.mtl', 'pauli_x_gate.schem', 'manifest.json'}
+
+
+def test_unknown_circuits_are_rejected(cli):
+    with pytest.raises(SystemExit) as error:
+        cli('generate', 'toffoli_gate')
+    assert error.value.code == 2
+    assert 'toffoli_gate' not in CIRCUITS
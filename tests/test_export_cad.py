@@ -0,0 +1,211 @@
+"""Tests for the CAD exporters and the mesh stage"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from benchmarks import stock_circuits, synthetic_circuit
+from export_cad import (MANIFEST_NAME, STL_FACET_DTYPE, DXFExporter, OBJExporter, STLExporter, circuit_data,
+                        export_circuits, material_name, mesh_blocks)
+
+
+def row(*block_ids):
+    """Circuit data of blocks in a row along x"""
+    blocks = [{'pos': [x, 0, 0], 'block': block_id} for x, block_id in enumerate(block_ids)]
+    return {'name': 'row', 'dimensions': {'x': len(blocks), 'y': 1, 'z': 1}, 'blocks': blocks}
+
+
+def read_stl(path) -> np.ndarray:
+    data = path.read_bytes()
+    count = int(np.frombuffer(data, '<u4', 1, 80)[0])
+    assert len(data) == 84 + count * STL_FACET_DTYPE.itemsize
+    return np.frombuffer(data, STL_FACET_DTYPE, count, 84)
+
+
+def volume_and_area(facets: np.ndarray):
+    """Enclosed volume (divergence theorem) and surface area of triangles"""
+    a, b, c = (facets['vertices'][:, i].astype(np.float64) for i in range(3))
+    volume = np.einsum('ij,ij->i', a, np.cross(b, c)).sum() / 6
+    area = np.linalg.norm(np.cross(b - a, c - a), axis=1).sum() / 2
+    return volume, area
+
+
+def exposed_faces(positions: np.ndarray) -> int:
+    """Unit faces of a voxel set that touch no other voxel"""
+    occupied = set(map(tuple, positions.tolist()))
+    return sum((x + dx, y + dy, z + dz) not in occupied
+               for x, y, z in occupied
+               for dx, dy, dz in ((1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1)))
+
+
+def test_stl_culls_faces_against_glass(tmp_path):
+    path = tmp_path / "row.stl"
+    STLExporter(row('minecraft:stone', 'minecraft:glass', 'minecraft:stone')).export(str(path))
+    facets = read_stl(path)
+    assert len(facets) == 12
+    assert volume_and_area(facets) == pytest.approx((3, 14))
+
+
+def test_obj_mesh_keeps_faces_behind_glass():
+    positions = np.array([[0, 0, 0], [1, 0, 0]])
+    materials = ['minecraft:stone', 'minecraft:glass']
+    # The stone face behind the glass stays visible; the glass face against stone does not
+    assert len(mesh_blocks(positions, np.array([0, 1]), materials)) == 6 + 5
+    assert len(mesh_blocks(positions, np.array([0, 1]), materials, see_through=False)) == 5 + 5
+
+
+@pytest.mark.parametrize("circuit", stock_circuits(), ids=lambda c: c.name)
+def test_stl_is_the_closed_outer_surface(tmp_path, circuit):
+    path = tmp_path / f"{circuit.name}.stl"
+    STLExporter(circuit_data(circuit)).export(str(path))
+    positions = np.unique(circuit.blocks.positions, axis=0)
+    assert volume_and_area(read_stl(path)) == pytest.approx((len(positions), exposed_faces(positions)))
+
+
+def test_unoptimized_binary_stl_has_twelve_facets_per_block(tmp_path):
+    circuit = stock_circuits()[4]
+    path = tmp_path / "cnot.stl"
+    exporter = STLExporter(circuit_data(circuit), optimize=False)
+    exporter.export(str(path))
+    facets = read_stl(path)
+    assert len(facets) == 12 * len(circuit.blocks) == exporter.counts['triangles']
+    # Each cube's facets stay within its block and point outwards
+    corners = facets['vertices'].reshape(len(circuit.blocks), 12, 3, 3)
+    np.testing.assert_array_equal(corners.min(axis=(1, 2)), circuit.blocks.positions)
+    np.testing.assert_array_equal(corners.max(axis=(1, 2)), circuit.blocks.positions + 1)
+    a, b, c = (facets['vertices'][:, i] for i in range(3))
+    np.testing.assert_allclose(np.cross(b - a, c - a), facets['normal'], atol=1e-6)
+
+
+def test_ascii_stl_matches_binary(tmp_path):
+    data = row('minecraft:stone', 'minecraft:glass')
+    STLExporter(data).export(str(tmp_path / "b.stl"))
+    STLExporter(data, binary=False).export(str(tmp_path / "a.stl"))
+    facets = read_stl(tmp_path / "b.stl")
+    lines = (tmp_path / "a.stl").read_text().splitlines()
+    assert lines[0] == "solid row" and lines[-1] == "endsolid row"
+    vertices = [list(map(float, line.split()[1:])) for line in lines if line.strip().startswith('vertex')]
+    np.testing.assert_array_equal(np.array(vertices), facets['vertices'].reshape(-1, 3))
+
+
+def read_obj(path):
+    """(vertices, {material: [(v1, v2, v3, v4) 0-based]}, usemtl order) of an OBJ file"""
+    vertices, faces, order, current = [], {}, [], None
+    for line in path.read_text().splitlines():
+        kind, *values = line.split()
+        if kind == 'v':
+            vertices.append(tuple(map(float, values)))
+        elif kind == 'usemtl':
+            current = values[0]
+            order.append(current)
+        elif kind == 'f':
+            faces.setdefault(current, []).append(tuple(int(v) - 1 for v in values))
+    return np.array(vertices), faces, order
+
+
+def corner_sets(quads: np.ndarray):
+    """Quads as sorted corner lists, independent of vertex order"""
+    return sorted(sorted(map(tuple, quad)) for quad in np.round(quads, 6).tolist())
+
+
+@pytest.mark.parametrize("circuit", [stock_circuits()[4], synthetic_circuit(20_000)], ids=lambda c: c.name)
+def test_obj_faces_match_the_mesh(tmp_path, circuit):
+    path = tmp_path / f"{circuit.name}.obj"
+    exporter = OBJExporter(circuit_data(circuit))
+    exporter.export(str(path))
+    vertices, faces, order = read_obj(path)
+    assert len(order) == len(set(order)), "usemtl repeated"
+
+    mesh = mesh_blocks(exporter.positions, exporter.material_ids, exporter.materials)
+    expected = {}
+    for quad, material in zip(mesh.quads.tolist(), mesh.materials.tolist()):
+        expected.setdefault(material_name(exporter.materials[material]), []).append(quad)
+    assert set(faces) == set(expected)
+    for material, quads in expected.items():
+        assert corner_sets(vertices[np.array(faces[material])]) == corner_sets(np.array(quads))
+    assert exporter.counts['faces'] == sum(map(len, faces.values())) == len(mesh)
+    assert exporter.counts['vertices'] == len(vertices) < 4 * len(mesh)
+
+    materials = [line.split()[1] for line in (tmp_path / f"{circuit.name}.mtl").read_text().splitlines()
+                 if line.startswith('newmtl')]
+    assert sorted(materials) == sorted(set(faces))
+
+
+def read_dxf_entities(path):
+    """DXF entities as (type, [(code, value), ...]) in file order"""
+    lines = path.read_text().splitlines()
+    entities = []
+    for code, value in zip(lines[::2], lines[1::2]):
+        if code.strip() == '0':
+            entities.append((value, []))
+        else:
+            entities[-1][1].append((int(code), value))
+    return entities
+
+
+def expand_inserts(entities):
+    """{(x, y, z): material} covered by the INSERTs, x-scaled by group code 41"""
+    voxels = {}
+    for kind, groups in entities:
+        if kind == 'INSERT':
+            codes = dict(groups)
+            x, y, z = (round(float(codes[c])) for c in (10, 20, 30))
+            for dx in range(round(float(codes.get(41, 1)))):
+                assert (x + dx, y, z) not in voxels
+                voxels[(x + dx, y, z)] = codes[2]
+    return voxels
+
+
+@pytest.mark.parametrize("merge", [True, False])
+@pytest.mark.parametrize("circuit", stock_circuits() + [synthetic_circuit(20_000)], ids=lambda c: c.name)
+def test_dxf_inserts_rebuild_the_circuit(tmp_path, circuit, merge):
+    path = tmp_path / f"{circuit.name}.dxf"
+    exporter = DXFExporter(circuit_data(circuit), merge_runs=merge)
+    exporter.export(str(path))
+    entities = read_dxf_entities(path)
+    assert entities[-1][0] == 'EOF'
+
+    defined = [dict(groups)[2] for kind, groups in entities if kind == 'BLOCK']
+    layers = [dict(groups)[2] for kind, groups in entities if kind == 'LAYER']
+    faces = sum(kind == '3DFACE' for kind, _ in entities)
+    inserts = sum(kind == 'INSERT' for kind, _ in entities)
+    assert len(defined) == len(set(defined)) and faces == 6 * len(defined)
+    assert set(layers) == set(defined) | {'0'}
+    assert inserts == exporter.counts['inserts']
+    assert (inserts < len(circuit.blocks)) if merge else (inserts == len(circuit.blocks))
+
+    # Later blocks win at repeated positions
+    expected = {}
+    for block in circuit.blocks:
+        expected[(block.x, block.y, block.z)] = material_name(block.block_id)
+    if merge:
+        assert expand_inserts(entities) == expected
+    else:
+        placed = [(tuple(round(float(dict(groups)[c])) for c in (10, 20, 30)), dict(groups)[2])
+                  for kind, groups in entities if kind == 'INSERT']
+        assert placed == [((b.x, b.y, b.z), material_name(b.block_id)) for b in circuit.blocks]
+    assert set(expected.values()) == set(defined)
+
+
+def test_manifest_skips_current_outputs(tmp_path):
+    circuits = [circuit_data(circuit) for circuit in stock_circuits()[:2]]
+    names = [circuit['name'] for circuit in circuits]
+    written = export_circuits(circuits, str(tmp_path), ['obj', 'stl'], jobs=1)
+    assert len(written) == 4
+    outputs = json.loads((tmp_path / MANIFEST_NAME).read_text())['outputs']
+    assert outputs[f"{names[0]}.obj"]['files'] == [f"{names[0]}.obj", f"{names[0]}.mtl"]
+
+    assert export_circuits(circuits, str(tmp_path), ['obj', 'stl'], jobs=1) == []
+    assert len(export_circuits(circuits, str(tmp_path), ['stl'], jobs=1, force=True)) == 2
+
+    # A missing sidecar, a changed circuit or a new format brings the output back
+    (tmp_path / f"{names[0]}.mtl").unlink()
+    changed = dict(circuits[1], positions=circuits[1]['positions'] + 1)
+    written = export_circuits([circuits[0], changed], str(tmp_path), ['obj', 'stl', 'dxf'], jobs=1)
+    assert sorted(Path(path).name for path in written) == sorted([
+        f"{names[0]}.obj", f"{names[0]}.dxf", f"{names[1]}.obj", f"{names[1]}.stl", f"{names[1]}.dxf"])
+    # Entries for outputs not exported in a run are kept
+    assert export_circuits(circuits[:1], str(tmp_path), ['dxf'], jobs=1) == []
+    assert len(json.loads((tmp_path / MANIFEST_NAME).read_text())['outputs']) == 6
@@ -0,0 +1,123 @@
+"""Tests for program parsing, scheduling and compiled layouts"""
+
+import json
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from circuit_lint import lint_circuit
+from gate_compiler import (CNOT_CONTROL_ROW, LANE_GAP, compile_program, emit_circuit, gate_template,
+                           parse_gate_list, parse_program, parse_qasm, schedule)
+
+QASM = """
+OPENQASM 2.0;
+include "qelib1.inc";
+qreg a[2];
+qreg b[2];
+creg c[2];
+h a;            // one H per qubit of a
+cx a, b;        // zipped: a[0] -> b[0], a[1] -> b[1]
+cx a[0], b;     // a[0] repeated against each qubit of b
+x b[1];
+barrier a, b;
+measure a -> c;
+"""
+
+
+def test_qasm_broadcasts_whole_registers():
+    program = parse_qasm(QASM)
+    assert program.n_qubits == 4
+    assert program.gates == [
+        ('h', (0,)), ('h', (1,)),
+        ('cnot', (0, 2)), ('cnot', (1, 3)),
+        ('cnot', (0, 2)), ('cnot', (0, 3)),
+        ('x', (3,)),
+        ('barrier', (0, 1, 2, 3)),
+    ]
+
+
+@pytest.mark.parametrize("text", [
+    "qreg a[2]; qreg b[3]; cx a, b;",   # register sizes differ
+    "qreg a[2]; h c;",                  # unknown register
+    "qreg a[2]; h a[2];",               # index out of range
+    "qreg a[2]; cx a[0], a[0];",        # repeated qubit
+    "qreg a[2]; ccx a[0], a[1];",       # unsupported gate
+])
+def test_qasm_rejects_bad_statements(text):
+    with pytest.raises(ValueError):
+        parse_qasm(text)
+
+
+def test_gate_list_text_matches_tuples():
+    text = "h 0\ncnot 0, 1  # entangle\ncx 1 2\nnot 2\n"
+    assert parse_program(text) == parse_gate_list([('h', 0), ('cnot', 0, 1), ('cnot', 1, 2), ('x', 2)])
+
+
+def test_gates_start_as_soon_as_their_lanes_are_free():
+    placements = schedule(parse_gate_list("h 0\nh 1\nx 2\ncnot 0 1\nz 2\nh 1"))
+    assert [(p.gate, p.qubits, p.column) for p in placements] == [
+        ('prep', (0,), 0), ('prep', (1,), 0), ('prep', (2,), 0),
+        ('h', (0,), 1), ('h', (1,), 1), ('x', (2,), 1),
+        ('cnot', (0, 1), 2), ('z', (2,), 2), ('h', (1,), 3),
+    ]
+
+
+def test_cnot_needs_adjacent_lanes():
+    with pytest.raises(ValueError, match="adjacent"):
+        schedule(parse_gate_list("cnot 0 2"))
+
+
+@pytest.mark.parametrize("control, target", [(0, 1), (1, 0), (2, 3), (3, 2)])
+def test_cnot_control_section_sits_in_the_control_lane(control, target):
+    program = parse_gate_list(f"h 0\ncnot {control} {target}", n_qubits=4)
+    placement = next(p for p in schedule(program) if p.gate == 'cnot')
+    template = gate_template('cnot')
+    pitch = max(gate_template(g).dimensions[2] for g in ('prep', 'h', 'cnot')) + LANE_GAP
+    rows = template.blocks.positions[:, 2]
+    z = (template.dimensions[2] - 1 - rows if placement.mirrored else rows) + placement.offset[2]
+    lanes = z // pitch
+    assert set(lanes[rows >= CNOT_CONTROL_ROW].tolist()) == {control}
+    assert set(lanes[rows < CNOT_CONTROL_ROW].tolist()) == {target}
+
+
+def test_layout_adds_no_lint_findings():
+    rng = np.random.default_rng(3)
+    lines = []
+    for _ in range(200):
+        gate, qubit = rng.choice(['h', 'x', 'z', 'cnot']), int(rng.integers(5))
+        lines.append(f"cnot {qubit} {qubit + 1}" if gate == 'cnot' else f"{gate} {qubit}")
+    program = parse_gate_list("\n".join(lines))
+    expected = Counter()
+    for placement in schedule(program):
+        expected.update(issue.kind for issue in lint_circuit(gate_template(placement.gate, placement.mirrored)))
+    assert Counter(issue.kind for issue in lint_circuit(compile_program(program))) == expected
+
+
+def test_instances_get_their_own_nbt():
+    circuit = compile_program("h 0\nh 1", prepare=False)
+    rows = sorted(circuit.blocks.nbt)
+    assert len(rows) == 2 * len(gate_template('h').blocks.nbt)
+    first, second = circuit.blocks.nbt[rows[0]], circuit.blocks.nbt[rows[len(rows) // 2]]
+    assert first == second and first is not second
+
+
+def test_compiled_blocks_are_translated_templates():
+    circuit = compile_program("x 0\nz 1", prepare=False)
+    placements = schedule(parse_gate_list("x 0\nz 1"), prepare=False)
+    expected = set()
+    for placement in placements:
+        for block in gate_template(placement.gate).blocks:
+            expected.add((block.x + placement.offset[0], block.y + placement.offset[1],
+                          block.z + placement.offset[2], block.block_id))
+    assert {(b.x, b.y, b.z, b.block_id) for b in circuit.blocks} == expected
+
+
+def test_emit_circuit_writes_every_output(tmp_path):
+    circuit = compile_program("h 0\ncnot 0 1", "bell")
+    written = emit_circuit(circuit, str(tmp_path), formats=['stl', 'svg'])
+    names = {path.replace(str(tmp_path), '').lstrip('/\\').replace('\\', '/') for path in written}
+    assert {'bell.json', 'mcfunctions/place_bell.mcfunction', 'bell.litematic', 'bell.schem', 'bell.nbt',
+            'cad_exports/bell.stl', 'cad_exports/bell.svg'} <= names
+    with open(tmp_path / 'bell.json', encoding='utf-8') as f:
+        assert len(json.load(f)['circuits'][0]['blocks']) == len(circuit.blocks)
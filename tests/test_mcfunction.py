@@ -0,0 +1,80 @@
+"""Tests for setblock and /fill-merged mcfunction output"""
+
+import numpy as np
+import pytest
+
+import quantum_circuit_generator as qcg
+from benchmarks import stock_circuits, synthetic_circuit
+from quantum_circuit_generator import (FILL_VOLUME_LIMIT, NEEDS_SUPPORT, Block, BlockStore, Circuit,
+                                       generate_mcfunction, plan_fill_commands, support_offset)
+
+
+def run(text):
+    """
+    Apply an mcfunction's setblock/fill commands in order. Returns
+    {position: block state with NBT} and, per position, the index of the
+    command that last placed it.
+    """
+    world, placed_by = {}, {}
+    commands = [line for line in text.splitlines() if line and not line.startswith('#')]
+    for index, line in enumerate(commands):
+        parts = line.split(' ', 7 if line.startswith('fill') else 4)
+        coords = [int(v.lstrip('~')) for v in parts[1:7 if parts[0] == 'fill' else 4]]
+        low, high = (coords[:3], coords[3:]) if parts[0] == 'fill' else (coords, coords)
+        assert np.prod(np.subtract(high, low) + 1) <= FILL_VOLUME_LIMIT, line
+        for x in range(low[0], high[0] + 1):
+            for y in range(low[1], high[1] + 1):
+                for z in range(low[2], high[2] + 1):
+                    world[(x, y, z)] = parts[-1]
+                    placed_by[(x, y, z)] = index
+    return world, placed_by, commands
+
+
+def circuits():
+    return stock_circuits() + [synthetic_circuit(20_000)]
+
+
+@pytest.mark.parametrize("circuit", circuits(), ids=lambda c: c.name)
+def test_merged_output_builds_the_same_blocks(circuit):
+    plain, _, _ = run(generate_mcfunction(circuit))
+    merged, _, commands = run(generate_mcfunction(circuit, merge=True))
+    assert {pos: state.split('{')[0] for pos, state in merged.items()} == plain
+    _, stats = plan_fill_commands(circuit)
+    assert (stats.setblock_commands, stats.total_commands) == (len(circuit.blocks), len(commands))
+    # Containers keep their NBT
+    positions, _, rows = qcg.resolve_placement(circuit.blocks)
+    for position, row in zip(positions.tolist(), rows.tolist()):
+        if row in circuit.blocks.nbt:
+            assert merged[tuple(position)].endswith(qcg.to_snbt(circuit.blocks.nbt[row]))
+
+
+@pytest.mark.parametrize("circuit", circuits(), ids=lambda c: c.name)
+def test_components_follow_the_block_they_hang_on(circuit):
+    world, placed_by, _ = run(generate_mcfunction(circuit, merge=True))
+    for block in circuit.blocks:
+        if block.block_id not in NEEDS_SUPPORT:
+            continue
+        dx, dy, dz = support_offset(block.block_id, block.properties)
+        support = (block.x + dx, block.y + dy, block.z + dz)
+        # Components resting on components are unsupported anyway (see circuit_lint)
+        if support in world and world[support].split('[')[0] not in NEEDS_SUPPORT:
+            assert placed_by[support] < placed_by[(block.x, block.y, block.z)], block
+
+
+def test_large_boxes_are_split_at_the_fill_limit():
+    store = BlockStore()
+    stone = store.intern('minecraft:stone')
+    grid = np.stack(np.meshgrid(np.arange(40), np.arange(40), np.arange(40), indexing='ij'), -1)
+    store.extend_arrays(grid.reshape(-1, 3), np.full(40 ** 3, stone))
+    circuit = Circuit('cube', '', store, (40, 40, 40))
+    world, _, commands = run(generate_mcfunction(circuit, merge=True))
+    assert len(world) == 40 ** 3
+    assert len(commands) < 10
+
+
+def test_later_blocks_win_at_repeated_positions():
+    circuit = Circuit('overlap', '', [Block(0, 0, 0, 'minecraft:stone'), Block(1, 0, 0, 'minecraft:stone'),
+                                      Block(0, 0, 0, 'minecraft:glass')], (2, 1, 1))
+    world, _, _ = run(generate_mcfunction(circuit, merge=True))
+    assert world == {(0, 0, 0): 'minecraft:glass', (1, 0, 0): 'minecraft:stone'}
+    assert run(generate_mcfunction(circuit))[0] == world
@@ -0,0 +1,90 @@
+"""Tests for the state-vector simulator against Kronecker-product references"""
+
+import numpy as np
+import pytest
+
+from quantum_state import (CNOT, HADAMARD, IDENTITY, PAULI_X, PAULI_Z, StateVector,
+                           fuse_gates, phase_gate, simulate)
+
+MATRICES = {'x': PAULI_X, 'z': PAULI_Z, 'h': HADAMARD}
+
+
+def kron_all(factors):
+    result = np.ones(1)
+    for factor in factors:
+        result = np.kron(result, factor)
+    return result
+
+
+def full_operator(gate, n_qubits: int) -> np.ndarray:
+    """Dense 2^n x 2^n matrix of a gate tuple, qubit 0 most significant"""
+    if gate[0] == 'cnot':
+        control, target = gate[1], gate[2]
+        p0 = np.diag([1, 0]).astype(np.complex128)
+        p1 = np.diag([0, 1]).astype(np.complex128)
+        off = [p0 if q == control else IDENTITY for q in range(n_qubits)]
+        on = [p1 if q == control else PAULI_X if q == target else IDENTITY for q in range(n_qubits)]
+        return kron_all(off) + kron_all(on)
+    matrix = phase_gate(gate[2]) if gate[0] == 'phase' else MATRICES[gate[0]]
+    return kron_all([matrix if q == gate[1] else IDENTITY for q in range(n_qubits)])
+
+
+def random_program(rng, n_qubits: int, length: int):
+    gates = []
+    for _ in range(length):
+        kind = rng.choice(['x', 'z', 'h', 'phase', 'cnot'])
+        if kind == 'cnot':
+            control, target = rng.choice(n_qubits, 2, replace=False).tolist()
+            gates.append(('cnot', control, target))
+        elif kind == 'phase':
+            gates.append(('phase', int(rng.integers(n_qubits)), float(rng.uniform(0, 2 * np.pi))))
+        else:
+            gates.append((str(kind), int(rng.integers(n_qubits))))
+    return gates
+
+
+@pytest.mark.parametrize("fuse", [True, False])
+@pytest.mark.parametrize("seed", range(5))
+def test_program_matches_kronecker_reference(seed, fuse):
+    rng = np.random.default_rng(seed)
+    n_qubits = 4
+    gates = random_program(rng, n_qubits, 30)
+    reference = np.zeros(1 << n_qubits, dtype=np.complex128)
+    reference[0] = 1
+    for gate in gates:
+        reference = full_operator(gate, n_qubits) @ reference
+    state = simulate(gates, n_qubits, fuse=fuse)
+    np.testing.assert_allclose(state.amplitudes[0], reference, atol=1e-12)
+
+
+def test_cnot_matrix_has_control_on_qubit_zero():
+    np.testing.assert_array_equal(CNOT, full_operator(('cnot', 0, 1), 2))
+
+
+def test_from_signals_builds_product_states():
+    alphas = np.array([[15, 0, 5], [3, 12, 15]])
+    state = StateVector.from_signals(alphas)
+    for row, levels in zip(state.amplitudes, alphas):
+        qubits = [np.array([np.sqrt(a / 15), np.sqrt(1 - a / 15)]) for a in levels]
+        np.testing.assert_allclose(row, kron_all(qubits), atol=1e-12)
+    for q in range(alphas.shape[1]):
+        np.testing.assert_allclose(state.probability_zero(q), alphas[:, q] / 15, atol=1e-12)
+
+
+def test_batch_runs_each_state_independently():
+    rng = np.random.default_rng(7)
+    gates = random_program(rng, 3, 20)
+    alphas = rng.integers(0, 16, (6, 3))
+    batched = StateVector.from_signals(alphas).run(gates)
+    for row, levels in zip(batched.amplitudes, alphas):
+        single = StateVector.from_signals(levels[None, :]).run(gates)
+        np.testing.assert_allclose(row, single.amplitudes[0], atol=1e-12)
+
+
+def test_fusion_drops_identity_runs():
+    assert fuse_gates([('h', 0), ('h', 0), ('x', 1), ('x', 1)]) == []
+
+
+def test_cnot_rejects_equal_control_and_target():
+    with pytest.raises(ValueError):
+        simulate([('cnot', 1, 1)], 2)
@@ -0,0 +1,86 @@
+"""RCON placement against the in-process MockRconServer"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+import quantum_circuit_generator as qcg
+from benchmarks import synthetic_circuit
+from gate_compiler import compile_program
+from rcon_client import MockRconServer, RconError, RconPool, place_circuit
+
+ORIGIN = (-7, 64, 13)
+
+
+def expected_world(circuit):
+    positions, state_ids, _ = qcg.resolve_placement(circuit.blocks)
+    return {tuple((position + ORIGIN).tolist()): qcg.format_block_state(*circuit.blocks.palette[state])
+            for position, state in zip(positions.astype(np.int64), state_ids)}
+
+
+async def place(circuit, drop_every=0, **options):
+    async with MockRconServer('pw', drop_every=drop_every) as mock:
+        async with RconPool('127.0.0.1', mock.port, 'pw', retry_delay=0.01, **options) as pool:
+            failed = await place_circuit(pool, circuit, ORIGIN)
+    return failed, mock
+
+
+CIRCUITS = [
+    qcg.generate_cnot,
+    qcg.generate_hadamard,
+    lambda: qcg.generate_phase_engine(qcg.generate_lookup_table(16)),
+    lambda: compile_program("".join(f"h {i}\ncnot {i} {i + 1}\n" for i in range(11)) * 3, "prog"),
+]
+
+
+@pytest.mark.parametrize("generator", CIRCUITS)
+# Dropping every 7th command with 8 in flight loses up to half of each
+# connection's commands, so that case gets a deeper retry budget
+@pytest.mark.parametrize("options", [{}, {'drop_every': 7, 'connections': 3, 'window': 8, 'batch_size': 4,
+                                          'max_retries': 10}])
+def test_place_circuit_builds_every_block(generator, options):
+    circuit = generator()
+    failed, mock = asyncio.run(place(circuit, **options))
+    assert failed == 0
+    assert {position: state.split('{')[0] for position, state in mock.blocks.items()} == expected_world(circuit)
+    assert not mock.forced, "chunks left force-loaded"
+
+
+def test_large_circuit_over_several_connections():
+    circuit = synthetic_circuit(20_000)
+    failed, mock = asyncio.run(place(circuit, connections=4, window=256, batch_size=64))
+    assert failed == 0
+    assert {position: state.split('{')[0] for position, state in mock.blocks.items()} == expected_world(circuit)
+
+
+def test_wrong_password_is_rejected():
+    async def connect():
+        async with MockRconServer('pw') as mock:
+            async with RconPool('127.0.0.1', mock.port, 'wrong'):
+                pass
+
+    with pytest.raises(RconError):
+        asyncio.run(connect())
+
+
+def test_unloaded_chunk_fails_after_retries():
+    async def run():
+        async with MockRconServer('pw') as mock:
+            async with RconPool('127.0.0.1', mock.port, 'pw', max_retries=2, retry_delay=0.01) as pool:
+                with pytest.raises(RconError, match="not loaded"):
+                    await pool.execute('setblock 0 0 0 minecraft:stone')
+                return mock.commands
+
+    assert asyncio.run(run()) == ['setblock 0 0 0 minecraft:stone'] * 3
+
+
+def test_replies_match_their_commands():
+    async def run():
+        async with MockRconServer('pw') as mock:
+            async with RconPool('127.0.0.1', mock.port, 'pw', connections=3, window=8, batch_size=4) as pool:
+                await pool.execute('forceload add 0 0')
+                return await pool.run([f'setblock {i % 16} {i} 0 minecraft:stone' for i in range(50)])
+
+    placed = asyncio.run(run())
+    assert placed == [f"Changed the block at {i % 16}, {i}, 0" for i in range(50)]
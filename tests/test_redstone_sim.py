@@ -0,0 +1,117 @@
+"""Tests for the redstone simulator and the gate transfer tables"""
+
+import dataclasses
+
+import numpy as np
+import pytest
+
+import quantum_circuit_generator as qcg
+import quantum_state
+from circuit_lint import lint_circuit
+from quantum_circuit_generator import Block, Circuit
+from redstone_sim import (BatchSimulator, RedstoneSimulator, compose_tables, simulate_gate,
+                         truth_table)
+
+
+def wire_line(length: int) -> Circuit:
+    blocks = [Block(0, 0, 0, "minecraft:redstone_block")]
+    blocks += [Block(x, 0, 0, "minecraft:redstone_wire") for x in range(1, length + 1)]
+    return Circuit("wire_line", "", blocks, (length + 1, 1, 1))
+
+
+def inverter() -> Circuit:
+    return Circuit("inverter", "", [
+        Block(0, 0, 0, "minecraft:redstone_wire"),
+        Block(1, 0, 0, "minecraft:stone"),
+        Block(1, 1, 0, "minecraft:redstone_torch"),
+        Block(2, 1, 0, "minecraft:redstone_wire"),
+    ], (3, 2, 1))
+
+
+def test_wire_loses_one_level_per_block():
+    sim = RedstoneSimulator(wire_line(17))
+    sim.run()
+    assert [sim.power(x, 0, 0) for x in range(1, 18)] == list(range(15, -1, -1)) + [0]
+
+
+def test_repeater_restores_full_signal():
+    circuit = wire_line(12)
+    circuit.blocks.append(Block(13, 0, 0, "minecraft:repeater", properties={"facing": "east", "delay": 1}))
+    circuit.blocks.append(Block(14, 0, 0, "minecraft:redstone_wire"))
+    sim = RedstoneSimulator(circuit)
+    sim.run()
+    assert sim.power(12, 0, 0) == 4
+    assert sim.power(14, 0, 0) == 15
+
+
+@pytest.mark.parametrize("level, expected", [(0, 15), (1, 0), (15, 0)])
+def test_torch_inverts_its_block(level, expected):
+    sim = RedstoneSimulator(inverter())
+    sim.drive(0, 0, 0, level)
+    sim.run()
+    assert sim.power(1, 1, 0) == expected
+    assert sim.power(2, 1, 0) == expected
+
+
+def test_torch_switches_back_when_released():
+    sim = RedstoneSimulator(inverter())
+    sim.drive(0, 0, 0, 15)
+    sim.run()
+    sim.drive(0, 0, 0, 0)
+    sim.run()
+    assert sim.power(1, 1, 0) == 15
+
+
+def test_batch_simulator_matches_event_simulator():
+    circuit = inverter()
+    levels = np.arange(16)
+    batch = BatchSimulator(circuit).run(drive={(0, 0, 0): levels})
+    assert batch.settled.all()
+    for level in levels.tolist():
+        sim = RedstoneSimulator(circuit)
+        sim.drive(0, 0, 0, level)
+        sim.run()
+        assert batch.power(2, 1, 0)[level] == sim.power(2, 1, 0)
+
+
+@pytest.mark.parametrize("generator", [qcg.generate_pauli_x, qcg.generate_pauli_z])
+def test_truth_table_matches_gate_simulation(generator):
+    circuit = generator()
+    table = truth_table(circuit)
+    assert table.settled.all()
+    for index in [(0, 15), (3, 12), (15, 0), (7, 7)]:
+        for extra in np.ndindex(*table.values.shape[2:-1]):
+            entry = index + extra
+            inputs = {name: int(levels[j]) for name, levels, j in zip(table.inputs, table.levels, entry)}
+            outputs = simulate_gate(circuit, inputs)
+            assert dict(zip(table.outputs, table.values[entry].tolist())) == outputs, inputs
+
+
+def test_cnot_table_matches_state_vector_reference():
+    table = dataclasses.replace(qcg.gate_transfer_table('cnot'), circuit='cnot_gate')
+    assert not quantum_state.reference_mismatches(table).any()
+
+
+def test_composed_tables_follow_gate_order():
+    # PHASE is cleared whenever a rail is empty, so compare where both are lit
+    twice = qcg.compose_transfer(['x', 'x'])
+    lit = slice(1, None), slice(1, None)
+    assert np.array_equal(twice.values[lit], qcg.identity_transfer_table().values[lit])
+    manual = compose_tables([qcg.gate_transfer_table(g) for g in ('h', 'z', 'h')])
+    assert np.array_equal(qcg.compose_transfer(['h', 'z', 'h']).values, manual.values)
+
+
+def test_compose_tables_rejects_mismatched_inputs():
+    with pytest.raises(ValueError):
+        compose_tables([qcg.gate_transfer_table('x'), qcg.gate_transfer_table('cnot')])
+
+
+@pytest.mark.parametrize("gates", [['h', 'z'], ['x', 'h'], []])
+def test_chain_lookup_matches_the_composed_table(gates):
+    circuit = qcg.generate_chain_lookup(gates)
+    assert lint_circuit(circuit) == []
+    table = truth_table(circuit)
+    assert table.inputs == ['alpha', 'phase'] and table.settled.all()
+    # Valid inputs only: OMEGA is max_signal - ALPHA
+    alpha = np.arange(16)
+    assert np.array_equal(table.values, qcg.compose_transfer(gates).values[alpha, 15 - alpha])
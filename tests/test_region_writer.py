@@ -0,0 +1,101 @@
+"""Round-trip tests for the Anvil region writer"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from benchmarks import stock_circuits, synthetic_circuit
+from quantum_circuit_generator import resolve_placement
+from region_writer import (MIN_Y, RegionFile, _state_key, pack_section_states, stamp_world,
+                           unpack_section_states)
+
+# Top of the default superflat layers
+GROUND_Y = MIN_Y + 4
+
+
+def read_world(world_dir):
+    """Every non-air block ({position: state key}) and block entity in a world"""
+    blocks, entities = {}, {}
+    for path in sorted((Path(world_dir) / 'region').glob('r.*.mca')):
+        region = RegionFile(path)
+        _, rx, rz, _ = path.name.split('.')
+        for index in region.chunks:
+            cx, cz = int(rx) * 32 + index % 32, int(rz) * 32 + index // 32
+            chunk = region.read(cx, cz)
+            assert (chunk['xPos'], chunk['zPos']) == (cx, cz)
+            for section in chunk['sections']:
+                states = section.get('block_states')
+                if not states:
+                    continue
+                palette = [_state_key(entry['Name'], entry.get('Properties')) for entry in states['palette']]
+                if len(palette) == 1:
+                    values = np.zeros(4096, dtype=np.int64)
+                else:
+                    values = unpack_section_states(states['data'], max(4, (len(palette) - 1).bit_length()))
+                solid = np.array([key[0] != 'minecraft:air' for key in palette])[values]
+                for i in np.flatnonzero(solid).tolist():
+                    position = (cx * 16 + i % 16, section['Y'] * 16 + i // 256, cz * 16 + (i // 16) % 16)
+                    blocks[position] = palette[values[i]]
+            for entity in chunk['block_entities']:
+                entities[(entity['x'], entity['y'], entity['z'])] = entity
+    return blocks, entities
+
+
+def expected_world(placements):
+    blocks, entities = {}, {}
+    for circuit, origin in placements:
+        positions, state_ids, rows = resolve_placement(circuit.blocks)
+        for position, state, row in zip(positions.tolist(), state_ids.tolist(), rows.tolist()):
+            key = tuple(p + o for p, o in zip(position, origin))
+            blocks[key] = _state_key(*circuit.blocks.palette[state])
+            if row in circuit.blocks.nbt:
+                entities[key] = circuit.blocks.nbt[row]
+            else:
+                entities.pop(key, None)
+    return blocks, entities
+
+
+def check_world(world_dir, placements):
+    got, got_entities = read_world(world_dir)
+    expected, expected_entities = expected_world(placements)
+    assert {position: got[position] for position in expected} == expected
+    # Everything else is superflat terrain
+    assert all(position[1] < GROUND_Y for position in got if position not in expected)
+    assert set(expected_entities) <= set(got_entities)
+    for position in expected_entities:
+        assert got_entities[position]['id'] == expected[position][0]
+    for position in got_entities:
+        assert position in expected_entities or position not in expected
+
+
+@pytest.mark.parametrize("bits", [4, 5, 7, 9, 12])
+def test_section_states_round_trip(bits):
+    values = np.random.default_rng(bits).integers(0, 1 << bits, 4096)
+    np.testing.assert_array_equal(unpack_section_states(pack_section_states(values, bits), bits), values)
+
+
+@pytest.fixture(scope="module")
+def gate_placements():
+    circuits = stock_circuits()
+    # Spread across regions, including negative coordinates and region borders
+    return [(circuits[i % len(circuits)], ((i % 6) * 100 - 300, GROUND_Y, (i // 6) * 200 - 520))
+            for i in range(24)]
+
+
+def test_new_world_holds_every_placement(tmp_path, gate_placements):
+    world = tmp_path / "world"
+    stamp_world(str(world), gate_placements)
+    check_world(world, gate_placements)
+
+
+def test_layered_write_overwrites_an_existing_world(tmp_path, gate_placements):
+    base = tmp_path / "base"
+    stamp_world(str(base), gate_placements)
+    more = [(stock_circuits()[4], gate_placements[0][1]),
+            (synthetic_circuit(30_000), (-40, GROUND_Y + 10, 60))]
+    world = tmp_path / "layered"
+    stamp_world(str(world), more, source=str(base))
+    check_world(world, gate_placements + more)
+    # The source world is left untouched
+    check_world(base, gate_placements)
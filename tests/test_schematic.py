@@ -0,0 +1,55 @@
+"""Round-trip tests for the schematic writers, readers and bit packing"""
+
+import numpy as np
+import pytest
+
+import schematic
+from benchmarks import stock_circuits, synthetic_circuit
+from circuit_diff import diff_circuits
+from quantum_circuit_generator import Circuit
+
+
+@pytest.mark.parametrize("count", [0, 1, 100, 5000])
+def test_varints_round_trip(count):
+    rng = np.random.default_rng(count)
+    values = rng.integers(0, 2 ** 31, count) >> rng.integers(0, 31, count)
+    encoded = schematic.encode_varints(values)
+    np.testing.assert_array_equal(schematic.decode_varints(encoded), values)
+
+
+@pytest.mark.parametrize("bits", [2, 3, 4, 5, 7, 12, 31])
+def test_long_arrays_round_trip(bits):
+    rng = np.random.default_rng(bits)
+    values = rng.integers(0, 1 << bits, 4099)
+    packed = schematic.pack_long_array(values, bits)
+    np.testing.assert_array_equal(schematic.unpack_long_array(packed, bits, len(values)), values)
+
+
+def circuits():
+    return stock_circuits() + [synthetic_circuit(20_000)]
+
+
+@pytest.mark.parametrize("ext", [".schem", ".litematic", ".nbt"])
+def test_schematics_round_trip(tmp_path, ext):
+    for circuit in circuits():
+        path = tmp_path / f"{circuit.name}{ext}"
+        schematic.export_schematic(circuit, str(path))
+        loaded = schematic.load_schematic(str(path))
+        if ext == ".nbt":
+            # Structures store no origin, so blocks come back relative to the minimum corner
+            offset = tuple(circuit.blocks.positions.min(axis=0).tolist())
+            loaded = Circuit(loaded.name, loaded.description,
+                             loaded.blocks.subset(np.arange(len(loaded.blocks)), offset),
+                             loaded.dimensions)
+        diff = diff_circuits(circuit, loaded)
+        assert diff.is_empty, (circuit.name, diff.summary())
+
+
+def test_nbt_round_trips_typed_values():
+    root = {"Byte": schematic.TagByte(3), "Short": schematic.TagShort(-2), "Long": schematic.TagLong(1 << 40),
+            "Float": schematic.TagFloat(0.5), "Double": 0.25, "Int": 7, "String": "redstone",
+            "List": [1, 2, 3], "Compound": {"Nested": "yes"}}
+    name, decoded = schematic.decode_nbt(schematic.encode_nbt(root, "root"))
+    assert name == "root"
+    assert decoded == root
+    assert {key: type(value) for key, value in decoded.items()} == {key: type(value) for key, value in root.items()}